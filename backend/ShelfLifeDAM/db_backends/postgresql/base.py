@@ -0,0 +1,8 @@
+"""PostgreSQL backend with connect timing (see ShelfLifeDAM.db_metrics)"""
+from django.db.backends.postgresql import base
+
+from ShelfLifeDAM.db_metrics import MeteredConnectMixin
+
+
+class DatabaseWrapper(MeteredConnectMixin, base.DatabaseWrapper):
+    pass
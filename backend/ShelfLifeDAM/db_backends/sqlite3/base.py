@@ -0,0 +1,8 @@
+"""SQLite backend with connect timing (see ShelfLifeDAM.db_metrics)"""
+from django.db.backends.sqlite3 import base
+
+from ShelfLifeDAM.db_metrics import MeteredConnectMixin
+
+
+class DatabaseWrapper(MeteredConnectMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,97 @@
+"""
+Connection reuse metrics for persistent database connections.
+
+With CONN_MAX_AGE each worker thread keeps one connection per alias open
+between requests, so the only time a request waits on the database before
+its first query is when that connection has to be (re)opened. The metered
+backends in ShelfLifeDAM.db_backends time every connect, and
+ConnectionMetricsMiddleware attributes them to requests:
+
+* a ``Server-Timing: db-connect;dur=<ms>`` header on every response, and
+* process-wide counters served to admins at /api/auth/metrics/db/.
+
+Counters are per process; sum them across workers when comparing.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.utils.deprecation import MiddlewareMixin
+
+
+class ConnectionMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_opened = 0
+            self.connect_seconds_total = 0.0
+            self.connect_seconds_max = 0.0
+            self.requests = 0
+            self.requests_reusing = 0
+
+    def record_connect(self, seconds):
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_seconds_total += seconds
+            self.connect_seconds_max = max(self.connect_seconds_max, seconds)
+
+    def record_request(self, opened):
+        with self._lock:
+            self.requests += 1
+            if not opened:
+                self.requests_reusing += 1
+
+    def snapshot(self):
+        with self._lock:
+            opened = self.connections_opened
+            return {
+                'connections_opened': opened,
+                'connect_ms_total': round(self.connect_seconds_total * 1000, 3),
+                'connect_ms_avg': round(self.connect_seconds_total * 1000 / opened, 3) if opened else 0.0,
+                'connect_ms_max': round(self.connect_seconds_max * 1000, 3),
+                'requests': self.requests,
+                'requests_reusing_connection': self.requests_reusing,
+                'reuse_ratio': round(self.requests_reusing / self.requests, 4) if self.requests else None,
+            }
+
+
+connection_metrics = ConnectionMetrics()
+
+# Connects made by the current thread during its current request
+_request_connects = threading.local()
+
+
+@contextmanager
+def timed_connect():
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    connection_metrics.record_connect(elapsed)
+    if getattr(_request_connects, 'active', False):
+        _request_connects.count += 1
+        _request_connects.seconds += elapsed
+
+
+class MeteredConnectMixin:
+    """Mixed into a backend's DatabaseWrapper to time every new connection"""
+
+    def get_new_connection(self, conn_params):
+        with timed_connect():
+            return super().get_new_connection(conn_params)
+
+
+class ConnectionMetricsMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        _request_connects.active = True
+        _request_connects.count = 0
+        _request_connects.seconds = 0.0
+
+    def process_response(self, request, response):
+        if getattr(_request_connects, 'active', False):
+            _request_connects.active = False
+            connection_metrics.record_request(opened=_request_connects.count > 0)
+            response['Server-Timing'] = f'db-connect;dur={_request_connects.seconds * 1000:.2f}'
+        return response
@@ -0,0 +1,117 @@
+"""
+Response renderers and compression for the API.
+
+FastJSONRenderer produces the same JSON as DRF's JSONRenderer but encodes
+with orjson when it is installed. MessagePackRenderer serves
+``application/msgpack`` to clients that ask for it (Accept header or
+``?format=msgpack``) and is only enabled when msgpack is installed.
+
+CompressionMiddleware compresses GET API responses above
+RESPONSE_COMPRESSION_MIN_BYTES with brotli when the client accepts it and
+the brotli package is installed, and with gzip otherwise.
+"""
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_drf_encoder = encoders.JSONEncoder()
+
+# Line and paragraph separators are valid JSON but not valid JavaScript
+_JS_ESCAPES = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def _default(obj):
+    # Anything the fast encoders don't handle natively is formatted the way DRF would
+    return _drf_encoder.default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Datetimes go through DRF's encoder so the output matches JSONRenderer exactly
+        content = orjson.dumps(data, default=_default,
+                               option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        for raw, escaped in _JS_ESCAPES:
+            if raw in content:
+                content = content.replace(raw, escaped)
+        return content
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/msgpack')
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        # GET only: pages are the large responses, and token-bearing POST
+        # responses (login, refresh) stay out of reach of BREACH-style probing
+        if (request.method != 'GET' or response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < settings.RESPONSE_COMPRESSION_MIN_BYTES):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding, compressed = 'br', brotli.compress(response.content, quality=4)
+        elif 'gzip' in accepted:
+            encoding, compressed = 'gzip', compress_string(response.content)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        # ETags are left strong: they identify the decoded representation, which
+        # is what If-Match compares, and Vary keeps caches from mixing encodings
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,138 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Only reads made inside a view wrapped with ``replica_reads`` may go to one of
+the aliases in settings.DATABASE_REPLICAS; every other read, and every write,
+uses ``default``. Inside such a view reads still stay on the primary when:
+
+* the client wrote something in the last READ_YOUR_WRITES_SECONDS, recorded
+  by ReadYourWritesMiddleware in the shared cache (per user) and in a cookie,
+* the request itself has already written or has a transaction open, or
+* no replica passed its most recent health check.
+
+One replica is picked per request, so a paginated list and its count query
+see the same snapshot.
+"""
+import contextvars
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import HttpRequest
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.request import Request
+
+PIN_COOKIE = 'primary_reads'
+
+_read_state = contextvars.ContextVar('replica_read_state', default=None)
+
+# alias -> (checked_at, healthy)
+_replica_health = {}
+
+
+def pin_cache_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def check_replica(alias):
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except DatabaseError:
+        return False
+
+
+def replica_is_healthy(alias):
+    """Health of a replica, re-checked at most every DATABASE_REPLICA_HEALTH_INTERVAL seconds"""
+    now = time.monotonic()
+    checked = _replica_health.get(alias)
+    if checked is None or now - checked[0] >= settings.DATABASE_REPLICA_HEALTH_INTERVAL:
+        checked = (now, check_replica(alias))
+        _replica_health[alias] = checked
+    return checked[1]
+
+
+def reset_replica_health():
+    _replica_health.clear()
+
+
+def healthy_replica():
+    """A random healthy replica alias, or None to fall back to the primary"""
+    candidates = [alias for alias in settings.DATABASE_REPLICAS if replica_is_healthy(alias)]
+    return random.choice(candidates) if candidates else None
+
+
+def is_pinned(request):
+    """Whether the client behind request wrote recently enough to need the primary"""
+    if request.COOKIES.get(PIN_COOKIE):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and cache.get(pin_cache_key(user.pk)))
+
+
+class _ReadState:
+    def __init__(self, request):
+        self.request = request
+        self.alias = None
+        self.wrote = False
+
+    def read_alias(self):
+        if self.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if self.alias is None:
+            # Decided on the first read, after authentication has set request.user
+            self.alias = DEFAULT_DB_ALIAS if is_pinned(self.request) else healthy_replica() or DEFAULT_DB_ALIAS
+        return self.alias
+
+
+def replica_reads(view):
+    """Allow the reads in a function view or viewset action to be served by a replica"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, (Request, HttpRequest)))
+        if not settings.DATABASE_REPLICAS:
+            return view(*args, **kwargs)
+        token = _read_state.set(_ReadState(request))
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _read_state.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _read_state.get()
+        return state.read_alias() if state is not None else None
+
+    def db_for_write(self, model, **hints):
+        state = _read_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReadYourWritesMiddleware(MiddlewareMixin):
+    """Pin a client's replica-eligible reads to the primary for a while after it writes"""
+
+    def process_response(self, request, response):
+        if (settings.DATABASE_REPLICAS and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 400):
+            window = settings.READ_YOUR_WRITES_SECONDS
+            # DRF copies the token-authenticated user back onto the Django request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                cache.set(pin_cache_key(user.pk), True, window)
+            response.set_cookie(PIN_COOKIE, '1', max_age=window, httponly=True, samesite='Lax')
+        return response
@@ -1,5 +1,7 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
+from corsheaders.defaults import default_headers as default_cors_headers
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -35,6 +37,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ShelfLifeDAM.db_metrics.ConnectionMetricsMiddleware',
+    'ShelfLifeDAM.renderers.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -44,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ShelfLifeDAM.replicas.ReadYourWritesMiddleware',
 ]
 
 ROOT_URLCONF = 'ShelfLifeDAM.urls'
@@ -66,18 +71,51 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'ShelfLifeDAM.wsgi.application'
+ASGI_APPLICATION = 'ShelfLifeDAM.asgi.application'
 
+# Connections are persistent: each worker thread keeps at most one open per alias
+# for DB_CONN_MAX_AGE seconds, so size max_connections for
+# workers x threads x (1 + replicas), or put PgBouncer in front and set DB_PGBOUNCER.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # Stock PostgreSQL backend plus connect timing (ShelfLifeDAM.db_metrics)
+        'ENGINE': 'ShelfLifeDAM.db_backends.postgresql',
         'NAME': os.getenv('DB_NAME', 'shelflifedam'),
         'USER': os.getenv('DB_USER', 'postgres'),
         'PASSWORD': os.getenv('DB_PASSWORD', 'password'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+        # Ping a reused connection before its first query in each request
+        'CONN_HEALTH_CHECKS': True,
+        # Transaction-mode PgBouncer can't keep the named cursors .iterator() uses
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER', 'False').lower() == 'true',
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+        },
     }
 }
 
+# Small single-server installs can run on a SQLite file instead (DB_NAME is its path)
+if os.getenv('DB_ENGINE', 'postgresql').lower() == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'ShelfLifeDAM.db_backends.sqlite3',
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+    }
+
+# Read replicas: comma-separated hosts sharing the primary's name and credentials.
+# Only views decorated with ShelfLifeDAM.replicas.replica_reads read from them.
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(h.strip() for h in os.getenv('DB_REPLICA_HOSTS', '').split(',') if h.strip()):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': replica_host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['ShelfLifeDAM.replicas.ReplicaRouter']
+DATABASE_REPLICA_HEALTH_INTERVAL = int(os.getenv('DB_REPLICA_HEALTH_INTERVAL', '10'))  # seconds
+
+# After a write, a client's reads stay on the primary for this long
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', '5'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -95,7 +133,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -106,9 +144,18 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    'DEFAULT_RENDERER_CLASSES': (
+        'ShelfLifeDAM.renderers.FastJSONRenderer',
+        # application/msgpack for internal clients, when msgpack is installed
+        *(('ShelfLifeDAM.renderers.MessagePackRenderer',) if find_spec('msgpack') else ()),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# GET API responses at least this large are gzip/brotli compressed (ShelfLifeDAM.renderers)
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -116,6 +163,11 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Authenticated principal cache (users.authentication.CachedJWTAuthentication)
+AUTH_USER_CACHE_LOCAL_SIZE = 4096  # Users kept in each process's LRU
+AUTH_USER_CACHE_LOCAL_TTL = 5  # Seconds; bounds staleness of changes made in other processes
+AUTH_USER_CACHE_SHARED_TTL = 300  # Seconds in the shared cache; dropped on User save/delete
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -123,6 +175,10 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Conditional requests on assets (assets.etags)
+CORS_ALLOW_HEADERS = (*default_cors_headers, 'if-match', 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag', 'X-Search-Suggestion']
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -140,6 +196,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 FILE_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
 
+# Storage quota per role in bytes; roles not listed (and admins) are unlimited.
+# UserStorageUsage.quota_bytes overrides this for individual users.
+STORAGE_QUOTA_BYTES = {
+    'editor': int(os.getenv('EDITOR_STORAGE_QUOTA_BYTES', str(10 * 1024 ** 3))),  # 10GB
+}
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
@@ -147,6 +209,21 @@ AUTH_USER_MODEL = 'users.User'
 CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
+# Shared cache: Redis when REDIS_URL is configured, per-process memory otherwise
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # AWS S3 configuration (for production)
 AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -155,4 +232,41 @@ AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME', 'us-east-1')
 AWS_S3_CUSTOM_DOMAIN = os.getenv('AWS_S3_CUSTOM_DOMAIN')
 
 if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
\ No newline at end of file
+    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+
+# Activity analytics
+# Log rows younger than this are left for the next rollup run so late commits aren't skipped
+ACTIVITY_ROLLUP_SETTLE_SECONDS = int(os.getenv('ACTIVITY_ROLLUP_SETTLE_SECONDS', '60'))
+
+# Half-lives of the activity-based asset rankings (activity.popularity, run by update_popularity):
+# ordering=popularity decays over weeks, ordering=trending over hours
+ASSET_POPULARITY_HALF_LIFE_DAYS = float(os.getenv('ASSET_POPULARITY_HALF_LIFE_DAYS', '30'))
+ASSET_TRENDING_HALF_LIFE_HOURS = float(os.getenv('ASSET_TRENDING_HALF_LIFE_HOURS', '24'))
+
+# Seconds the compact recent activity feed may be served from cache
+RECENT_ACTIVITY_CACHE_TTL = int(os.getenv('RECENT_ACTIVITY_CACHE_TTL', '15'))
+
+# Asset list/detail responses are invalidated by generation counters (assets.response_cache);
+# the TTL bounds orphaned entries and pages filled from a lagging replica
+ASSET_RESPONSE_CACHE_TTL = int(os.getenv('ASSET_RESPONSE_CACHE_TTL', '60'))
+
+# Full-text search for search_assets and the asset list's ?search= (assets.search).
+# Without PostgreSQL, assets.search.inverted_index.InvertedIndexBackend ranks with BM25
+# from an index kept under ASSET_SEARCH_INDEX_DIR; build it with rebuild_search_index.
+ASSET_SEARCH_BACKEND = os.getenv('ASSET_SEARCH_BACKEND', 'assets.search.database.DatabaseSearchBackend')
+ASSET_SEARCH_INDEX_DIR = os.getenv('ASSET_SEARCH_INDEX_DIR', os.path.join(BASE_DIR, 'search_index'))
+ASSET_SEARCH_JOURNAL_MAX_BYTES = int(os.getenv('ASSET_SEARCH_JOURNAL_MAX_BYTES', str(4 * 1024 * 1024)))
+
+# Document text extraction for search (assets.extraction, run by extract_asset_text).
+# Files are read no further than MAX_FILE_BYTES; stored text is cut at MAX_CHARS.
+ASSET_TEXT_MAX_FILE_BYTES = int(os.getenv('ASSET_TEXT_MAX_FILE_BYTES', str(50 * 1024 * 1024)))
+ASSET_TEXT_MAX_CHARS = int(os.getenv('ASSET_TEXT_MAX_CHARS', '1000000'))
+
+# Real-time event stream (/api/activity/stream/ and the /api/activity/ws/ WebSocket)
+# 'inprocess' only fans out within one process; use 'redis' with more than one worker
+EVENT_STREAM_BROKER = os.getenv('EVENT_STREAM_BROKER', 'redis' if os.getenv('REDIS_URL') else 'inprocess')
+EVENT_STREAM_REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+EVENT_STREAM_HISTORY = int(os.getenv('EVENT_STREAM_HISTORY', '1000'))  # Events kept for Last-Event-ID resume
+EVENT_STREAM_KEEPALIVE_SECONDS = 15
+EVENT_STREAM_RETRY_MS = 3000
+EVENT_STREAM_MAX_SECONDS = int(os.getenv('EVENT_STREAM_MAX_SECONDS', '300'))
@@ -11,11 +11,28 @@ from .settings import *
 # Use SQLite in-memory database for testing
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'ShelfLifeDAM.db_backends.sqlite3',
         'NAME': ':memory:',
+    },
+    # Second connection to the same test database; routing tests enable it
+    # by setting DATABASE_REPLICAS = ['replica']
+    'replica': {
+        'ENGINE': 'ShelfLifeDAM.db_backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_REPLICAS = []
+
+# Keep caching in-process regardless of REDIS_URL
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+EVENT_STREAM_BROKER = 'inprocess'
+
 # Disable migrations for faster testing
 class DisableMigrations:
     def __contains__(self, item):
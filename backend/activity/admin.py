@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ActivityLog, Comment
+from .models import ActivityLog, Comment, JobWatermark
 
 
 @admin.register(ActivityLog)
@@ -21,4 +21,9 @@ class CommentAdmin(admin.ModelAdmin):
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
 
-    content_preview.short_description = 'Content'
\ No newline at end of file
+    content_preview.short_description = 'Content'
+
+@admin.register(JobWatermark)
+class JobWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'position', 'updated_at')
+    readonly_fields = ('updated_at',)
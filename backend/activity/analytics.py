@@ -0,0 +1,61 @@
+"""
+Read-side queries for activity analytics.
+
+Everything here reads the pre-aggregated rollup tables maintained by
+activity.rollups, never the raw activity log.
+"""
+from django.db.models import Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+
+from .models import AssetActivityRollup, UserActivityRollup
+
+
+def rollups_for(user, dimension, granularity, action=None, date_from=None, date_to=None):
+    """Return the rollup queryset for a dimension, scoped to what the user may see"""
+    if dimension == 'user':
+        queryset = UserActivityRollup.objects.filter(granularity=granularity)
+        if not user.is_admin:
+            queryset = queryset.filter(user=user)
+    else:
+        queryset = AssetActivityRollup.objects.filter(granularity=granularity)
+        if not user.is_admin:
+            queryset = queryset.filter(asset__user=user)
+
+    if action:
+        queryset = queryset.filter(action=action)
+    if date_from:
+        queryset = queryset.filter(bucket__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(bucket__lte=date_to)
+    return queryset.order_by()
+
+
+def time_series(queryset):
+    rows = queryset.values('bucket').annotate(total=Sum('count')).order_by('bucket')
+    return [{'bucket': row['bucket'], 'count': row['total']} for row in rows]
+
+
+def top_n(queryset, dimension, limit):
+    if dimension == 'user':
+        rows = queryset.values('user_id', 'user__username')
+        label = 'user__username'
+        key = 'user_id'
+    else:
+        rows = queryset.values('asset_id', 'asset__title')
+        label = 'asset__title'
+        key = 'asset_id'
+
+    rows = rows.annotate(total=Sum('count')).order_by('-total', key)[:limit]
+    return [{'id': row[key], 'label': row[label], 'count': row['total']} for row in rows]
+
+
+def heatmap(queryset):
+    """Counts as a 7x24 matrix: ISO weekday (Monday first) by hour of day"""
+    matrix = [[0] * 24 for _ in range(7)]
+    rows = queryset.annotate(
+        weekday=ExtractIsoWeekDay('bucket'),
+        hour=ExtractHour('bucket'),
+    ).values('weekday', 'hour').annotate(total=Sum('count'))
+    for row in rows:
+        matrix[row['weekday'] - 1][row['hour']] = row['total']
+    return matrix
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class ActivityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'activity'
-    verbose_name = 'Activity & Collaboration'
\ No newline at end of file
+    verbose_name = 'Activity & Collaboration'
+
+    def ready(self):
+        from . import signals  # noqa: F401
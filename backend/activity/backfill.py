@@ -0,0 +1,25 @@
+"""
+Batched backfill of ActivityLog.asset_owner for rows written before the column existed.
+
+Model classes are parameters so the data migration can pass its historical models.
+"""
+from django.db.models import OuterRef, Subquery
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def backfill_asset_owner(log_model, asset_model, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Fill asset_owner in batches, committing each batch on its own; returns rows updated"""
+    owner = Subquery(asset_model.objects.filter(pk=OuterRef('asset_id')).values('user_id')[:1])
+    total = 0
+    while True:
+        batch = list(
+            log_model.objects.filter(asset_owner__isnull=True)
+            .order_by()
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return total
+        total += log_model.objects.filter(pk__in=batch).update(asset_owner_id=owner)
+        if progress:
+            progress(total)
@@ -0,0 +1,206 @@
+"""
+Fan-out of activity and asset-change events to streaming clients.
+
+Events are published synchronously from model signals (after the surrounding
+transaction commits) and consumed by the SSE view and WebSocket handler in
+activity.stream. Each event carries an increasing integer id so clients can
+resume with Last-Event-ID from a bounded replay history.
+
+Two brokers are available, chosen with settings.EVENT_STREAM_BROKER:
+
+* ``inprocess`` - fan-out inside one process. Only correct when the
+  streaming endpoint and the writers run in the same process.
+* ``redis`` - Redis pub/sub for fan-out across workers, with a capped list
+  as the replay history.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class SubscriptionOverflow(Exception):
+    """The subscriber fell too far behind and must reconnect to resume from history"""
+
+
+def make_event(event_id, event_type, data, scope):
+    return {'id': event_id, 'type': event_type, 'data': data, 'scope': scope}
+
+
+class _LocalSubscription:
+    def __init__(self, broker, loop, queue_size):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.queue_size = queue_size
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Called from whichever thread published the event
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # Event loop already closed
+            self.broker.unsubscribe(self)
+
+    def _put(self, event):
+        if self.queue.qsize() >= self.queue_size:
+            self.overflowed = True
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Next event, or None if nothing arrived within timeout seconds"""
+        if self.overflowed:
+            raise SubscriptionOverflow()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self, history=1000, queue_size=1000):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        # Seed ids from the clock so they keep increasing across restarts
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+
+    def publish(self, event_type, data, scope):
+        with self._lock:
+            event = make_event(next(self._ids), event_type, data, scope)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return event
+
+    async def subscribe(self, last_event_id=None):
+        subscription = _LocalSubscription(self, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            backlog = [] if last_event_id is None else [
+                event for event in self._history if event['id'] > last_event_id
+            ]
+        # Runs before control returns to the loop, so replay precedes live events
+        for event in backlog:
+            subscription.queue.put_nowait(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+class _RedisSubscription:
+    def __init__(self, client, pubsub, backlog, last_event_id):
+        self.client = client
+        self.pubsub = pubsub
+        self.backlog = deque(backlog)
+        self.last_event_id = last_event_id
+
+    async def get(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.backlog:
+                event = self.backlog.popleft()
+            else:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message is None:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return None
+                    continue
+                event = json.loads(message['data'])
+            # Events published between SUBSCRIBE and the history read arrive twice
+            if self.last_event_id is not None and event['id'] <= self.last_event_id:
+                continue
+            self.last_event_id = event['id']
+            return event
+
+    async def close(self):
+        await self.pubsub.unsubscribe()
+        await self.pubsub.close()
+        await self.client.close()
+
+
+class RedisBroker:
+    channel = 'shelflife:events'
+    history_key = 'shelflife:events:history'
+    id_key = 'shelflife:events:last_id'
+
+    def __init__(self, url, history=1000):
+        import redis
+
+        self.url = url
+        self.history = history
+        self._redis = redis.Redis.from_url(url)
+
+    def publish(self, event_type, data, scope):
+        event = make_event(self._redis.incr(self.id_key), event_type, data, scope)
+        payload = json.dumps(event, cls=DjangoJSONEncoder)
+        pipe = self._redis.pipeline()
+        pipe.lpush(self.history_key, payload)
+        pipe.ltrim(self.history_key, 0, self.history - 1)
+        pipe.publish(self.channel, payload)
+        pipe.execute()
+        return event
+
+    async def subscribe(self, last_event_id=None):
+        from redis import asyncio as aioredis
+
+        client = aioredis.from_url(self.url)
+        pubsub = client.pubsub()
+        # Subscribe before reading history so nothing falls in between
+        await pubsub.subscribe(self.channel)
+        backlog = []
+        if last_event_id is not None:
+            history = [json.loads(raw) for raw in await client.lrange(self.history_key, 0, -1)]
+            backlog = sorted((e for e in history if e['id'] > last_event_id), key=lambda e: e['id'])
+        return _RedisSubscription(client, pubsub, backlog, last_event_id)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.EVENT_STREAM_BROKER == 'redis':
+                    _broker = RedisBroker(settings.EVENT_STREAM_REDIS_URL, history=settings.EVENT_STREAM_HISTORY)
+                else:
+                    _broker = InProcessBroker(history=settings.EVENT_STREAM_HISTORY)
+    return _broker
+
+
+def visible_event_data(user, event):
+    """
+    Apply the list endpoints' visibility rules to an event.
+
+    Returns the payload to send, or None to drop the event. Asset changes the
+    user can no longer see are reduced to a bare removal so clients can drop
+    the asset from their local state.
+    """
+    scope = event['scope']
+    if event['type'] == 'activity':
+        # Same rules as ActivityLogViewSet
+        if user.is_admin or (user.is_editor and scope['owner_id'] == user.id):
+            return event['data']
+        return None
+
+    # Same rules as AssetViewSet
+    if user.is_admin or scope['is_active'] or (user.is_editor and scope['owner_id'] == user.id):
+        return event['data']
+    return {'asset_id': event['data']['asset_id'], 'change': 'removed'}
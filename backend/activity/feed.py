@@ -0,0 +1,32 @@
+"""
+Cached compact activity feed used by the dashboard's recent activity panel.
+
+The newest RECENT_ACTIVITY_MAX rows are serialized once and shared by every
+caller; requests for a smaller limit slice the cached list. New log rows and
+asset changes drop the cached copy (see activity.signals).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ActivityLog
+from .serializers import ActivityFeedSerializer
+
+RECENT_ACTIVITY_CACHE_KEY = 'activity:recent_feed'
+RECENT_ACTIVITY_MAX = 50
+
+
+def recent_activity_feed():
+    data = cache.get(RECENT_ACTIVITY_CACHE_KEY)
+    if data is None:
+        activities = ActivityLog.objects.select_related('asset', 'user').only(
+            'log_id', 'action', 'timestamp',
+            'asset__asset_id', 'asset__title', 'asset__file', 'asset__file_type',
+            'user__id', 'user__username',
+        )[:RECENT_ACTIVITY_MAX]
+        data = [dict(row) for row in ActivityFeedSerializer(activities, many=True).data]
+        cache.set(RECENT_ACTIVITY_CACHE_KEY, data, settings.RECENT_ACTIVITY_CACHE_TTL)
+    return data
+
+
+def invalidate_recent_activity():
+    cache.delete(RECENT_ACTIVITY_CACHE_KEY)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from activity.backfill import backfill_asset_owner, DEFAULT_BATCH_SIZE
+from activity.models import ActivityLog
+from assets.models import Asset
+
+
+class Command(BaseCommand):
+    help = "Fill ActivityLog.asset_owner for rows that predate the column. Resumable."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        total = backfill_asset_owner(
+            ActivityLog, Asset,
+            batch_size=options['batch_size'],
+            progress=lambda n: self.stdout.write(f"  {n} rows updated"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Backfilled asset_owner on {total} activity log entries"))
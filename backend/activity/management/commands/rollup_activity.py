@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from activity.rollups import roll_up_activity, reset_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold new ActivityLog rows into the hourly/daily rollup tables. "
+        "Safe to run repeatedly; schedule it every few minutes (cron or Celery beat)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Discard existing rollups and rebuild them from the full activity log',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset_rollups()
+            self.stdout.write("Cleared existing rollups")
+
+        processed = roll_up_activity()
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {processed} activity log entries"))
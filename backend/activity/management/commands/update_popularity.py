@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from activity.popularity import reset_popularity, update_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        "Add new view/download/share activity to the assets' popularity and trending scores. "
+        "Safe to run repeatedly; schedule it every few minutes (cron or Celery beat)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Zero all scores and recompute them from the full activity log',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset_popularity()
+            self.stdout.write("Cleared existing scores")
+
+        processed = update_popularity()
+        self.stdout.write(self.style.SUCCESS(f"Scored {processed} activity log entries"))
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_alter_asset_file_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('activity', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobWatermark',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('position', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'job_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('upload', 'Upload'), ('edit', 'Edit'), ('delete', 'Delete'), ('view', 'View'), ('download', 'Download'), ('share', 'Share')], max_length=10)),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'activity_rollups_user',
+                'indexes': [models.Index(fields=['granularity', 'bucket'], name='activity_ro_granula_3969b7_idx'), models.Index(fields=['action', 'granularity', 'bucket'], name='activity_ro_action_3a6805_idx')],
+                'unique_together': {('user', 'action', 'granularity', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AssetActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('upload', 'Upload'), ('edit', 'Edit'), ('delete', 'Delete'), ('view', 'View'), ('download', 'Download'), ('share', 'Share')], max_length=10)),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to='assets.asset')),
+            ],
+            options={
+                'db_table': 'activity_rollups_asset',
+                'indexes': [models.Index(fields=['granularity', 'bucket'], name='activity_ro_granula_a55c9f_idx'), models.Index(fields=['action', 'granularity', 'bucket'], name='activity_ro_action_236f56_idx')],
+                'unique_together': {('asset', 'action', 'granularity', 'bucket')},
+            },
+        ),
+    ]
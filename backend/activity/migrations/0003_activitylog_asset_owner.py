@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('activity', '0002_activity_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='asset_owner',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='owned_asset_activities', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['asset_owner', 'timestamp'], name='activity_lo_asset_o_de7db9_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from activity.backfill import backfill_asset_owner
+
+
+def forwards(apps, schema_editor):
+    backfill_asset_owner(apps.get_model('activity', 'ActivityLog'), apps.get_model('assets', 'Asset'))
+
+
+class Migration(migrations.Migration):
+
+    # Commit per batch so a large backfill can be interrupted and resumed
+    atomic = False
+
+    dependencies = [
+        ('activity', '0003_activitylog_asset_owner'),
+        ('assets', '0002_alter_asset_file_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
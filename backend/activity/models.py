@@ -18,6 +18,9 @@ class ActivityLog(models.Model):
     log_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     asset = models.ForeignKey('assets.Asset', on_delete=models.CASCADE, related_name='activities')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
+    # Copy of asset.user so editor-scoped feeds are a single index range scan
+    asset_owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_asset_activities',
+                                    null=True, blank=True, db_index=False)
     action = models.CharField(max_length=10, choices=ACTION_CHOICES)
     details = models.JSONField(default=dict, blank=True)  # Additional context about the action
     ip_address = models.GenericIPAddressField(blank=True, null=True)
@@ -31,11 +34,17 @@ class ActivityLog(models.Model):
             models.Index(fields=['asset', 'action']),
             models.Index(fields=['user', 'timestamp']),
             models.Index(fields=['timestamp']),
+            models.Index(fields=['asset_owner', 'timestamp']),
         ]
 
     def __str__(self):
         return f"{self.user.username} {self.action} {self.asset.title}"
 
+    def save(self, *args, **kwargs):
+        if self.asset_owner_id is None and self.asset_id is not None:
+            self.asset_owner_id = self.asset.user_id
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     comment_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -51,4 +60,61 @@ class Comment(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"Comment by {self.user.username} on {self.asset.title}"
\ No newline at end of file
+        return f"Comment by {self.user.username} on {self.asset.title}"
+
+class ActivityRollupBase(models.Model):
+    GRANULARITY_CHOICES = (
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    )
+
+    action = models.CharField(max_length=10, choices=ActivityLog.ACTION_CHOICES)
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()  # Start of the hour/day the counts belong to
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class AssetActivityRollup(ActivityRollupBase):
+    asset = models.ForeignKey('assets.Asset', on_delete=models.CASCADE, related_name='activity_rollups')
+
+    class Meta:
+        db_table = 'activity_rollups_asset'
+        unique_together = ('asset', 'action', 'granularity', 'bucket')
+        indexes = [
+            models.Index(fields=['granularity', 'bucket']),
+            models.Index(fields=['action', 'granularity', 'bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} {self.action} {self.granularity}@{self.bucket:%Y-%m-%d %H:%M}: {self.count}"
+
+
+class UserActivityRollup(ActivityRollupBase):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_rollups')
+
+    class Meta:
+        db_table = 'activity_rollups_user'
+        unique_together = ('user', 'action', 'granularity', 'bucket')
+        indexes = [
+            models.Index(fields=['granularity', 'bucket']),
+            models.Index(fields=['action', 'granularity', 'bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.action} {self.granularity}@{self.bucket:%Y-%m-%d %H:%M}: {self.count}"
+
+
+class JobWatermark(models.Model):
+    """Position up to which a periodic job has consumed the activity log."""
+    name = models.CharField(max_length=100, primary_key=True)
+    position = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'job_watermarks'
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
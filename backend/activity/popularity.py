@@ -0,0 +1,109 @@
+"""
+Activity-based asset rankings: Asset.popularity and Asset.trending.
+
+Each view, download and share adds its weight to the asset's scores, and
+the weight halves every half-life (ASSET_POPULARITY_HALF_LIFE_DAYS,
+ASSET_TRENDING_HALF_LIFE_HOURS). Decaying every score on every run would
+rewrite the whole table. The stored score is instead the sum of
+
+    weight * 2 ** ((event time - epoch) / half-life)
+
+for a fixed epoch per score. The decay that every stored score owes at a
+given moment is the same factor, so the stored values sort exactly like
+the decayed ones, and a run only touches assets with new activity. When
+new weights grow past 2 ** REBASE_EXPONENT, every score is scaled down
+once and the epoch moves up, which keeps the floats far from overflow.
+
+Like the rollups, each run consumes the log from its watermark up to "now
+minus the settle window". Lists ordered by score may be cached for up to
+ASSET_RESPONSE_CACHE_TTL after a run.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from assets.models import Asset
+from .models import ActivityLog, JobWatermark
+
+POPULARITY_WATERMARK = 'asset_popularity'
+
+ACTION_WEIGHTS = {
+    'view': 1.0,
+    'download': 3.0,
+    'share': 5.0,
+}
+
+REBASE_EXPONENT = 64
+
+
+def half_lives():
+    """{score column: half-life in seconds}"""
+    return {
+        'popularity': settings.ASSET_POPULARITY_HALF_LIFE_DAYS * 86400,
+        'trending': settings.ASSET_TRENDING_HALF_LIFE_HOURS * 3600,
+    }
+
+
+def _epoch(column, half_life, now):
+    """The score's epoch; rebases the column first when weights at ``now`` would be too large"""
+    mark, _ = JobWatermark.objects.select_for_update().get_or_create(
+        name=f'{POPULARITY_WATERMARK}:{column}_epoch', defaults={'position': now}
+    )
+    exponent = (now - mark.position).total_seconds() / half_life
+    if exponent > REBASE_EXPONENT:
+        Asset.objects.filter(**{f'{column}__gt': 0}).update(**{column: F(column) * 2.0 ** -exponent})
+        mark.position = now
+        mark.save()
+    return mark.position
+
+
+def update_popularity(until=None):
+    """
+    Add the weight of activity logged since the last run to the asset scores.
+
+    Returns the number of log rows consumed.
+    """
+    if until is None:
+        until = timezone.now() - timedelta(seconds=settings.ACTIVITY_ROLLUP_SETTLE_SECONDS)
+
+    with transaction.atomic():
+        watermark, _ = JobWatermark.objects.select_for_update().get_or_create(name=POPULARITY_WATERMARK)
+        if watermark.position is not None and until <= watermark.position:
+            return 0
+
+        logs = ActivityLog.objects.filter(timestamp__lte=until, action__in=ACTION_WEIGHTS).order_by()
+        if watermark.position is not None:
+            logs = logs.filter(timestamp__gt=watermark.position)
+
+        scales = {column: (_epoch(column, half_life, until), half_life)
+                  for column, half_life in half_lives().items()}
+        deltas = defaultdict(lambda: dict.fromkeys(scales, 0.0))
+        processed = 0
+        for asset_id, action, timestamp in logs.values_list('asset_id', 'action', 'timestamp').iterator():
+            for column, (epoch, half_life) in scales.items():
+                deltas[asset_id][column] += ACTION_WEIGHTS[action] * 2.0 ** (
+                    (timestamp - epoch).total_seconds() / half_life
+                )
+            processed += 1
+
+        # Queryset updates: scores aren't content, so no signals, versions or change feed entries
+        for asset_id, delta in deltas.items():
+            Asset.objects.filter(pk=asset_id).update(
+                **{column: F(column) + value for column, value in delta.items()}
+            )
+
+        watermark.position = until
+        watermark.save()
+
+    return processed
+
+
+def reset_popularity():
+    """Zero every score and rewind the watermark so the next run rebuilds them from the full log"""
+    with transaction.atomic():
+        Asset.objects.update(popularity=0, trending=0)
+        JobWatermark.objects.filter(name__startswith=POPULARITY_WATERMARK).delete()
@@ -13,6 +13,33 @@ class ActivityLogSerializer(serializers.ModelSerializer):
         fields = ('log_id', 'asset', 'user', 'action', 'details', 'ip_address', 'user_agent', 'timestamp')
 
 
+class CompoundActivityLogSerializer(ActivityLogSerializer):
+    """Activity row with user and asset by id, for compound documents (see assets.compound)"""
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+    asset = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class ActivityFeedSerializer(serializers.ModelSerializer):
+    """Compact activity row for dashboards; expects asset and user to be select_related"""
+    asset_id = serializers.UUIDField(source='asset.asset_id', read_only=True)
+    asset_title = serializers.CharField(source='asset.title', read_only=True)
+    thumbnail_url = serializers.SerializerMethodField()
+    actor = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = ActivityLog
+        fields = ('log_id', 'asset_id', 'asset_title', 'thumbnail_url', 'actor', 'action', 'timestamp')
+
+    def get_thumbnail_url(self, obj):
+        asset = obj.asset
+        if asset.file_type != 'image' or not asset.file:
+            return None
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(asset.file.url)
+        return asset.file.url
+
+
 class CommentSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     asset = AssetSerializer(read_only=True)
@@ -23,6 +50,12 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('comment_id', 'user', 'asset', 'created_at', 'updated_at')
 
 
+class CompoundCommentSerializer(CommentSerializer):
+    """Comment with user and asset by id, for compound documents (see assets.compound)"""
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+    asset = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
 class CommentCreateSerializer(serializers.ModelSerializer):
     asset = serializers.UUIDField(write_only=True)
 
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from assets.models import Asset
+from .events import get_broker
+from .feed import invalidate_recent_activity
+from .models import ActivityLog
+from .serializers import ActivityFeedSerializer
+
+
+def publish_on_commit(event_type, data, scope):
+    transaction.on_commit(lambda: get_broker().publish(event_type, data, scope))
+
+
+def announce_activity(entries):
+    """Invalidate the recent feed and publish new log rows; for rows written with bulk_create, which skips post_save"""
+    invalidate_recent_activity()
+    for entry in entries:
+        publish_on_commit(
+            'activity',
+            dict(ActivityFeedSerializer(entry).data),
+            {'owner_id': entry.asset_owner_id},
+        )
+
+
+@receiver(post_save, sender=ActivityLog)
+def activity_logged(sender, instance, created, **kwargs):
+    if created:
+        announce_activity([instance])
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+def asset_changed(sender, instance, **kwargs):
+    # Titles and thumbnails are embedded in the cached feed
+    invalidate_recent_activity()
+
+
+@receiver(post_save, sender=Asset)
+def asset_owner_changed(sender, instance, created, **kwargs):
+    # Keep the denormalized owner on existing log rows in step with ownership transfers
+    if not created:
+        ActivityLog.objects.filter(asset=instance).exclude(
+            asset_owner_id=instance.user_id
+        ).update(asset_owner_id=instance.user_id)
+
+
+@receiver(post_save, sender=Asset)
+def publish_asset_saved(sender, instance, created, **kwargs):
+    publish_on_commit(
+        'asset',
+        {
+            'asset_id': str(instance.asset_id),
+            'change': 'created' if created else 'updated',
+            'title': instance.title,
+            'file_type': instance.file_type,
+            'version': instance.version,
+            'is_active': instance.is_active,
+            'updated_at': instance.updated_at.isoformat() if instance.updated_at else None,
+        },
+        {'owner_id': instance.user_id, 'is_active': instance.is_active},
+    )
+
+
+@receiver(post_delete, sender=Asset)
+def publish_asset_deleted(sender, instance, **kwargs):
+    # Only the id goes out, so every subscriber may receive it
+    publish_on_commit(
+        'asset',
+        {'asset_id': str(instance.asset_id), 'change': 'deleted'},
+        {'owner_id': instance.user_id, 'is_active': True},
+    )
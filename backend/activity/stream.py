@@ -0,0 +1,150 @@
+"""
+Push endpoints for activity and asset-change events.
+
+``event_stream`` is an async Django view serving Server-Sent Events at
+/api/activity/stream/; ``websocket_application`` is a plain ASGI WebSocket
+handler mounted by ShelfLifeDAM.asgi at /api/activity/ws/. Both need the
+project to be served through ASGI (e.g. ``uvicorn ShelfLifeDAM.asgi:application``).
+
+Browsers' EventSource and WebSocket APIs can't set an Authorization header,
+so both endpoints also accept the access token as ``?token=``.
+"""
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from users.authentication import CachedJWTAuthentication
+
+from .events import SubscriptionOverflow, get_broker, visible_event_data
+
+WEBSOCKET_PATH = '/api/activity/ws/'
+
+
+def _authenticate(raw_token):
+    if not raw_token:
+        return None
+    authentication = CachedJWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+authenticate_token = sync_to_async(_authenticate)
+
+
+def _parse_event_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_sse(event, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+async def iter_visible_events(user, last_event_id):
+    """
+    Yield (event, payload) pairs the user may see, or (None, None) as a keepalive tick.
+
+    Ends after EVENT_STREAM_MAX_SECONDS so abandoned connections are reclaimed;
+    clients reconnect and resume from their last event id.
+    """
+    subscription = await get_broker().subscribe(last_event_id)
+    deadline = time.monotonic() + settings.EVENT_STREAM_MAX_SECONDS
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = await subscription.get(timeout=min(settings.EVENT_STREAM_KEEPALIVE_SECONDS, remaining))
+            except SubscriptionOverflow:
+                return
+            if event is None:
+                yield None, None
+                continue
+            data = visible_event_data(user, event)
+            if data is not None:
+                yield event, data
+    finally:
+        await subscription.close()
+
+
+async def _sse_body(user, last_event_id):
+    yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n"
+    async for event, data in iter_visible_events(user, last_event_id):
+        if event is None:
+            yield ": keepalive\n\n"
+        else:
+            yield format_sse(event, data)
+
+
+async def event_stream(request):
+    """Server-Sent Events feed of activity and asset changes visible to the caller"""
+    header = request.headers.get('Authorization', '')
+    raw_token = header[7:] if header.startswith('Bearer ') else request.GET.get('token')
+    user = await authenticate_token(raw_token)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    last_event_id = _parse_event_id(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+    response = StreamingHttpResponse(_sse_body(user, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+
+async def websocket_application(scope, receive, send):
+    """
+    ASGI WebSocket handler with the same events and visibility as the SSE view.
+
+    Query params: token (required), last_event_id (optional resume point).
+    Messages are JSON objects: {"id": ..., "event": ..., "data": {...}}.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if scope['path'] != WEBSOCKET_PATH:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    user = await authenticate_token(query.get('token', [None])[0])
+    if user is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+    await send({'type': 'websocket.accept'})
+
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while True:
+            incoming = await receive()
+            if incoming['type'] == 'websocket.disconnect':
+                disconnected.set()
+                return
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        async for event, data in iter_visible_events(user, _parse_event_id(query.get('last_event_id', [None])[0])):
+            if disconnected.is_set():
+                return
+            if event is not None:
+                await send({
+                    'type': 'websocket.send',
+                    'text': json.dumps({'id': event['id'], 'event': event['type'], 'data': data},
+                                       cls=DjangoJSONEncoder),
+                })
+        if not disconnected.is_set():
+            await send({'type': 'websocket.close', 'code': 1000})
+    finally:
+        watcher.cancel()
@@ -0,0 +1,143 @@
+"""
+Tests for the activity-based popularity and trending scores
+"""
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset
+from activity.models import ActivityLog, JobWatermark
+from activity.popularity import POPULARITY_WATERMARK, update_popularity
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user():
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+def make_asset(user, title):
+    file = SimpleUploadedFile(f"{title}.jpg", b"file_content", content_type="image/jpeg")
+    return Asset.objects.create(user=user, file=file, title=title, file_type='image')
+
+
+def log(asset, user, action, when, times=1):
+    """Create log rows with an explicit timestamp (auto_now_add ignores the kwarg)"""
+    for _ in range(times):
+        entry = ActivityLog.objects.create(asset=asset, user=user, action=action)
+        ActivityLog.objects.filter(pk=entry.pk).update(timestamp=when)
+
+
+def titles(response):
+    return [asset['title'] for asset in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestPopularityScores:
+    """Test suite for the incremental popularity job"""
+
+    def test_old_activity_counts_less(self, editor_user, viewer_user):
+        """Test popularity ranks a burst five days ago above a little activity now, trending the reverse"""
+        now = timezone.now()
+        burst, fresh, idle = (make_asset(editor_user, title) for title in ('burst', 'fresh', 'idle'))
+        log(burst, viewer_user, 'view', now - timedelta(days=5), times=10)
+        log(fresh, viewer_user, 'download', now - timedelta(minutes=5))
+
+        assert update_popularity(until=now) == 11
+
+        by_popularity = list(Asset.objects.order_by('-popularity').values_list('title', flat=True))
+        by_trending = list(Asset.objects.order_by('-trending').values_list('title', flat=True))
+        assert by_popularity == ['burst', 'fresh', 'idle']
+        assert by_trending == ['fresh', 'burst', 'idle']
+
+    def test_runs_consume_only_new_activity(self, editor_user, viewer_user):
+        """Test each run starts from the watermark and adds to the scores"""
+        now = timezone.now()
+        asset = make_asset(editor_user, 'asset')
+        log(asset, viewer_user, 'view', now - timedelta(minutes=10))
+        log(asset, editor_user, 'edit', now - timedelta(minutes=10))
+        assert update_popularity(until=now - timedelta(minutes=5)) == 1
+        first = Asset.objects.get(pk=asset.pk).popularity
+
+        log(asset, viewer_user, 'share', now - timedelta(minutes=2))
+        assert update_popularity(until=now) == 1
+        assert update_popularity(until=now) == 0
+        assert Asset.objects.get(pk=asset.pk).popularity > first
+        assert JobWatermark.objects.get(name=POPULARITY_WATERMARK).position == now
+
+    def test_rebase_scales_scores_down(self, editor_user, viewer_user):
+        """Test a run far past the epoch moves it and rescales the stored scores consistently"""
+        now = timezone.now()
+        old, new = make_asset(editor_user, 'old'), make_asset(editor_user, 'new')
+        log(old, viewer_user, 'view', now - timedelta(hours=1), times=3)
+        update_popularity(until=now)
+
+        later = now + timedelta(days=70)  # 70 trending half-lives
+        log(new, viewer_user, 'view', later - timedelta(hours=1))
+        update_popularity(until=later)
+
+        scores = dict(Asset.objects.values_list('title', 'trending'))
+        assert JobWatermark.objects.get(name=f'{POPULARITY_WATERMARK}:trending_epoch').position == later
+        assert scores['new'] == pytest.approx(2 ** -(1 / 24), rel=0.01)
+        assert scores['old'] == pytest.approx(3 * 2 ** -(70 + 1 / 24), rel=0.01)
+
+    def test_full_save_leaves_scores_alone(self, editor_user, viewer_user):
+        """Test saving a stale instance doesn't roll back the job's scores"""
+        asset = make_asset(editor_user, 'asset')
+        stale = Asset.objects.get(pk=asset.pk)
+        log(asset, viewer_user, 'view', timezone.now() - timedelta(minutes=5))
+        update_popularity(until=timezone.now())
+
+        stale.title = 'renamed'
+        stale.save()
+
+        assert Asset.objects.get(pk=asset.pk).popularity > 0
+
+
+@pytest.mark.django_db
+class TestRankedOrdering:
+    """Test suite for ordering=popularity and ordering=trending"""
+
+    def test_list_and_search_orderings(self, api_client, editor_user, viewer_user):
+        """Test the list and search both sort by the scores"""
+        now = timezone.now()
+        burst, fresh = make_asset(editor_user, 'burst poster'), make_asset(editor_user, 'fresh poster')
+        log(burst, viewer_user, 'view', now - timedelta(days=5), times=10)
+        log(fresh, viewer_user, 'view', now - timedelta(minutes=5), times=2)
+        update_popularity(until=now)
+        api_client.force_authenticate(user=viewer_user)
+
+        assert titles(api_client.get(reverse('asset-list') + '?ordering=popularity')) == ['burst poster',
+                                                                                           'fresh poster']
+        assert titles(api_client.get(reverse('asset-list') + '?ordering=trending')) == ['fresh poster',
+                                                                                         'burst poster']
+        response = api_client.get(reverse('search_assets') + '?q=poster&ordering=popularity')
+        assert [asset['title'] for asset in response.data] == ['burst poster', 'fresh poster']
+
+    def test_editor_list_orders_by_popularity(self, api_client, editor_user, viewer_user):
+        """Test the editor UNION list takes the ranked ordering too"""
+        now = timezone.now()
+        first, second = make_asset(editor_user, 'first'), make_asset(editor_user, 'second')
+        Asset.objects.filter(pk=first.pk).update(is_active=False)
+        log(first, viewer_user, 'share', now - timedelta(minutes=5))
+        update_popularity(until=now)
+        api_client.force_authenticate(user=editor_user)
+
+        assert titles(api_client.get(reverse('asset-list') + '?ordering=popularity')) == ['first', 'second']
@@ -0,0 +1,173 @@
+"""
+Tests for activity rollups and the analytics endpoint
+"""
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset
+from activity.models import ActivityLog, AssetActivityRollup, UserActivityRollup, JobWatermark
+from activity.rollups import roll_up_activity, ROLLUP_WATERMARK
+
+User = get_user_model()
+
+BASE_TIME = datetime(2026, 3, 2, 9, 15, tzinfo=dt_timezone.utc)  # A Monday
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def admin_user():
+    """Create admin user"""
+    return User.objects.create_user(username='admin', password='adminpass123', role='admin')
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def other_editor():
+    """Create a second editor"""
+    return User.objects.create_user(username='other_editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user():
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+def make_asset(user, title):
+    file = SimpleUploadedFile(f"{title}.jpg", b"file_content", content_type="image/jpeg")
+    return Asset.objects.create(user=user, file=file, title=title, file_type='image')
+
+
+def log(asset, user, action, when):
+    """Create a log row with an explicit timestamp (auto_now_add ignores the kwarg)"""
+    entry = ActivityLog.objects.create(asset=asset, user=user, action=action)
+    ActivityLog.objects.filter(pk=entry.pk).update(timestamp=when)
+    return entry
+
+
+@pytest.mark.django_db
+class TestRollUpActivity:
+    """Test suite for the incremental rollup job"""
+
+    def test_counts_per_hour_and_day(self, editor_user):
+        """Test that logs are bucketed into hourly and daily counters"""
+        asset = make_asset(editor_user, 'Logo')
+        log(asset, editor_user, 'download', BASE_TIME)
+        log(asset, editor_user, 'download', BASE_TIME + timedelta(minutes=20))
+        log(asset, editor_user, 'download', BASE_TIME + timedelta(hours=2))
+
+        processed = roll_up_activity(until=BASE_TIME + timedelta(days=1))
+
+        assert processed == 3
+        hourly = AssetActivityRollup.objects.filter(asset=asset, action='download', granularity='hour')
+        assert sorted(r.count for r in hourly) == [1, 2]
+        daily = AssetActivityRollup.objects.get(asset=asset, action='download', granularity='day')
+        assert daily.count == 3
+        assert UserActivityRollup.objects.get(user=editor_user, action='download', granularity='day').count == 3
+
+    def test_incremental_runs_only_consume_new_rows(self, editor_user):
+        """Test that the watermark prevents double counting"""
+        asset = make_asset(editor_user, 'Logo')
+        log(asset, editor_user, 'view', BASE_TIME)
+        roll_up_activity(until=BASE_TIME + timedelta(minutes=30))
+
+        log(asset, editor_user, 'view', BASE_TIME + timedelta(minutes=40))
+        processed = roll_up_activity(until=BASE_TIME + timedelta(hours=1))
+
+        assert processed == 1
+        daily = AssetActivityRollup.objects.get(asset=asset, action='view', granularity='day')
+        assert daily.count == 2
+        assert JobWatermark.objects.get(name=ROLLUP_WATERMARK).position == BASE_TIME + timedelta(hours=1)
+
+    def test_rows_after_cutoff_are_deferred(self, editor_user):
+        """Test that rows newer than the cutoff wait for the next run"""
+        asset = make_asset(editor_user, 'Logo')
+        log(asset, editor_user, 'view', BASE_TIME + timedelta(hours=3))
+
+        assert roll_up_activity(until=BASE_TIME) == 0
+        assert roll_up_activity(until=BASE_TIME + timedelta(hours=4)) == 1
+
+
+@pytest.mark.django_db
+class TestActivityAnalyticsView:
+    """Test suite for the analytics endpoint"""
+
+    @pytest.fixture
+    def rolled_up(self, editor_user, other_editor):
+        own = make_asset(editor_user, 'Own')
+        other = make_asset(other_editor, 'Other')
+        for offset in range(3):
+            log(own, editor_user, 'download', BASE_TIME + timedelta(days=offset))
+        log(other, other_editor, 'download', BASE_TIME)
+        log(other, other_editor, 'download', BASE_TIME)
+        roll_up_activity(until=BASE_TIME + timedelta(days=5))
+        return own, other
+
+    def test_admin_time_series(self, api_client, admin_user, rolled_up):
+        """Test daily time series across all assets"""
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('activity_analytics'), {'action': 'download'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['count'] for row in response.data['results']] == [3, 1, 1]
+
+    def test_admin_top_users(self, api_client, admin_user, rolled_up):
+        """Test top-N ranking by user"""
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('activity_analytics'), {'report': 'top', 'dimension': 'user'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['label'] for row in response.data['results']] == ['editor', 'other_editor']
+
+    def test_top_limit_is_clamped(self, api_client, admin_user, rolled_up):
+        """Test a zero or negative limit returns the single top row instead of failing"""
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('activity_analytics'), {'report': 'top', 'dimension': 'user', 'limit': -1})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['label'] for row in response.data['results']] == ['editor']
+
+    def test_editor_scoped_to_own_assets(self, api_client, editor_user, rolled_up):
+        """Test that editors only see rollups for their own assets"""
+        own, _ = rolled_up
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.get(reverse('activity_analytics'), {'report': 'top'})
+
+        assert [row['id'] for row in response.data['results']] == [own.asset_id]
+
+    def test_heatmap_shape(self, api_client, admin_user, rolled_up):
+        """Test heatmap is weekday by hour"""
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('activity_analytics'), {'report': 'heatmap'})
+
+        matrix = response.data['results']
+        assert len(matrix) == 7 and all(len(row) == 24 for row in matrix)
+        assert matrix[0][9] == 3  # Monday 09:00
+
+    def test_invalid_report(self, api_client, admin_user):
+        """Test unknown report type is rejected"""
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('activity_analytics'), {'report': 'pie'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_viewer_forbidden(self, api_client, viewer_user):
+        """Test viewers cannot access analytics"""
+        api_client.force_authenticate(user=viewer_user)
+        response = api_client.get(reverse('activity_analytics'))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,123 @@
+"""
+Tests for the activity/asset event broker and streaming endpoints
+"""
+import asyncio
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from django.test import Client
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+from assets.models import Asset
+from activity.events import InProcessBroker, SubscriptionOverflow, visible_event_data, make_event
+
+User = get_user_model()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user():
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+class TestInProcessBroker:
+    """Test suite for the in-process broker"""
+
+    def test_live_delivery(self):
+        """Test that subscribers receive events published after subscribing"""
+        broker = InProcessBroker()
+
+        async def scenario():
+            subscription = await broker.subscribe()
+            published = broker.publish('asset', {'asset_id': 'a'}, {})
+            received = await subscription.get(timeout=1)
+            await subscription.close()
+            return published, received
+
+        published, received = asyncio.run(scenario())
+        assert received == published
+
+    def test_resume_replays_missed_events(self):
+        """Test Last-Event-ID resume from the history buffer"""
+        broker = InProcessBroker()
+        first = broker.publish('asset', {'n': 1}, {})
+        broker.publish('asset', {'n': 2}, {})
+        broker.publish('asset', {'n': 3}, {})
+
+        async def scenario():
+            subscription = await broker.subscribe(last_event_id=first['id'])
+            events = [await subscription.get(timeout=1), await subscription.get(timeout=1)]
+            assert await subscription.get(timeout=0.01) is None
+            return events
+
+        assert [event['data']['n'] for event in asyncio.run(scenario())] == [2, 3]
+
+    def test_slow_subscriber_overflows(self):
+        """Test that a subscriber that falls behind is cut off"""
+        broker = InProcessBroker(queue_size=1)
+
+        async def scenario():
+            subscription = await broker.subscribe()
+            broker.publish('asset', {}, {})
+            broker.publish('asset', {}, {})
+            await asyncio.sleep(0)
+            with pytest.raises(SubscriptionOverflow):
+                await subscription.get(timeout=1)
+
+        asyncio.run(scenario())
+
+
+@pytest.mark.django_db
+class TestVisibleEventData:
+    """Test suite for per-user event filtering"""
+
+    def test_activity_only_for_owning_editor(self, editor_user, viewer_user):
+        """Test activity events follow ActivityLogViewSet rules"""
+        event = make_event(1, 'activity', {'action': 'view'}, {'owner_id': editor_user.id})
+
+        assert visible_event_data(editor_user, event) == {'action': 'view'}
+        assert visible_event_data(viewer_user, event) is None
+
+    def test_inactive_asset_reduced_to_removal(self, editor_user, viewer_user):
+        """Test that viewers only learn an inactive asset should be dropped"""
+        data = {'asset_id': 'abc', 'change': 'updated', 'title': 'Secret'}
+        event = make_event(1, 'asset', data, {'owner_id': editor_user.id, 'is_active': False})
+
+        assert visible_event_data(editor_user, event) == data
+        assert visible_event_data(viewer_user, event) == {'asset_id': 'abc', 'change': 'removed'}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEventStreamView:
+    """Test suite for the SSE endpoint"""
+
+    def test_requires_authentication(self):
+        """Test that anonymous connections are refused"""
+        response = Client().get(reverse('activity_stream'))
+
+        assert response.status_code == 401
+
+    def test_streams_asset_events_with_resume(self, editor_user, settings):
+        """Test that a reconnecting client gets events after its Last-Event-ID"""
+        settings.EVENT_STREAM_MAX_SECONDS = 0.2
+        file = SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg")
+        Asset.objects.create(user=editor_user, file=file, title="Streamed", file_type="image")
+
+        token = str(AccessToken.for_user(editor_user))
+        response = Client().get(reverse('activity_stream'), {'token': token}, HTTP_LAST_EVENT_ID='0')
+
+        async def read_body():
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        body = async_to_sync(read_body)().decode()
+
+        assert response['Content-Type'] == 'text/event-stream'
+        assert 'event: asset\n' in body
+        assert '"title": "Streamed"' in body
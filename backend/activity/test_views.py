@@ -0,0 +1,131 @@
+"""
+Tests for Activity views and API endpoints
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset
+from activity.models import ActivityLog
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(
+        username='editor',
+        email='editor@example.com',
+        password='editorpass123',
+        role='editor'
+    )
+
+
+@pytest.fixture
+def asset(editor_user):
+    """Create test asset"""
+    file = SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg")
+    return Asset.objects.create(
+        user=editor_user,
+        file=file,
+        title="Test Asset",
+        file_type="image",
+    )
+
+
+@pytest.mark.django_db
+class TestRecentActivity:
+    """Test suite for the recent activity feed"""
+
+    def test_compact_representation(self, api_client, editor_user, asset):
+        """Test that feed rows carry only the compact fields"""
+        ActivityLog.objects.create(asset=asset, user=editor_user, action='upload', user_agent='Mozilla/5.0')
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.get(reverse('recent_activity'))
+
+        assert response.status_code == status.HTTP_200_OK
+        row = response.data[0]
+        assert set(row) == {'log_id', 'asset_id', 'asset_title', 'thumbnail_url', 'actor', 'action', 'timestamp'}
+        assert row['asset_title'] == 'Test Asset'
+        assert row['actor'] == 'editor'
+        assert row['thumbnail_url'].startswith('http://testserver/')
+
+    def test_limit(self, api_client, editor_user, asset):
+        """Test that limit slices the feed"""
+        for _ in range(5):
+            ActivityLog.objects.create(asset=asset, user=editor_user, action='view')
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.get(reverse('recent_activity'), {'limit': 3})
+
+        assert len(response.data) == 3
+
+    def test_single_query_then_cached(self, api_client, editor_user, asset, django_assert_num_queries):
+        """Test that the feed is one joined query and then served from cache"""
+        for _ in range(3):
+            ActivityLog.objects.create(asset=asset, user=editor_user, action='view')
+        api_client.force_authenticate(user=editor_user)
+
+        with django_assert_num_queries(1):
+            api_client.get(reverse('recent_activity'))
+        with django_assert_num_queries(0):
+            api_client.get(reverse('recent_activity'))
+
+    def test_new_log_invalidates_cache(self, api_client, editor_user, asset):
+        """Test that writing a log row refreshes the feed"""
+        ActivityLog.objects.create(asset=asset, user=editor_user, action='view')
+        api_client.force_authenticate(user=editor_user)
+        api_client.get(reverse('recent_activity'))
+
+        ActivityLog.objects.create(asset=asset, user=editor_user, action='download')
+        response = api_client.get(reverse('recent_activity'))
+
+        assert len(response.data) == 2
+        assert response.data[0]['action'] == 'download'
+
+
+@pytest.mark.django_db
+class TestActivityLogViewSet:
+    """Test suite for the activity log list"""
+
+    def test_asset_owner_filled_on_write(self, editor_user, asset):
+        """Test that the owner is copied from the asset when logging"""
+        viewer = User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+        entry = ActivityLog.objects.create(asset=asset, user=viewer, action='view')
+
+        assert entry.asset_owner_id == editor_user.id
+
+    def test_editor_sees_activity_on_own_assets_only(self, api_client, editor_user, asset):
+        """Test editor scoping through the denormalized owner"""
+        other_editor = User.objects.create_user(username='other', password='pass123', role='editor')
+        file = SimpleUploadedFile("other.jpg", b"content", content_type="image/jpeg")
+        other_asset = Asset.objects.create(user=other_editor, file=file, title="Other", file_type="image")
+        own_log = ActivityLog.objects.create(asset=asset, user=other_editor, action='view')
+        ActivityLog.objects.create(asset=other_asset, user=editor_user, action='view')
+
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.get(reverse('activitylog-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['log_id'] for row in response.data['results']] == [str(own_log.log_id)]
+
+    def test_backfill_fills_missing_owner(self, editor_user, asset):
+        """Test the batched backfill of rows predating the column"""
+        from activity.backfill import backfill_asset_owner
+
+        for _ in range(3):
+            ActivityLog.objects.create(asset=asset, user=editor_user, action='view')
+        ActivityLog.objects.update(asset_owner=None)
+
+        updated = backfill_asset_owner(ActivityLog, Asset, batch_size=2)
+
+        assert updated == 3
+        assert not ActivityLog.objects.filter(asset_owner__isnull=True).exists()
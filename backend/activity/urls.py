@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, stream
 
 router = DefaultRouter()
 router.register(r'logs', views.ActivityLogViewSet, basename='activitylog')
@@ -9,4 +9,6 @@ router.register(r'comments', views.CommentViewSet, basename='comment')
 urlpatterns = [
     path('', include(router.urls)),
     path('recent/', views.recent_activity, name='recent_activity'),
+    path('analytics/', views.activity_analytics, name='activity_analytics'),
+    path('stream/', stream.event_stream, name='activity_stream'),
 ]
\ No newline at end of file
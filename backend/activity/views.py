@@ -1,12 +1,20 @@
-from rest_framework import permissions
+from datetime import datetime, time
+from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from ShelfLifeDAM.replicas import replica_reads
+from assets.compound import row_list_response
+from . import analytics
+from .feed import recent_activity_feed
 from .models import ActivityLog, Comment
-from .serializers import ActivityLogSerializer, CommentSerializer, CommentCreateSerializer
+from .serializers import ActivityLogSerializer, CommentSerializer, CommentCreateSerializer, \
+    CompoundActivityLogSerializer, CompoundCommentSerializer
 
 
 class IsEditorOrAdmin(permissions.BasePermission):
@@ -28,14 +36,19 @@ class ActivityLogViewSet(ModelViewSet):
             return ActivityLog.objects.all()
         elif user.is_editor:
             # Editors can see activities for their own assets
-            from assets.models import Asset
-            from django.db.models import Q
-            accessible_assets = Asset.objects.filter(user=user)
-            return ActivityLog.objects.filter(asset__in=accessible_assets)
+            return ActivityLog.objects.filter(asset_owner=user)
         else:
             # Viewers have no access
             return ActivityLog.objects.none()
 
+    @replica_reads
+    def list(self, request, *args, **kwargs):
+        return row_list_response(self, request, CompoundActivityLogSerializer)
+
+    @replica_reads
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class CommentViewSet(ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -55,6 +68,9 @@ class CommentViewSet(ModelViewSet):
             )
             return Comment.objects.filter(asset__in=accessible_assets, is_active=True)
 
+    def list(self, request, *args, **kwargs):
+        return row_list_response(self, request, CompoundCommentSerializer)
+
     def get_serializer_class(self):
         if self.action == 'create':
             return CommentCreateSerializer
@@ -65,6 +81,7 @@ class CommentViewSet(ModelViewSet):
 
 
 @api_view(['GET'])
+@replica_reads
 def recent_activity(request):
     limit = request.GET.get('limit', 10)
     try:
@@ -72,6 +89,87 @@ def recent_activity(request):
     except ValueError:
         limit = 10
 
-    activities = ActivityLog.objects.all()[:limit]
-    serializer = ActivityLogSerializer(activities, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    limit = max(limit, 1)
+
+    # Cached rows carry relative thumbnail URLs so they can be shared across hosts
+    data = []
+    for row in recent_activity_feed()[:limit]:
+        if row['thumbnail_url']:
+            row = {**row, 'thumbnail_url': request.build_absolute_uri(row['thumbnail_url'])}
+        data.append(row)
+    return Response(data)
+
+
+def _parse_bound(value):
+    """Accept either an ISO date or an ISO datetime for analytics range bounds"""
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value) or parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    if not isinstance(parsed, datetime):
+        parsed = datetime.combine(parsed, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsEditorOrAdmin])
+def activity_analytics(request):
+    """
+    Time series, top-N lists and heatmaps served from the activity rollups.
+
+    Query params: report (timeseries|top|heatmap), dimension (asset|user),
+    granularity (hour|day), action, date_from, date_to, limit.
+    """
+    report = request.GET.get('report', 'timeseries')
+    dimension = request.GET.get('dimension', 'asset')
+    granularity = request.GET.get('granularity', 'day')
+    action = request.GET.get('action')
+
+    if report not in ('timeseries', 'top', 'heatmap'):
+        return Response({'error': 'report must be one of: timeseries, top, heatmap'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if dimension not in ('asset', 'user'):
+        return Response({'error': 'dimension must be one of: asset, user'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if granularity not in ('hour', 'day'):
+        return Response({'error': 'granularity must be one of: hour, day'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        date_from = _parse_bound(request.GET.get('date_from'))
+        date_to = _parse_bound(request.GET.get('date_to'))
+    except ValueError:
+        return Response({'error': 'date_from and date_to must be ISO dates or datetimes'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    # Heatmaps need hour-of-day resolution
+    if report == 'heatmap':
+        granularity = 'hour'
+
+    queryset = analytics.rollups_for(request.user, dimension, granularity, action, date_from, date_to)
+
+    if report == 'timeseries':
+        data = analytics.time_series(queryset)
+    elif report == 'top':
+        try:
+            limit = min(int(request.GET.get('limit', 10)), 100)
+        except ValueError:
+            limit = 10
+        limit = max(limit, 1)
+        data = analytics.top_n(queryset, dimension, limit)
+    else:
+        data = analytics.heatmap(queryset)
+
+    return Response({
+        'report': report,
+        'dimension': dimension,
+        'granularity': granularity,
+        'action': action,
+        'results': data,
+    })
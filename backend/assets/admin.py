@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Asset, Metadata, AssetVersion
+from .models import Asset, AssetText, Collection, Metadata, AssetVersion, RelatedAsset, SavedSearch, Tag
 
 @admin.register(Asset)
 class AssetAdmin(admin.ModelAdmin):
@@ -21,4 +21,41 @@ class AssetVersionAdmin(admin.ModelAdmin):
     list_display = ('asset', 'version_number', 'created_by', 'file_size', 'created_at')
     list_filter = ('version_number', 'created_at')
     search_fields = ('asset__title', 'changes')
-    readonly_fields = ('version_id', 'created_at')
\ No newline at end of file
+    readonly_fields = ('version_id', 'created_at')
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'usage_count', 'created_at')
+    search_fields = ('name',)
+    readonly_fields = ('usage_count', 'created_at')
+
+@admin.register(AssetText)
+class AssetTextAdmin(admin.ModelAdmin):
+    list_display = ('asset', 'status', 'truncated', 'extracted_at')
+    list_filter = ('status', 'truncated')
+    search_fields = ('asset__title', 'error')
+    readonly_fields = ('asset', 'source', 'status', 'content', 'truncated', 'error', 'extracted_at')
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'query', 'file_type', 'last_viewed_at', 'created_at')
+    list_filter = ('file_type', 'created_at')
+    search_fields = ('name', 'query', 'user__username')
+    readonly_fields = ('search_id', 'last_viewed_at', 'created_at', 'updated_at')
+
+@admin.register(RelatedAsset)
+class RelatedAssetAdmin(admin.ModelAdmin):
+    list_display = ('asset', 'related', 'score')
+    search_fields = ('asset__title', 'related__title')
+    readonly_fields = ('asset', 'related', 'score')
+
+@admin.register(Collection)
+class CollectionAdmin(admin.ModelAdmin):
+    # Paths are assigned by assets.collections; create and move collections through the API
+    list_display = ('name', 'user', 'path', 'depth', 'asset_count', 'subtree_asset_count')
+    search_fields = ('name', 'path', 'user__username')
+    readonly_fields = ('collection_id', 'parent', 'path', 'depth', 'asset_count', 'subtree_asset_count',
+                       'created_at', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,183 @@
+"""
+Nested collections of assets, stored as materialized paths.
+
+A collection's ``path`` is its parent's path plus one STEP_LENGTH-character
+base-36 step, the encoding of django-treebeard's MP_Node:
+
+* a subtree is one range of paths (subtree_range), read from the unique
+  index on ``path``,
+* ordering by ``path`` lists a tree depth first, and
+* moving a subtree rewrites its paths with one UPDATE per table.
+
+CollectionAsset keeps a copy of its collection's path, so "assets anywhere
+under Campaigns/2026" is a range scan of the membership index
+(assets.query's ``collection`` condition) with no walk of the tree.
+
+asset_count and subtree_asset_count cache the number of active assets in a
+collection and in its subtree; an asset filed in two sub-collections counts
+in both. recount_collections refreshes them for the collections a change
+touches and their ancestors.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Value
+from django.db.models.functions import Concat, Substr
+from rest_framework.exceptions import ValidationError
+
+from .models import Collection, CollectionAsset
+from .response_cache import bump_generations
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+STEP_LENGTH = 4
+MAX_CHILDREN = len(ALPHABET) ** STEP_LENGTH
+MAX_DEPTH = Collection._meta.get_field('path').max_length // STEP_LENGTH
+CREATE_ATTEMPTS = 3
+
+
+def _encode(number, length):
+    digits = []
+    for _ in range(length):
+        number, digit = divmod(number, len(ALPHABET))
+        digits.append(ALPHABET[digit])
+    return ''.join(reversed(digits))
+
+
+def _successor(path):
+    """The first path of the same length after every path starting with ``path``; None past the last"""
+    number = int(path, len(ALPHABET)) + 1
+    if number >= len(ALPHABET) ** len(path):
+        return None
+    return _encode(number, len(path))
+
+
+def subtree_range(path):
+    """Lookups for ``path`` and every path below it, as a range any btree index on path serves"""
+    lookups = {'path__gte': path}
+    upper = _successor(path)
+    if upper is not None:
+        lookups['path__lt'] = upper
+    return lookups
+
+
+def ancestor_paths(path):
+    """The paths from the root down to ``path``, itself included"""
+    return [path[:end] for end in range(STEP_LENGTH, len(path) + 1, STEP_LENGTH)]
+
+
+def _child_path(parent):
+    """The path for a new last child of ``parent`` (None for a root)"""
+    prefix = parent.path if parent else ''
+    last = Collection.objects.filter(parent=parent).aggregate(last=Max('path'))['last']
+    number = int(last[-STEP_LENGTH:], len(ALPHABET)) + 1 if last else 0
+    if number >= MAX_CHILDREN:
+        raise ValidationError({'parent': f"A collection can hold at most {MAX_CHILDREN} collections."})
+    return prefix + _encode(number, STEP_LENGTH)
+
+
+def create_collection(user, name, parent=None):
+    """A new collection, last among its siblings"""
+    depth = parent.depth + 1 if parent else 1
+    if depth > MAX_DEPTH:
+        raise ValidationError({'parent': f"Collections nest at most {MAX_DEPTH} levels deep."})
+    for attempt in range(CREATE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return Collection.objects.create(
+                    user=user, name=name, parent=parent, path=_child_path(parent), depth=depth
+                )
+        except IntegrityError:
+            # A concurrent create took the same path; take the next one
+            if attempt == CREATE_ATTEMPTS - 1:
+                raise
+
+
+def move_collection(collection, parent):
+    """Move a collection and its subtree under ``parent`` (None for the top level)"""
+    with transaction.atomic():
+        # Read both paths under lock so a concurrent move can't leave them stale
+        locked = Collection.objects.select_for_update().in_bulk([collection.pk, *([parent.pk] if parent else [])])
+        collection, parent = locked[collection.pk], parent and locked[parent.pk]
+        old_path = collection.path
+        if parent is not None and parent.path.startswith(old_path):
+            raise ValidationError({'parent': "A collection can't move into itself or its own subtree."})
+        if parent == collection.parent:
+            return collection
+        subtree = subtree_range(old_path)
+        deepest = Collection.objects.filter(**subtree).aggregate(deepest=Max('depth'))['deepest']
+        shift = (parent.depth + 1 if parent else 1) - collection.depth
+        if deepest + shift > MAX_DEPTH:
+            raise ValidationError({'parent': f"Collections nest at most {MAX_DEPTH} levels deep."})
+
+        new_path = _child_path(parent)
+        moved = Concat(Value(new_path), Substr('path', len(old_path) + 1))
+        Collection.objects.filter(**subtree).update(path=moved, depth=F('depth') + shift)
+        CollectionAsset.objects.filter(**subtree).update(path=moved)
+        Collection.objects.filter(pk=collection.pk).update(parent=parent)
+        recount_collections(ancestor_paths(old_path)[:-1] + ancestor_paths(new_path))
+        bump_generations('collections')
+    collection.refresh_from_db()
+    return collection
+
+
+def _locked_path(collection):
+    # The lock waits out a concurrent move, so the path read is current
+    return Collection.objects.select_for_update().values_list('path', flat=True).get(pk=collection.pk)
+
+
+def delete_collection(collection):
+    """Delete a collection, its subtree and their memberships"""
+    with transaction.atomic():
+        path = _locked_path(collection)
+        subtree = subtree_range(path)
+        CollectionAsset.objects.filter(**subtree).delete()
+        Collection.objects.filter(**subtree).delete()
+        recount_collections(ancestor_paths(path)[:-1])
+        bump_generations('collections')
+
+
+def add_assets(collection, asset_ids):
+    """File assets in a collection; returns how many weren't in it already"""
+    with transaction.atomic():
+        path = _locked_path(collection)
+        existing = set(
+            CollectionAsset.objects.filter(collection=collection, asset_id__in=asset_ids)
+            .values_list('asset_id', flat=True)
+        )
+        new = [asset_id for asset_id in dict.fromkeys(asset_ids) if asset_id not in existing]
+        CollectionAsset.objects.bulk_create(
+            [CollectionAsset(collection=collection, asset_id=asset_id, path=path) for asset_id in new],
+            ignore_conflicts=True,
+        )
+        recount_collections(ancestor_paths(path))
+        bump_generations('collections')
+    return len(new)
+
+
+def remove_assets(collection, asset_ids):
+    """Take assets out of a collection; returns how many were in it"""
+    with transaction.atomic():
+        path = _locked_path(collection)
+        removed, _ = CollectionAsset.objects.filter(collection=collection, asset_id__in=asset_ids).delete()
+        recount_collections(ancestor_paths(path))
+        bump_generations('collections')
+    return removed
+
+
+def asset_collection_paths(asset_id):
+    """The paths of the collections an asset is in, with all their ancestors"""
+    return {
+        ancestor
+        for path in CollectionAsset.objects.filter(asset_id=asset_id).values_list('path', flat=True)
+        for ancestor in ancestor_paths(path)
+    }
+
+
+def recount_collections(paths):
+    """Recompute the cached counts of the collections at the given paths from their active assets"""
+    active = CollectionAsset.objects.filter(asset__is_active=True).order_by()
+    for path in set(paths):
+        counts = active.filter(**subtree_range(path)).aggregate(
+            subtree=Count('pk'), direct=Count('pk', filter=Q(path=path))
+        )
+        Collection.objects.filter(path=path).update(
+            asset_count=counts['direct'], subtree_asset_count=counts['subtree']
+        )
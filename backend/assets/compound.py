@@ -0,0 +1,97 @@
+"""
+Opt-in compound documents for list endpoints (``?sideload=true``).
+
+Primary records reference users, assets and versions by id, and every
+distinct related object is serialized once in a top-level ``included`` map:
+
+    {"count": ..., "results": [{"asset_id": "...", "user": 7, "versions": ["..."], ...}],
+     "included": {"users": {"7": {...}}, "versions": {"...": {..., "created_by": 7}}}}
+
+Used by the asset list, comments and the activity log.
+"""
+from django.db.models import prefetch_related_objects
+from rest_framework.response import Response
+
+
+def wants_sideload(request):
+    return request.query_params.get('sideload', '').lower() in ('1', 'true', 'yes')
+
+
+class Included:
+    """Collects distinct related objects and serializes each type in one pass"""
+
+    def __init__(self, context):
+        self.context = context
+        self.users = {}
+        self.assets = {}
+        self.versions = {}
+
+    def add_user(self, user):
+        if user is not None:
+            self.users.setdefault(user.pk, user)
+
+    def add_versions(self, asset):
+        for version in asset.versions.all():
+            if version.pk not in self.versions:
+                self.versions[version.pk] = version
+                self.add_user(version.created_by)
+
+    def add_asset(self, asset):
+        if asset is not None and asset.pk not in self.assets:
+            self.assets[asset.pk] = asset
+            self.add_user(asset.user)
+            self.add_versions(asset)
+
+    def _serialize(self, serializer_class, objects):
+        rows = serializer_class(list(objects.values()), many=True, context=self.context).data
+        return {str(pk): row for pk, row in zip(objects, rows)}
+
+    @property
+    def data(self):
+        from users.serializers import UserSerializer
+        from .serializers import CompoundAssetSerializer, CompoundAssetVersionSerializer
+
+        included = {}
+        for name, serializer_class, objects in (
+            ('users', UserSerializer, self.users),
+            ('assets', CompoundAssetSerializer, self.assets),
+            ('versions', CompoundAssetVersionSerializer, self.versions),
+        ):
+            if objects:
+                included[name] = self._serialize(serializer_class, objects)
+        return included
+
+
+def list_payload(view, page, results, included=None):
+    """Response body for a list view, with the included section when sideloading"""
+    if page is not None:
+        data = view.get_paginated_response(results).data
+    elif included is not None:
+        data = {'results': results}
+    else:
+        return results
+    if included is not None:
+        data['included'] = included.data
+    return data
+
+
+def row_list_response(view, request, compound_serializer_class):
+    """
+    list() for rows that embed a user and an asset (comments, activity).
+
+    With ?sideload=true each row's user and asset go to the included section.
+    """
+    queryset = view.filter_queryset(view.get_queryset())
+    page = view.paginate_queryset(queryset)
+    rows = page if page is not None else list(queryset)
+    prefetch_related_objects(rows, 'user', 'asset__user', 'asset__metadata_fields', 'asset__versions__created_by')
+    if not wants_sideload(request):
+        return Response(list_payload(view, page, view.get_serializer(rows, many=True).data))
+
+    context = view.get_serializer_context()
+    included = Included(context)
+    for row in rows:
+        included.add_user(row.user)
+        included.add_asset(row.asset)
+    results = compound_serializer_class(rows, many=True, context=context).data
+    return Response(list_payload(view, page, results, included))
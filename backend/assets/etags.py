@@ -0,0 +1,91 @@
+"""
+Validators for asset resources.
+
+ETags are derived from (asset_id, version, updated_at) and the counters of
+the users the payload embeds, so they can be compared before anything is
+serialized. Saves to an asset, its metadata or its versions all move
+updated_at (see assets.signals); profile changes bump the ``owner:<id>``
+counter of that user (see assets.response_cache.embedded_users).
+
+An asset ETag is "<row>.<users>": If-Match only compares the row part, since
+that is what the conditional UPDATE guards and a profile edit elsewhere
+doesn't conflict with a write to the asset.
+"""
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The asset has changed since it was fetched; reload it and retry.'
+    default_code = 'precondition_failed'
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The asset was changed by another request; reload it and retry.'
+    default_code = 'conflict'
+
+
+def _validator(asset):
+    return f'{asset.asset_id}:{asset.version}:{asset.updated_at.isoformat()}'
+
+
+def _digest(raw):
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _etag(raw):
+    return quote_etag(_digest(raw))
+
+
+def asset_etag(asset, embedded):
+    """ETag for an asset's payload; embedded is response_cache.embedded_users([asset])"""
+    return quote_etag(f'{_digest(_validator(asset))}.{_digest(repr(embedded))}')
+
+
+def asset_matches(header, asset):
+    """Whether an If-Match header value holds the asset row's current validator"""
+    candidates = parse_etags(header)
+    if candidates == ['*']:
+        return True
+    row = _digest(_validator(asset))
+    return any(candidate.strip('"').split('.')[0] == row for candidate in candidates
+               if not candidate.startswith('W/'))
+
+
+def list_etag(assets, embedded, count=None, facets=None):
+    """
+    ETag for a page of assets; count covers changes that only move the
+    pagination links, facets changes to assets on other pages.
+    """
+    parts = [str(count), repr(embedded), *(_validator(asset) for asset in assets)]
+    if facets is not None:
+        parts.append(repr(facets))
+    return _etag('|'.join(parts))
+
+
+def etag_matches(header, etag, weak=False):
+    """
+    Whether an If-Match (strong comparison) or If-None-Match (weak=True)
+    header value matches etag.
+    """
+    candidates = parse_etags(header)
+    if candidates == ['*']:
+        return True
+    if weak:
+        candidates = [candidate[2:] if candidate.startswith('W/') else candidate for candidate in candidates]
+    return etag in candidates
+
+
+def is_not_modified(request, etag):
+    header = request.headers.get('If-None-Match')
+    return header is not None and etag_matches(header, etag, weak=True)
+
+
+def not_modified_response(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
@@ -0,0 +1,383 @@
+"""
+Text extraction from document assets (PDF, DOCX, RTF and TXT) for search.
+
+extract_pending_text() is the background job: it extracts the text of pdf
+and doc assets that have none yet, or whose file has been replaced since,
+into AssetText. Schedule the extract_asset_text command every few minutes,
+like rollup_activity.
+
+Files are read in chunks and never past ASSET_TEXT_MAX_FILE_BYTES (for
+DOCX, of the decompressed document body); output stops at
+ASSET_TEXT_MAX_CHARS. Either limit marks the text as truncated.
+
+PDFs go through pypdf when it is installed. Without it a minimal reader
+pulls the strings shown by the Tj/TJ operators out of plain or
+Flate-compressed content streams: enough for most generated PDFs, not for
+scanned pages or fonts with custom encodings.
+"""
+import codecs
+import itertools
+import re
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import Asset, AssetText
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+CHUNK_SIZE = 64 * 1024
+EXTRACTED_TYPES = ('pdf', 'doc')
+PDF_DICTIONARY_BYTES = 4096
+
+
+class TextBuffer:
+    """Extracted text, cut off at max_chars"""
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def write(self, text):
+        if self.truncated or not text:
+            return
+        room = self.max_chars - self.size
+        if len(text) > room:
+            text = text[:room]
+            self.truncated = True
+        self.parts.append(text)
+        self.size += len(text)
+
+    def getvalue(self):
+        # PostgreSQL text can't hold NUL; whitespace runs only bloat the row
+        text = ''.join(self.parts).replace('\x00', '')
+        text = re.sub(r' *\n *', '\n', re.sub(r'[^\S\n]+', ' ', text))
+        return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+class CappedReader:
+    """File-like view of a stream that stops after max_bytes, noting whether there was more"""
+
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.remaining = max_bytes
+        self.exceeded = False
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            self.exceeded = self.exceeded or bool(self.stream.read(1))
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def chunks(self):
+        while chunk := self.read(CHUNK_SIZE):
+            yield chunk
+
+
+# TXT
+
+def extract_txt(stream, out, max_bytes):
+    reader = CappedReader(stream, max_bytes)
+    chunks = reader.chunks()
+    first = next(chunks, b'')
+    if first.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = 'utf-16'
+    elif first.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    else:
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(first)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'cp1252'
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    for chunk in itertools.chain([first], chunks):
+        out.write(decoder.decode(chunk))
+        if out.truncated:
+            return
+    out.write(decoder.decode(b'', final=True))
+    out.truncated = out.truncated or reader.exceeded
+
+
+# DOCX
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_DOCX_BREAKS = {f'{_W}tab': ' ', f'{_W}br': '\n', f'{_W}cr': '\n', f'{_W}p': '\n'}
+
+
+def extract_docx(stream, out, max_bytes):
+    with zipfile.ZipFile(stream) as archive, archive.open('word/document.xml') as body:
+        reader = CappedReader(body, max_bytes)
+        try:
+            for _, element in ElementTree.iterparse(reader, events=('end',)):
+                if element.tag == f'{_W}t':
+                    out.write(element.text)
+                elif element.tag in _DOCX_BREAKS:
+                    out.write(_DOCX_BREAKS[element.tag])
+                    if element.tag == f'{_W}p':
+                        element.clear()
+                if out.truncated:
+                    return
+        except ElementTree.ParseError:
+            if not reader.exceeded:
+                raise
+            # Cut off mid-document by the byte cap; keep what was read
+    out.truncated = out.truncated or reader.exceeded
+
+
+# RTF
+
+# Destinations whose contents are formatting data or metadata rather than body text
+_RTF_SKIPPED = {
+    'fonttbl', 'colortbl', 'stylesheet', 'info', 'pict', 'object', 'header', 'headerl', 'headerr',
+    'headerf', 'footer', 'footerl', 'footerr', 'footerf', 'themedata', 'colorschememapping',
+    'datastore', 'latentstyles', 'listtable', 'listoverridetable', 'rsidtbl', 'generator',
+    'xmlnstbl', 'filetbl', 'revtbl', 'fldinst',
+}
+_RTF_BREAKS = {'par': '\n', 'line': '\n', 'sect': '\n', 'page': '\n', 'row': '\n', 'tab': ' ', 'cell': ' '}
+_RTF_TOKEN = re.compile(rb"\\([a-zA-Z]+)(-?\d+)? ?|\\'([0-9a-fA-F]{2})|\\(.)|([{}])|[\r\n]+|[^\\{}\r\n]+", re.S)
+
+
+def _rtf_pieces(reader):
+    """The stream's chunks, each cut before a trailing control sequence so none straddles two"""
+    held = b''
+    for chunk in reader.chunks():
+        data = held + chunk
+        cut = data.rfind(b'\\', max(len(data) - 40, 0))
+        while cut > 0 and data[cut - 1] == ord('\\'):
+            cut -= 1  # Keep a run of backslashes (escaped ones) together
+        if cut <= 0:
+            cut = len(data)
+        data, held = data[:cut], data[cut:]
+        yield data
+    if held:
+        yield held
+
+
+def extract_rtf(stream, out, max_bytes):
+    reader = CappedReader(stream, max_bytes)
+    skip, unicode_skip = False, 1  # State of the current group
+    stack = []
+    fallback = 0  # Characters after a \uN escape that only stand in for it
+    for data in _rtf_pieces(reader):
+        for match in _RTF_TOKEN.finditer(data):
+            word, parameter, hex_code, symbol, brace = match.groups()
+            text = None
+            if brace == b'{':
+                stack.append((skip, unicode_skip))
+            elif brace == b'}':
+                skip, unicode_skip = stack.pop() if stack else (False, 1)
+            elif word is not None:
+                word = word.decode('ascii')
+                if word in _RTF_SKIPPED:
+                    skip = True
+                elif word == 'uc' and parameter is not None:
+                    unicode_skip = int(parameter)
+                elif word == 'u' and parameter is not None:
+                    if not skip:
+                        out.write(chr(int(parameter) % 0x10000))
+                    fallback = unicode_skip
+                elif word in _RTF_BREAKS:
+                    text = _RTF_BREAKS[word]
+            elif symbol is not None:
+                if symbol == b'*':
+                    skip = True
+                elif symbol in (b'\\', b'{', b'}'):
+                    text = symbol.decode('ascii')
+                elif symbol == b'~':
+                    text = ' '
+                elif symbol == b'_':
+                    text = '-'
+                elif symbol in (b'\r', b'\n'):
+                    text = '\n'
+            elif hex_code is not None or match.group()[:1] not in b'\r\n':
+                if hex_code is not None:
+                    text = bytes.fromhex(hex_code.decode('ascii')).decode('cp1252', errors='replace')
+                else:
+                    text = match.group().decode('cp1252', errors='replace')
+                if fallback:
+                    dropped = min(fallback, len(text))
+                    text, fallback = text[dropped:], fallback - dropped
+            if text and not skip:
+                out.write(text)
+                if out.truncated:
+                    return
+    out.truncated = out.truncated or reader.exceeded
+
+
+# PDF
+
+_PDF_STREAM = re.compile(rb'stream\r?\n')
+_PDF_TOKEN = re.compile(
+    rb'\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)'  # literal string, one level of nested parentheses
+    rb'|<[0-9A-Fa-f\s]*>'  # hex string
+    rb'|[-+]?(?:\d+\.?\d*|\.\d+)'  # number
+    rb"|[A-Za-z'\"*]+"  # operator
+    rb'|[\[\]]',
+    re.S,
+)
+_PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+_PDF_ESCAPE = re.compile(rb'\\([0-7]{1,3}|\r\n|.)', re.S)
+_PDF_NEW_LINE_OPERATORS = {b'ET', b'T*', b"'", b'"', b'Td', b'TD'}
+
+
+def _pdf_string(token):
+    if token.startswith(b'<'):
+        digits = re.sub(rb'\s', b'', token[1:-1]).decode('ascii')
+        raw = bytes.fromhex(digits + '0' * (len(digits) % 2))  # An odd final digit is followed by 0
+    else:
+        def unescape(match):
+            value = match.group(1)
+            if value[:1].isdigit():
+                return bytes([int(value, 8) & 0xFF])
+            if value in (b'\r\n', b'\n', b'\r'):
+                return b''  # Line continuation
+            return _PDF_ESCAPES.get(value, value)
+        raw = _PDF_ESCAPE.sub(unescape, token[1:-1])
+    if raw.startswith(codecs.BOM_UTF16_BE):
+        return raw[2:].decode('utf-16-be', errors='replace')
+    return raw.decode('latin-1')
+
+
+def _pdf_content_text(content, out):
+    """Write the strings shown by the text operators in a content stream"""
+    operands = []
+    for match in _PDF_TOKEN.finditer(content):
+        token = match.group()
+        if token[:1] in b'(<':
+            operands.append(_pdf_string(token))
+        elif token[:1].isalpha() or token in (b"'", b'"', b'T*'):
+            if token in (b'Tj', b"'", b'"') and operands:
+                if token != b'Tj':
+                    out.write('\n')
+                out.write(operands[-1])
+            elif token == b'TJ':
+                out.write(''.join(operands))
+            elif token in _PDF_NEW_LINE_OPERATORS:
+                out.write('\n')
+            operands = []
+        elif token[:1] not in b'[]':
+            # Kerning inside a TJ array; a large negative shift is a word gap
+            if float(token) < -200:
+                operands.append(' ')
+        if out.truncated:
+            return
+
+
+def extract_pdf(stream, out, max_bytes):
+    if PdfReader is not None and _size(stream) <= max_bytes:
+        for page in PdfReader(stream).pages:
+            out.write(page.extract_text() or '')
+            out.write('\n')
+            if out.truncated:
+                return
+        return
+
+    reader = CappedReader(stream, max_bytes)
+    buffer = b''
+    for chunk in reader.chunks():
+        buffer += chunk
+        while (start := _PDF_STREAM.search(buffer)) is not None:
+            end = buffer.find(b'endstream', start.end())
+            if end < 0:
+                break  # Stream continues in the next chunk
+            dictionary = buffer[max(buffer.rfind(b'obj', 0, start.start()), 0):start.start()]
+            data = buffer[start.end():end]
+            buffer = buffer[end + len(b'endstream'):]
+            content = _pdf_stream_content(dictionary, data, max_bytes)
+            if content is not None:
+                _pdf_content_text(content, out)
+                if out.truncated:
+                    return
+        if start is None:
+            buffer = buffer[-PDF_DICTIONARY_BYTES:]  # Enough to see the next stream's dictionary
+    out.truncated = out.truncated or reader.exceeded
+
+
+def _pdf_stream_content(dictionary, data, max_bytes):
+    """Decoded bytes of a page content stream, or None for other streams (images, fonts, ...)"""
+    if re.search(rb'/Subtype\s*/Image|/Length[123]\b|/Type\s*/(?:XRef|ObjStm|Metadata)', dictionary):
+        return None
+    if b'/Filter' not in dictionary:
+        return data
+    if not re.search(rb'/Filter\s*\[?\s*/FlateDecode\s*\]?', dictionary):
+        return None
+    try:
+        # max_length guards against decompression bombs
+        return zlib.decompressobj().decompress(data, max_bytes)
+    except zlib.error:
+        return None
+
+
+def _size(stream):
+    position = stream.tell()
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+EXTRACTORS = {
+    '.txt': extract_txt,
+    '.text': extract_txt,
+    '.docx': extract_docx,
+    '.rtf': extract_rtf,
+    '.pdf': extract_pdf,
+}
+
+
+def extract_asset_text(asset):
+    """Extract the text of the asset's file into its AssetText row and return the row"""
+    extractor = EXTRACTORS.get(asset.file_extension)
+    out = TextBuffer(settings.ASSET_TEXT_MAX_CHARS)
+    status, error = 'unsupported', ''
+    if extractor is not None:
+        try:
+            with asset.file.open('rb') as stream:
+                extractor(stream, out, settings.ASSET_TEXT_MAX_FILE_BYTES)
+            status = 'done'
+        except Exception as exc:  # Parsers of uploaded files raise all sorts; one bad file must not stop the run
+            status, error = 'failed', f"{type(exc).__name__}: {exc}"[:255]
+    content = out.getvalue() if status == 'done' else ''
+    if status == 'done' and not content:
+        status = 'empty'
+    text, _ = AssetText.objects.update_or_create(asset=asset, defaults={
+        'source': asset.file.name,
+        'status': status,
+        'content': content,
+        'truncated': out.truncated and status == 'done',
+        'error': error,
+    })
+    return text
+
+
+def pending_assets():
+    """Document assets without extracted text, or with text from a file they no longer have"""
+    return (
+        Asset.objects.filter(file_type__in=EXTRACTED_TYPES)
+        .exclude(file='')
+        .exclude(extracted_text__source=F('file'))
+    )
+
+
+def extract_pending_text(limit=None):
+    """Extract text for pending assets, oldest first. Returns the number processed."""
+    assets = pending_assets().only('asset_id', 'file', 'file_type').order_by('created_at')
+    if limit:
+        assets = assets[:limit]
+    processed = 0
+    for asset in assets.iterator(chunk_size=100):
+        extract_asset_text(asset)
+        processed += 1
+    return processed
@@ -0,0 +1,100 @@
+"""
+Facet counts for asset search and list responses (``?facets=``).
+
+``?facets=true`` asks for every facet, ``?facets=file_type,tags`` for a
+subset. Each facet is one GROUP BY over the filtered queryset:
+
+* ``file_type`` - every type present
+* ``tags`` - the FACET_TOP most used tags, via the AssetTag table
+* ``user`` - the FACET_TOP owners with the most assets
+* ``month`` - the FACET_MONTHS most recent creation months
+
+Requests without filters all share the same facets per visibility class,
+so those are cached under the generation counters of response_cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from rest_framework.exceptions import ValidationError
+
+from .models import Asset, AssetTag
+from .response_cache import generations
+
+FACETS = ('file_type', 'tags', 'user', 'month')
+FACET_TOP = 10
+FACET_MONTHS = 24
+
+FILE_TYPE_LABELS = dict(Asset.FILE_TYPE_CHOICES)
+
+
+def requested_facets(request):
+    """Facet names asked for with ?facets=, or None when facets weren't requested"""
+    raw = request.query_params.get('facets', '').strip().lower()
+    if not raw or raw in ('0', 'false', 'no'):
+        return None
+    if raw in ('1', 'true', 'yes', 'all'):
+        return list(FACETS)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in FACETS]
+    if unknown:
+        raise ValidationError({'facets': f"Unknown facets: {', '.join(unknown)}. Choose from {', '.join(FACETS)}."})
+    return [name for name in FACETS if name in names]
+
+
+def _file_type_facet(queryset):
+    rows = queryset.values('file_type').annotate(count=Count('pk')).order_by('-count', 'file_type')
+    return [{'value': row['file_type'], 'label': FILE_TYPE_LABELS.get(row['file_type'], row['file_type']),
+             'count': row['count']} for row in rows]
+
+
+def _tags_facet(queryset):
+    rows = (
+        AssetTag.objects.filter(asset_id__in=queryset.values('pk'))
+        .values('tag__name').annotate(count=Count('pk')).order_by('-count', 'tag__name')[:FACET_TOP]
+    )
+    return [{'value': row['tag__name'], 'count': row['count']} for row in rows]
+
+
+def _user_facet(queryset):
+    rows = (
+        queryset.values('user', 'user__username').annotate(count=Count('pk'))
+        .order_by('-count', 'user__username')[:FACET_TOP]
+    )
+    return [{'value': row['user'], 'label': row['user__username'], 'count': row['count']} for row in rows]
+
+
+def _month_facet(queryset):
+    rows = (
+        queryset.annotate(month=TruncMonth('created_at')).values('month').annotate(count=Count('pk'))
+        .order_by('-month')[:FACET_MONTHS]
+    )
+    return [{'value': row['month'].strftime('%Y-%m'), 'count': row['count']} for row in rows]
+
+
+_FACET_FUNCTIONS = {
+    'file_type': _file_type_facet,
+    'tags': _tags_facet,
+    'user': _user_facet,
+    'month': _month_facet,
+}
+
+
+def facet_counts(queryset, names):
+    """Counts for the named facets over a filtered Asset queryset (not a UNION)"""
+    queryset = queryset.order_by()
+    return {name: _FACET_FUNCTIONS[name](queryset) for name in names}
+
+
+def cached_facet_counts(queryset, names, partition, generation_names):
+    """
+    facet_counts for an unfiltered queryset, shared by every request in the
+    partition until one of the generation counters moves.
+    """
+    counters = '.'.join(str(value) for value in generations(*generation_names))
+    key = f"assets:facets:{partition}:{counters}:{','.join(names)}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = facet_counts(queryset, names)
+        cache.set(key, facets, settings.ASSET_RESPONSE_CACHE_TTL)
+    return facets
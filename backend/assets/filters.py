@@ -1,43 +1,40 @@
-import django_filters
-from .models import Asset
-
-
-class AssetFilter(django_filters.FilterSet):
-    """
-    Filter class for Asset model to enable search and filtering
-    """
-    # Search by title (case-insensitive, partial match)
-    title = django_filters.CharFilter(lookup_expr='icontains')
-
-    # Search by description (case-insensitive, partial match)
-    description = django_filters.CharFilter(lookup_expr='icontains')
-
-    # Search by tags (case-insensitive, partial match)
-    tags = django_filters.CharFilter(lookup_expr='icontains')
-
-    # Filter by file type
-    file_type = django_filters.CharFilter(lookup_expr='iexact')
-
-    # Filter by date range
-    created_at_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
-    created_at_before = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lte')
-
-    # General search across multiple fields
-    search = django_filters.CharFilter(method='search_filter')
-
-    class Meta:
-        model = Asset
-        fields = ['title', 'description', 'tags', 'file_type', 'created_at_after', 'created_at_before']
-
-    def search_filter(self, queryset, name, value):
-        """
-        Custom filter method for searching across multiple fields
-        """
-        return queryset.filter(
-            models.Q(title__icontains=value) |
-            models.Q(description__icontains=value) |
-            models.Q(tags__icontains=value)
-        )
-
-
-from django.db import models
\ No newline at end of file
+from rest_framework.filters import BaseFilterBackend, OrderingFilter, SearchFilter
+from .query import filter_assets
+from .search import get_search_backend
+
+# Activity rankings (activity.popularity): highest score first, newest first among equals
+RANKED_ORDERINGS = {
+    'popularity': ('-popularity', '-created_at'),
+    'trending': ('-trending', '-created_at'),
+}
+
+
+class AssetQueryFilter(BaseFilterBackend):
+    """
+    Narrow the asset list with the asset query language (assets.query): the
+    flat parameters (``file_type``, ``user``, ``is_active``, ``tags``,
+    ``date_from``, ...) and a JSON ``filter``, compiled into the one query.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_assets(queryset, request.query_params)
+
+
+class AssetSearchFilter(SearchFilter):
+    """``?search=`` on the asset list, answered by the configured search backend (assets.search)"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return get_search_backend().search(queryset, query)
+
+
+class AssetOrderingFilter(OrderingFilter):
+    """OrderingFilter that also takes ``ordering=popularity`` and ``ordering=trending``"""
+
+    def get_ordering(self, request, queryset, view):
+        value = request.query_params.get(self.ordering_param, '').strip()
+        if value in RANKED_ORDERINGS:
+            return list(RANKED_ORDERINGS[value])
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,215 @@
+"""
+Fuzzy (trigram) matching and "did you mean" suggestions for asset search.
+
+On PostgreSQL the pg_trgm operators match and rank titles and tag names,
+served by the GIN trigram indexes from migration 0008:
+
+* ``title % q`` - the whole title is similar to the query
+* ``q <% title`` - some run of words in the title is similar to it
+* ``tag.name % q`` - one of the asset's tags is similar to it
+
+Other databases (SQLite in development and tests) get the same behaviour
+from a pure-Python version of pg_trgm's trigram similarity, run over an
+in-memory vocabulary of active titles and tags. The word-level score only
+approximates pg_trgm's word_similarity, so rankings can differ slightly.
+"""
+import heapq
+import re
+from operator import itemgetter
+
+from django.db import connection
+from django.db.models import BooleanField, Case, F, FloatField, Func, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Asset, AssetTag, Tag
+from .response_cache import generations
+
+SIMILARITY_THRESHOLD = 0.3  # pg_trgm's default similarity_threshold
+SUGGESTION_THRESHOLD = 0.4
+SUGGESTION_CANDIDATES = 20
+MAX_QUERY_WORDS = 5
+# The Python fallback passes its matches back as literals (an IN list and a CASE);
+# three parameters each keeps the query inside SQLite's oldest 999-variable limit
+FALLBACK_MAX_MATCHES = 200
+
+# pg_trgm splits on anything that isn't a letter or digit
+_WORD = re.compile(r'[^\W_]+')
+
+
+def words(text):
+    return _WORD.findall(text.lower())
+
+
+def trigrams(text):
+    """pg_trgm's trigram set: each word padded with two spaces before and one after"""
+    result = set()
+    for word in words(text):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def similarity(a, b):
+    first, second = trigrams(a), trigrams(b)
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def match_score(query, text):
+    """Similarity to the whole text or to its best run of as many words as the query has"""
+    text_words = words(text)
+    span = max(1, min(len(words(query)), len(text_words)))
+    runs = (' '.join(text_words[i:i + span]) for i in range(len(text_words) - span + 1))
+    return max([similarity(query, text), *(similarity(query, run) for run in runs)])
+
+
+def fuzzy_supported():
+    return connection.vendor == 'postgresql'
+
+
+class TrigramSimilarity(Func):
+    function = 'SIMILARITY'
+    output_field = FloatField()
+
+
+class TrigramWordSimilarity(Func):
+    """word_similarity(query, text)"""
+    function = 'WORD_SIMILARITY'
+    output_field = FloatField()
+
+
+class TrigramSimilar(Func):
+    """text % query"""
+    arg_joiner = ' %% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+class TrigramWordSimilar(Func):
+    """query <% text"""
+    arg_joiner = ' <%% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+class Vocabulary:
+    """
+    Active titles and tags for the Python fallback, reloaded whenever the
+    ``public`` or ``tags`` generation counters move.
+    """
+
+    def __init__(self):
+        self._snapshot = (None, [], {}, set())
+
+    def _current(self):
+        generation = tuple(generations('public', 'tags'))
+        if generation != self._snapshot[0]:
+            titles = list(Asset.objects.filter(is_active=True).values_list('asset_id', 'title'))
+            tags = dict(Tag.objects.filter(usage_count__gt=0).values_list('name', 'pk'))
+            terms = {word for _, title in titles for word in words(title)}
+            terms.update(word for name in tags for word in words(name))
+            self._snapshot = (generation, titles, tags, terms)
+        return self._snapshot
+
+    def matches(self, query):
+        """
+        {asset_id: score} for the FALLBACK_MAX_MATCHES active assets whose
+        title or a tag is most similar to the query
+        """
+        _, titles, tags, _ = self._current()
+        scores = {}
+        for asset_id, title in titles:
+            score = match_score(query, title)
+            if score >= SIMILARITY_THRESHOLD:
+                scores[asset_id] = score
+        tag_scores = {pk: similarity(query, name) for name, pk in tags.items()}
+        tag_scores = {pk: score for pk, score in tag_scores.items() if score >= SIMILARITY_THRESHOLD}
+        for asset_id, tag_id in AssetTag.objects.filter(tag_id__in=tag_scores).values_list('asset_id', 'tag_id'):
+            scores[asset_id] = max(scores.get(asset_id, 0.0), tag_scores[tag_id])
+        if len(scores) > FALLBACK_MAX_MATCHES:
+            scores = dict(heapq.nlargest(FALLBACK_MAX_MATCHES, scores.items(), key=itemgetter(1)))
+        return scores
+
+    def terms(self):
+        return self._current()[3]
+
+
+vocabulary = Vocabulary()
+
+
+def fuzzy_search(queryset, query, exact):
+    """
+    Widen ``exact`` (the substring match) with fuzzy title and tag matches and
+    annotate ``relevance``: 1 for exact matches, the trigram similarity otherwise.
+    """
+    value = Value(query)
+    if fuzzy_supported():
+        tag_similarity = (
+            AssetTag.objects.filter(asset=OuterRef('pk'))
+            .annotate(score=TrigramSimilarity(F('tag__name'), value))
+            .order_by('-score').values('score')[:1]
+        )
+        fuzzy = (
+            Q(TrigramSimilar(F('title'), value))
+            | Q(TrigramWordSimilar(value, F('title')))
+            | Q(pk__in=AssetTag.objects.filter(TrigramSimilar(F('tag__name'), value)).values('asset_id'))
+        )
+        score = Greatest(
+            TrigramWordSimilarity(value, F('title')),
+            Coalesce(Subquery(tag_similarity, output_field=FloatField()), Value(0.0)),
+        )
+    else:
+        scores = vocabulary.matches(query)
+        fuzzy = Q(pk__in=list(scores))
+        score = Case(*(When(pk=asset_id, then=Value(match)) for asset_id, match in scores.items()),
+                     default=Value(0.0), output_field=FloatField())
+    relevance = Case(When(exact, then=Value(1.0)), default=score, output_field=FloatField())
+    return queryset.filter(exact | fuzzy).annotate(relevance=relevance)
+
+
+def _candidate_terms(word):
+    """Vocabulary words that might be what ``word`` was meant to be"""
+    if not fuzzy_supported():
+        return vocabulary.terms()
+    value = Value(word)
+    titles = (
+        Asset.objects.filter(Q(is_active=True), Q(TrigramWordSimilar(value, F('title'))))
+        .annotate(score=TrigramWordSimilarity(value, F('title')))
+        .order_by('-score').values_list('title', flat=True)[:SUGGESTION_CANDIDATES]
+    )
+    tags = (
+        Tag.objects.filter(Q(usage_count__gt=0), Q(TrigramSimilar(F('name'), value)))
+        .annotate(score=TrigramSimilarity(F('name'), value))
+        .order_by('-score').values_list('name', flat=True)[:SUGGESTION_CANDIDATES]
+    )
+    return {term for text in [*titles, *tags] for term in words(text)}
+
+
+def suggest(query):
+    """
+    A corrected query for one that found nothing, or None.
+
+    Each word that isn't in the vocabulary is replaced by the most similar
+    word that is. The words are joined by single spaces, since the suggestion
+    is sent in a response header and the query's own separators may be
+    control characters.
+    """
+    changed = False
+
+    def correct(word):
+        nonlocal changed
+        candidates = _candidate_terms(word)
+        if word.lower() in candidates:
+            return word
+        best = max(candidates, key=lambda term: (similarity(word, term), term), default=None)
+        if best is None or similarity(word, best) < SUGGESTION_THRESHOLD:
+            return word
+        changed = True
+        return best
+
+    query_words = words(query)
+    if len(query_words) > MAX_QUERY_WORDS:
+        return None
+    suggestion = ' '.join(correct(word) for word in query_words)
+    return suggestion if changed else None
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from assets.related import build_related, refresh_related
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute related assets for assets changed or downloaded since the last run. "
+        "Safe to run repeatedly; schedule it every few minutes (cron or Celery beat) and --rebuild nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute the related assets of every asset',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with_related = build_related()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt related assets; {with_related} assets have some"))
+            return
+
+        refreshed = refresh_related()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed related assets of {refreshed} assets"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from assets.extraction import extract_pending_text
+from assets.models import AssetText
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract searchable text from PDF, DOCX, RTF and TXT assets that are new or have a replaced file. "
+        "Safe to run repeatedly; schedule it every few minutes (cron or Celery beat)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Process at most this many assets')
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Discard all extracted text first, e.g. after improving an extractor',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            AssetText.objects.all().delete()
+            self.stdout.write("Cleared extracted text")
+
+        processed = extract_pending_text(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Extracted text from {processed} assets"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from assets.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Re-index every asset in the configured search backend (ASSET_SEARCH_BACKEND)."
+
+    def handle(self, *args, **options):
+        indexed = get_search_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} assets"))
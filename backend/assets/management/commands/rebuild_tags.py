@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from assets.tags import rebuild_tags
+
+
+class Command(BaseCommand):
+    help = "Re-sync the tag tables and usage counts from Asset.tags. Run after bulk imports or queryset updates."
+
+    def handle(self, *args, **options):
+        processed = rebuild_tags()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt tags for {processed} assets"))
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_alter_asset_file_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetTombstone',
+            fields=[
+                ('asset_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('user_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField(db_index=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'asset_tombstones',
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'asset_change_sequence',
+            },
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['change_seq'], name='assets_change__256ce0_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    Asset = apps.get_model('assets', 'Asset')
+    ChangeSequence = apps.get_model('assets', 'ChangeSequence')
+
+    # Existing assets enter the change feed in creation order
+    seq = 0
+    for asset_id in Asset.objects.order_by('created_at').values_list('asset_id', flat=True).iterator():
+        seq += 1
+        Asset.objects.filter(pk=asset_id).update(change_seq=seq)
+    ChangeSequence.objects.update_or_create(pk=1, defaults={'value': seq})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_asset_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0004_backfill_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='assets_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['file_type', '-created_at'], name='assets_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['user', '-created_at'], name='assets_inactive_user_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_tags_gin_index(apps, schema_editor):
+    # jsonb_path_ops serves the @> (tags__contains) lookups; PostgreSQL only
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS assets_tags_gin_idx ON assets USING gin (tags jsonb_path_ops)'
+        )
+
+
+def drop_tags_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS assets_tags_gin_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0005_asset_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('usage_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'tags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AssetTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='assets.asset')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asset_links', to='assets.tag')),
+            ],
+            options={
+                'db_table': 'asset_tags',
+                'unique_together': {('tag', 'asset')},
+            },
+        ),
+        migrations.RunPython(create_tags_gin_index, drop_tags_gin_index),
+    ]
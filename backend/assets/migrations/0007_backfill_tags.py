@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    Asset = apps.get_model('assets', 'Asset')
+    Tag = apps.get_model('assets', 'Tag')
+    AssetTag = apps.get_model('assets', 'AssetTag')
+
+    # Same normalization as assets.tags.normalize_tags
+    links = []
+    counts = {}
+    for asset_id, tags, is_active in Asset.objects.values_list('asset_id', 'tags', 'is_active').iterator():
+        names = []
+        for tag in tags if isinstance(tags, list) else []:
+            name = str(tag).strip()[:100]
+            if name and name not in names:
+                names.append(name)
+        for name in names:
+            links.append((asset_id, name))
+            counts[name] = counts.get(name, 0) + (1 if is_active else 0)
+
+    Tag.objects.bulk_create([Tag(name=name, usage_count=count) for name, count in counts.items()], batch_size=1000)
+    tag_ids = dict(Tag.objects.values_list('name', 'pk'))
+    AssetTag.objects.bulk_create(
+        [AssetTag(asset_id=asset_id, tag_id=tag_ids[name]) for asset_id, name in links], batch_size=1000
+    )
+
+
+def backwards(apps, schema_editor):
+    apps.get_model('assets', 'AssetTag').objects.all().delete()
+    apps.get_model('assets', 'Tag').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0006_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Fuzzy search (assets.fuzzy) uses pg_trgm on PostgreSQL; other databases
+    # fall back to matching in Python. CREATE EXTENSION needs a role that may
+    # create it, or the extension installed beforehand.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS assets_title_trgm_idx ON assets USING gin (title gin_trgm_ops)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS tags_name_trgm_idx ON tags USING gin (name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS assets_title_trgm_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS tags_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0007_backfill_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
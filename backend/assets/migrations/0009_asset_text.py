@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0008_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetText',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='extracted_text', serialize=False, to='assets.asset')),
+                ('source', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('done', 'Extracted'), ('empty', 'No text found'), ('unsupported', 'Unsupported format'), ('failed', 'Failed')], max_length=12)),
+                ('content', models.TextField(blank=True)),
+                ('truncated', models.BooleanField(default=False)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'asset_texts',
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assets', '0009_asset_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('search_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('query', models.CharField(blank=True, max_length=255)),
+                ('file_type', models.CharField(blank=True, choices=[('image', 'Image'), ('video', 'Video'), ('pdf', 'PDF'), ('doc', 'Document'), ('audio', 'Audio'), ('3d', '3D Model'), ('other', 'Other')], max_length=10)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('date_from', models.DateTimeField(blank=True, null=True)),
+                ('date_to', models.DateTimeField(blank=True, null=True)),
+                ('last_viewed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'saved_searches',
+                'ordering': ['name'],
+                'unique_together': {('user', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset_id', models.UUIDField()),
+                ('entered', models.BooleanField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='assets.savedsearch')),
+            ],
+            options={
+                'db_table': 'saved_search_changes',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset_id', models.UUIDField()),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='assets.savedsearch')),
+            ],
+            options={
+                'db_table': 'saved_search_results',
+                'indexes': [models.Index(fields=['asset_id'], name='saved_searc_asset_i_9d5e65_idx')],
+                'unique_together': {('search', 'asset_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0010_saved_searches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='trending',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-popularity', '-created_at'], name='assets_active_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-trending', '-created_at'], name='assets_active_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0011_asset_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_assets', to='assets.asset')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assets.asset')),
+            ],
+            options={
+                'db_table': 'related_assets',
+                'indexes': [models.Index(fields=['asset', '-score'], name='related_ass_asset_i_b70586_idx')],
+                'unique_together': {('asset', 'related')},
+            },
+        ),
+    ]
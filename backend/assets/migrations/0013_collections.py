@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assets', '0012_related_assets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Collection',
+            fields=[
+                ('collection_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('asset_count', models.PositiveIntegerField(default=0)),
+                ('subtree_asset_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='assets.collection')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collections', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'collections',
+                'ordering': ['path'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CollectionAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255)),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collection_memberships', to='assets.asset')),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='assets.collection')),
+            ],
+            options={
+                'db_table': 'collection_assets',
+                'indexes': [models.Index(fields=['path', 'asset'], name='collection_assets_path_idx')],
+                'unique_together': {('collection', 'asset')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_content_trigram_index(apps, schema_editor):
+    # Content search (assets.search.database) matches extracted text with
+    # ILIKE, which this index serves; pg_trgm was installed by 0008. Other
+    # databases scan asset_texts instead.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS asset_texts_content_trgm_idx ON asset_texts USING gin (content gin_trgm_ops)'
+    )
+
+
+def drop_content_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS asset_texts_content_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0013_collections'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_content_trigram_index, drop_content_trigram_index),
+    ]
@@ -1,18 +1,48 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from users.storage import adjust_usage
 import os
 import uuid
 
 User = get_user_model()
 
 
+class AssetModified(Exception):
+    """A guarded save found the asset row changed since it was loaded (see Asset.guard_next_save)"""
+
+
 def asset_upload_path(instance, filename):
     ext = filename.split('.')[-1]
     filename = f"{uuid.uuid4()}.{ext}"
     return f"assets/{instance.user.id}/{filename}"
 
 
+class ChangeSequence(models.Model):
+    """
+    Single-row counter behind Asset.change_seq.
+
+    Incrementing it takes a row lock that is held until the writer commits, so
+    sequence numbers become visible to readers in commit order.
+    """
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'asset_change_sequence'
+
+    def __str__(self):
+        return str(self.value)
+
+
+def next_change_seq():
+    """Claim the next change sequence number; call inside the writer's transaction"""
+    if not ChangeSequence.objects.filter(pk=1).update(value=F('value') + 1):
+        ChangeSequence.objects.get_or_create(pk=1)
+        ChangeSequence.objects.filter(pk=1).update(value=F('value') + 1)
+    return ChangeSequence.objects.values_list('value', flat=True).get(pk=1)
+
+
 class Asset(models.Model):
     FILE_TYPE_CHOICES = (
         ('image', 'Image'),
@@ -35,6 +65,10 @@ class Asset(models.Model):
     file_size = models.BigIntegerField(default=0)  # Size in bytes
     mime_type = models.CharField(max_length=100, blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    change_seq = models.BigIntegerField(default=0, editable=False)  # Position in the sync change feed
+    # Decayed activity scores, kept by activity.popularity; only their order is meaningful
+    popularity = models.FloatField(default=0, editable=False)
+    trending = models.FloatField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -45,8 +79,26 @@ class Asset(models.Model):
             models.Index(fields=['file_type']),
             models.Index(fields=['created_at']),
             models.Index(fields=['user', 'file_type']),
+            models.Index(fields=['change_seq']),
+            # Partial indexes behind the role-scoped list queries (see assets.views):
+            # viewers and the editor "active" branch walk the active rows newest first,
+            # the editor "own inactive" branch walks one user's inactive rows.
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True),
+                         name='assets_active_created_idx'),
+            models.Index(fields=['file_type', '-created_at'], condition=models.Q(is_active=True),
+                         name='assets_active_type_idx'),
+            models.Index(fields=['user', '-created_at'], condition=models.Q(is_active=False),
+                         name='assets_inactive_user_idx'),
+            # ordering=popularity / ordering=trending over the active rows
+            models.Index(fields=['-popularity', '-created_at'], condition=models.Q(is_active=True),
+                         name='assets_active_popular_idx'),
+            models.Index(fields=['-trending', '-created_at'], condition=models.Q(is_active=True),
+                         name='assets_active_trending_idx'),
         ]
 
+    # Written only by the popularity job's own UPDATEs
+    SCORE_FIELDS = ('popularity', 'trending')
+
     def __str__(self):
         return f"{self.title} (v{self.version})"
 
@@ -70,7 +122,54 @@ class Asset(models.Model):
                     self.file_type = '3d'
                 else:
                     self.file_type = 'other'
-        super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # A full save from an instance loaded before the last popularity run must not roll the scores back
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.SCORE_FIELDS]
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq'}
+        previous_size = 0 if self._state.adding else getattr(self, 'persisted', {}).get('file_size')
+        if previous_size is None:
+            previous_size = self.file_size
+        try:
+            with transaction.atomic():
+                self.change_seq = next_change_seq()
+                super().save(*args, **kwargs)
+                adjust_usage(self.user_id, self.file_size - previous_size)
+        finally:
+            self._save_guard = None
+        self.persisted = self._tracked_values()
+
+    def guard_next_save(self, **expected):
+        """
+        Make the next save a conditional UPDATE that only applies while the row
+        still holds the expected values, raising AssetModified otherwise.
+
+        The check and the write are one statement, so no row lock is needed.
+        """
+        self._save_guard = expected
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        guard = getattr(self, '_save_guard', None)
+        if not guard:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if not super()._do_update(base_qs.filter(**guard), using, pk_val, values, update_fields, forced_update):
+            raise AssetModified(f"Asset {pk_val} changed since it was loaded")
+        return True
+
+    def _tracked_values(self):
+        values = {name: self.__dict__.get(name) for name in ('file_size', 'user_id', 'is_active')}
+        # Copied, since tag lists are usually edited in place
+        tags = self.__dict__.get('tags')
+        values['tags'] = list(tags) if isinstance(tags, list) else tags
+        return values
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember persisted values so saves can account for size and visibility changes
+        instance.persisted = instance._tracked_values()
+        return instance
 
     @property
     def file_url(self):
@@ -100,6 +199,127 @@ class Metadata(models.Model):
         return f"{self.asset.title} - {self.field_name}"
 
 
+class Tag(models.Model):
+    """
+    A distinct tag name, mirrored from Asset.tags (see assets.tags).
+
+    usage_count is the number of active assets carrying the tag.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    usage_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tags'
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.usage_count})"
+
+
+class AssetTag(models.Model):
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='asset_links')
+
+    class Meta:
+        db_table = 'asset_tags'
+        unique_together = ('tag', 'asset')
+
+    def __str__(self):
+        return f"{self.asset_id} - {self.tag_id}"
+
+
+class AssetText(models.Model):
+    """
+    Text extracted from a document asset's file (see assets.extraction).
+
+    Kept out of the assets table so list queries never load it. ``source`` is
+    the file the text came from; once the asset's file is replaced the row is
+    stale and the next extraction run redoes it.
+    """
+    STATUS_CHOICES = (
+        ('done', 'Extracted'),
+        ('empty', 'No text found'),
+        ('unsupported', 'Unsupported format'),
+        ('failed', 'Failed'),
+    )
+
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name='extracted_text')
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES)
+    content = models.TextField(blank=True)
+    truncated = models.BooleanField(default=False)  # Stopped at ASSET_TEXT_MAX_CHARS or ASSET_TEXT_MAX_FILE_BYTES
+    error = models.CharField(max_length=255, blank=True)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'asset_texts'
+
+    def __str__(self):
+        return f"{self.asset_id} ({self.status}, {len(self.content)} chars)"
+
+
+class RelatedAsset(models.Model):
+    """One of an asset's precomputed nearest neighbours (see assets.related)"""
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='related_assets')
+    related = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        db_table = 'related_assets'
+        unique_together = ('asset', 'related')
+        indexes = [
+            models.Index(fields=['asset', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class Collection(models.Model):
+    """
+    A folder of assets that can nest (see assets.collections).
+
+    ``path`` is the parent's path plus one fixed-width step, so a subtree is
+    one range of paths. The counts are of active assets, cached.
+    """
+    collection_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='collections')
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    name = models.CharField(max_length=100)
+    path = models.CharField(max_length=255, unique=True)
+    depth = models.PositiveSmallIntegerField()
+    asset_count = models.PositiveIntegerField(default=0)  # In this collection itself
+    subtree_asset_count = models.PositiveIntegerField(default=0)  # In it and everything below it
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'collections'
+        ordering = ['path']
+
+    def __str__(self):
+        return self.name
+
+
+class CollectionAsset(models.Model):
+    """An asset's membership of a collection, with a copy of the collection's path for subtree scans"""
+    collection = models.ForeignKey(Collection, on_delete=models.CASCADE, related_name='memberships')
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='collection_memberships')
+    path = models.CharField(max_length=255)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'collection_assets'
+        unique_together = ('collection', 'asset')
+        indexes = [
+            models.Index(fields=['path', 'asset'], name='collection_assets_path_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} in {self.collection_id}"
+
+
 class AssetVersion(models.Model):
     version_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='versions')
@@ -116,4 +336,76 @@ class AssetVersion(models.Model):
         ordering = ['-version_number']
 
     def __str__(self):
-        return f"{self.asset.title} - v{self.version_number}"
\ No newline at end of file
+        return f"{self.asset.title} - v{self.version_number}"
+
+
+class SavedSearch(models.Model):
+    """
+    A user's stored search_assets query. The ids of the assets it matches are
+    kept in SavedSearchResult and updated as assets change (see
+    assets.saved_searches).
+    """
+    search_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100)
+    query = models.CharField(max_length=255, blank=True)
+    file_type = models.CharField(max_length=10, choices=Asset.FILE_TYPE_CHOICES, blank=True)
+    tags = models.JSONField(default=list, blank=True)  # Every one of them is required
+    date_from = models.DateTimeField(null=True, blank=True)
+    date_to = models.DateTimeField(null=True, blank=True)
+    last_viewed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'saved_searches'
+        ordering = ['name']
+        unique_together = ('user', 'name')
+
+    def __str__(self):
+        return f"{self.name} ({self.user_id})"
+
+
+class SavedSearchResult(models.Model):
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='results')
+    # Plain column so deleting an asset leaves the row for the refresh to remove and log
+    asset_id = models.UUIDField()
+
+    class Meta:
+        db_table = 'saved_search_results'
+        unique_together = ('search', 'asset_id')
+        indexes = [
+            models.Index(fields=['asset_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.search_id} - {self.asset_id}"
+
+
+class SavedSearchChange(models.Model):
+    """An asset entering or leaving a saved search's results since it was last viewed"""
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='changes')
+    asset_id = models.UUIDField()
+    entered = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'saved_search_changes'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.asset_id} {'entered' if self.entered else 'left'} {self.search_id}"
+
+
+class AssetTombstone(models.Model):
+    """Marker left by a hard delete so sync clients learn the asset is gone"""
+    asset_id = models.UUIDField(primary_key=True)
+    user_id = models.BigIntegerField()  # Former owner; plain column because the user may be gone too
+    change_seq = models.BigIntegerField(db_index=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'asset_tombstones'
+
+    def __str__(self):
+        return f"{self.asset_id} deleted @ {self.change_seq}"
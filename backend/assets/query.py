@@ -0,0 +1,332 @@
+"""
+Asset query language: the one filter behind the asset list, search_assets,
+export and bulk endpoints.
+
+A query is a JSON tree, sent as ``?filter=`` (URL-encoded JSON) or as
+``"filter"`` in a POST body::
+
+    {"and": [
+        {"file_type": "image"},
+        {"or": [{"tag": "brand"}, {"metadata": {"name": "campaign", "eq": "spring"}}]},
+        {"not": {"tag": "draft"}},
+        {"file_size": {"lt": 5242880}},
+        {"created_at": {"gte": "2024-01-01", "lt": "2024-07-01"}}
+    ]}
+
+A condition is ``{field: value}`` for equality or ``{field: {op: value}}``;
+several keys in one object are ANDed. FIELDS lists the fields and the
+operators each allows. The flat query parameters the endpoints always
+took (file_type=, tags=, date_from=, ...) are read into the same tree by
+from_query_params.
+
+compile_query turns a tree into a single Q: plain comparisons on the
+asset columns (so the partial indexes still apply), tags, metadata and
+collections as id subqueries on their indexed tables. Queries are limited in depth,
+conditions and list sizes; anything invalid or over a limit is a
+ValidationError (400).
+"""
+import json
+import uuid
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .collections import subtree_range
+from .models import Asset, AssetTag, Collection, CollectionAsset, Metadata
+from .tags import TAG_NAME_MAX_LENGTH, tagged
+
+QUERY_MAX_DEPTH = 6
+QUERY_MAX_CONDITIONS = 32
+QUERY_MAX_LIST_VALUES = 100
+QUERY_MAX_STRING_LENGTH = 255
+
+FILE_TYPES = dict(Asset.FILE_TYPE_CHOICES)
+
+COMPARISONS = {'gt', 'gte', 'lt', 'lte', 'between'}
+TEXT_OPERATORS = {'eq', 'ne', 'in', 'contains', 'startswith'}
+
+# Lookups for operators that map straight onto one; the rest are built in _field_condition
+LOOKUPS = {
+    'eq': 'exact',
+    'in': 'in',
+    'contains': 'icontains',
+    'startswith': 'istartswith',
+    'gt': 'gt',
+    'gte': 'gte',
+    'lt': 'lt',
+    'lte': 'lte',
+}
+
+
+def _error(message):
+    return ValidationError({'filter': message})
+
+
+def _text(value):
+    if not isinstance(value, str):
+        raise _error(f"Expected a string, got {json.dumps(value)}.")
+    if len(value) > QUERY_MAX_STRING_LENGTH:
+        raise _error(f"Strings are limited to {QUERY_MAX_STRING_LENGTH} characters.")
+    return value
+
+
+def _file_type(value):
+    value = _text(value).lower()
+    if value not in FILE_TYPES:
+        raise _error(f"Unknown file type {value!r}. Choose from {', '.join(FILE_TYPES)}.")
+    return value
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        try:
+            value = int(_text(value))
+        except ValueError:
+            raise _error(f"Expected a whole number, got {json.dumps(value)}.")
+    return value
+
+
+def _boolean(value):
+    if isinstance(value, str) and value.lower() in ('true', '1', 'yes'):
+        return True
+    if isinstance(value, str) and value.lower() in ('false', '0', 'no'):
+        return False
+    if not isinstance(value, bool):
+        raise _error(f"Expected true or false, got {json.dumps(value)}.")
+    return value
+
+
+def _datetime(value):
+    """An ISO 8601 date or datetime; dates mean midnight, naive times the current timezone"""
+    text = _text(value)
+    try:
+        parsed = parse_datetime(text)
+        if parsed is None and (day := parse_date(text)) is not None:
+            parsed = datetime.combine(day, time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise _error(f"Expected an ISO 8601 date or datetime, got {text!r}.")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+# field: (column, value parser, operators)
+FIELDS = {
+    'title': ('title', _text, TEXT_OPERATORS),
+    'description': ('description', _text, TEXT_OPERATORS),
+    'mime_type': ('mime_type', _text, TEXT_OPERATORS),
+    'file_type': ('file_type', _file_type, {'eq', 'ne', 'in'}),
+    'user': ('user_id', _number, {'eq', 'ne', 'in'}),
+    'is_active': ('is_active', _boolean, {'eq'}),
+    'file_size': ('file_size', _number, {'eq', 'ne', 'in'} | COMPARISONS),
+    'version': ('version', _number, {'eq', 'ne'} | COMPARISONS),
+    'created_at': ('created_at', _datetime, COMPARISONS),
+    'updated_at': ('updated_at', _datetime, COMPARISONS),
+}
+# Conditions on the normalized tag table and on metadata rows, compiled to id subqueries
+SPECIAL_FIELDS = {
+    'tag': {'eq', 'in', 'all'},
+    'metadata': {'eq', 'ne', 'contains', 'exists'},
+    'collection': {'eq', 'direct'},
+}
+
+
+class _Compiler:
+    def __init__(self):
+        self.conditions = 0
+
+    def compile(self, node, depth=1):
+        if depth > QUERY_MAX_DEPTH:
+            raise _error(f"Queries may nest at most {QUERY_MAX_DEPTH} levels deep.")
+        if not isinstance(node, dict) or not node:
+            raise _error(f"Expected a non-empty object, got {json.dumps(node)}.")
+        q = Q()
+        for key, value in node.items():
+            q &= self._compile_key(key, value, depth)
+        return q
+
+    def _compile_key(self, key, value, depth):
+        if key in ('and', 'or'):
+            if not isinstance(value, list) or not value:
+                raise _error(f"'{key}' takes a non-empty list of queries.")
+            parts = [self.compile(child, depth + 1) for child in value]
+            combined = parts[0]
+            for part in parts[1:]:
+                combined = combined & part if key == 'and' else combined | part
+            return combined
+        if key == 'not':
+            return ~self.compile(value, depth + 1)
+        self.conditions += 1
+        if self.conditions > QUERY_MAX_CONDITIONS:
+            raise _error(f"Queries may have at most {QUERY_MAX_CONDITIONS} conditions.")
+        if key == 'tag':
+            return _tag_condition(value)
+        if key == 'metadata':
+            return _metadata_condition(value)
+        if key == 'collection':
+            return _collection_condition(value)
+        if key not in FIELDS:
+            raise _error(f"Unknown field {key!r}. Choose from {', '.join([*FIELDS, *SPECIAL_FIELDS])}.")
+        return _field_condition(key, value)
+
+
+def _operators(field, value, allowed):
+    """[(operator, operand)] from {field: value} or {field: {op: value, ...}}"""
+    if not isinstance(value, dict):
+        return [('eq', value)]
+    if not value:
+        raise _error(f"Condition on {field!r} has no operators.")
+    unknown = value.keys() - allowed
+    if unknown:
+        raise _error(f"Operators for {field!r} are {', '.join(sorted(allowed))}; got {', '.join(sorted(unknown))}.")
+    return list(value.items())
+
+
+def _values(field, operand, parse):
+    if not isinstance(operand, list) or not operand:
+        raise _error(f"Expected a non-empty list of values for {field!r}.")
+    if len(operand) > QUERY_MAX_LIST_VALUES:
+        raise _error(f"Lists are limited to {QUERY_MAX_LIST_VALUES} values.")
+    return [parse(item) for item in operand]
+
+
+def _field_condition(field, value):
+    column, parse, allowed = FIELDS[field]
+    q = Q()
+    for operator, operand in _operators(field, value, allowed):
+        if operator == 'in':
+            q &= Q(**{f'{column}__in': _values(field, operand, parse)})
+        elif operator == 'between':
+            if not isinstance(operand, list) or len(operand) != 2:
+                raise _error(f"'between' takes [low, high] for {field!r}.")
+            low, high = _values(field, operand, parse)
+            q &= Q(**{f'{column}__gte': low, f'{column}__lte': high})
+        elif operator == 'ne':
+            q &= ~Q(**{column: parse(operand)})
+        else:
+            q &= Q(**{f'{column}__{LOOKUPS[operator]}': parse(operand)})
+    return q
+
+
+def _tag_name(value):
+    return _text(value).strip()[:TAG_NAME_MAX_LENGTH]
+
+
+def _tag_condition(value):
+    q = Q()
+    for operator, operand in _operators('tag', value, SPECIAL_FIELDS['tag']):
+        if operator == 'eq':
+            q &= tagged(_tag_name(operand))
+        elif operator == 'in':
+            names = _values('tag', operand, _tag_name)
+            q &= Q(pk__in=AssetTag.objects.filter(tag__name__in=names).values('asset_id'))
+        else:  # all
+            for name in _values('tag', operand, _tag_name):
+                q &= tagged(name)
+    return q
+
+
+def _metadata_condition(value):
+    """{"name": field_name, op: value}: assets with a metadata row of that name matching"""
+    if not isinstance(value, dict) or 'name' not in value:
+        raise _error("A metadata condition needs a 'name' and one of eq, ne, contains or exists.")
+    value = dict(value)
+    rows = Metadata.objects.filter(field_name=_text(value.pop('name')))
+    operators = _operators('metadata', value, SPECIAL_FIELDS['metadata'])
+    if len(operators) != 1:
+        raise _error("A metadata condition takes exactly one of eq, ne, contains or exists.")
+    operator, operand = operators[0]
+    if operator == 'exists':
+        q = Q(pk__in=rows.values('asset_id'))
+        return q if _boolean(operand) else ~q
+    if operator == 'ne':
+        # Assets without the field count as different, as in SQL's NOT (... = ...)
+        return ~Q(pk__in=rows.filter(field_value=_text(operand)).values('asset_id'))
+    lookup = 'field_value' if operator == 'eq' else 'field_value__icontains'
+    return Q(pk__in=rows.filter(**{lookup: _text(operand)}).values('asset_id'))
+
+
+def _collection_condition(value):
+    """
+    {"collection": id}: assets anywhere in the collection's subtree, one
+    range of the membership index; {"collection": {"direct": id}}: only
+    the assets filed in the collection itself.
+    """
+    q = Q()
+    for operator, operand in _operators('collection', value, SPECIAL_FIELDS['collection']):
+        try:
+            collection_id = uuid.UUID(_text(operand))
+        except ValueError:
+            raise _error(f"Expected a collection id, got {operand!r}.")
+        path = Collection.objects.filter(pk=collection_id).values_list('path', flat=True).first()
+        if path is None:
+            raise _error(f"Unknown collection {operand!r}.")
+        rows = CollectionAsset.objects.filter(path=path) if operator == 'direct' else (
+            CollectionAsset.objects.filter(**subtree_range(path))
+        )
+        q &= Q(pk__in=rows.values('asset_id'))
+    return q
+
+
+def compile_query(tree):
+    """A Q for a query tree; an empty tree (None) matches everything"""
+    if tree is None:
+        return Q()
+    return _Compiler().compile(tree)
+
+
+def parse_filter(raw):
+    """The tree from a ``filter`` parameter: a JSON string or already-decoded JSON"""
+    if isinstance(raw, str):
+        if not raw.strip():
+            return None
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raise _error("filter must be valid JSON.")
+    return raw
+
+
+# Flat query parameters and the tree condition each one stands for
+_FLAT_PARAMETERS = {
+    'file_type': lambda value: {'file_type': value},
+    'user': lambda value: {'user': value},
+    'is_active': lambda value: {'is_active': value},
+    'title': lambda value: {'title': {'contains': value}},
+    'description': lambda value: {'description': {'contains': value}},
+    'date_from': lambda value: {'created_at': {'gte': value}},
+    'created_at_after': lambda value: {'created_at': {'gte': value}},
+    'date_to': lambda value: {'created_at': {'lte': value}},
+    'created_at_before': lambda value: {'created_at': {'lte': value}},
+    'min_size': lambda value: {'file_size': {'gte': value}},
+    'max_size': lambda value: {'file_size': {'lte': value}},
+    'collection': lambda value: {'collection': value},
+}
+
+
+def from_query_params(params, body=None):
+    """
+    The query tree for a request: the flat parameters, ``tags`` (every one
+    required) and ``filter``, from the query string or a JSON body, ANDed.
+    None when there are no conditions.
+    """
+    conditions = [build(params[name]) for name, build in _FLAT_PARAMETERS.items() if params.get(name)]
+    tags = [tag for tag in params.getlist('tags') if tag]
+    if tags:
+        conditions.append({'tag': {'all': tags}})
+    for raw in (params.get('filter'), (body or {}).get('filter') if isinstance(body, dict) else None):
+        tree = parse_filter(raw)
+        if tree is not None:
+            conditions.append(tree)
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {'and': conditions}
+
+
+def filter_assets(queryset, params, body=None):
+    """queryset narrowed by the request's query, in the same single SQL query"""
+    tree = from_query_params(params, body)
+    return queryset if tree is None else queryset.filter(compile_query(tree))
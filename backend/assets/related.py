@@ -0,0 +1,334 @@
+"""
+Related-asset recommendations, precomputed into RelatedAsset.
+
+Every active asset gets a sparse feature vector with two halves:
+
+* its tags (the AssetTag mirror), and
+* its co-download sessions: the (user, day) pairs in which it was
+  downloaded, over the last SESSION_DAYS of the activity log.
+
+A feature shared by more than MAX_FEATURE_ASSETS assets says little and
+would make the product dense, so it is dropped; so is one that only a
+single asset has. Each remaining feature is weighted log(1 + n / df).
+Each half is L2-normalized and scaled by the square root of its weight,
+so the dot product of two vectors is
+TAG_WEIGHT * tag cosine + USAGE_WEIGHT * co-download cosine.
+
+build_related multiplies the asset-feature matrix by its transpose,
+one block of rows at a time, and keeps each asset's RELATED_ASSETS_K best
+neighbours. It uses scipy.sparse when it is installed; otherwise it does
+the same product in pure Python from per-feature postings lists.
+
+refresh_related is the periodic job. It recomputes only the assets that
+changed or were downloaded since its watermark, loading just them and the
+assets they share features with (load_neighbourhood). Those assets can
+also join or leave other assets' lists:
+
+* links to them are dropped everywhere, and
+* they are offered to every asset that shares a feature with them.
+
+Other lists may briefly hold fewer than K entries, and unchanged pairs
+keep the feature weights of the run that scored them. A scheduled
+``--rebuild`` brings both up to date.
+"""
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from activity.models import ActivityLog, JobWatermark
+from .models import Asset, AssetTag, RelatedAsset
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # Same results from the pure-Python product, only slower
+    np = None
+    sparse = None
+
+RELATED_ASSETS_K = 10
+RELATED_WATERMARK = 'related_assets'
+
+TAG_WEIGHT = 0.5
+USAGE_WEIGHT = 0.5
+MAX_FEATURE_ASSETS = 1000
+SESSION_DAYS = 90
+
+BLOCK_ROWS = 1000  # Rows per sparse product, bounding its memory
+WRITE_BATCH = 1000
+ID_BATCH = 500  # Ids per IN (...) list
+
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class Features:
+    """
+    The asset-feature matrix: a dict per row, and postings lists per feature.
+    ``total`` is the size of the library the weights are computed against,
+    when the rows are only part of it.
+    """
+
+    def __init__(self, asset_ids, total=None):
+        self.asset_ids = asset_ids
+        self.total = len(asset_ids) if total is None else total
+        self.index = {asset_id: row for row, asset_id in enumerate(asset_ids)}
+        self.rows = [{} for _ in asset_ids]
+        self.postings = defaultdict(list)
+
+    def add_family(self, groups, weight, frequencies=None):
+        """
+        Add one normalized half: groups maps feature key -> rows carrying it.
+        frequencies gives each key's asset count across the whole library
+        when the rows don't cover it.
+        """
+        family = defaultdict(dict)
+        for key, rows in groups.items():
+            frequency = len(rows) if frequencies is None else frequencies[key]
+            if 2 <= frequency <= MAX_FEATURE_ASSETS:
+                idf = math.log(1 + self.total / frequency)
+                for row in rows:
+                    family[row][key] = idf
+        scale = math.sqrt(weight)
+        for row, vector in family.items():
+            norm = math.sqrt(sum(value * value for value in vector.values()))
+            for key, value in vector.items():
+                value *= scale / norm
+                self.rows[row][key] = value
+                self.postings[key].append((row, value))
+
+
+def load_features(now=None):
+    """Features of every active asset as of ``now``"""
+    now = now or timezone.now()
+    features = Features(list(Asset.objects.filter(is_active=True).order_by().values_list('pk', flat=True)))
+    index = features.index
+
+    # Assets activated between these queries have no row yet and wait for the next run
+    tags = defaultdict(set)
+    for asset_id, tag_id in AssetTag.objects.filter(asset__is_active=True).values_list('asset_id', 'tag_id'):
+        if asset_id in index:
+            tags[('tag', tag_id)].add(index[asset_id])
+    features.add_family(tags, TAG_WEIGHT)
+
+    sessions = defaultdict(set)
+    for asset_id, user_id, day in _downloads(now).values_list('asset_id', 'user_id', 'day').distinct().iterator():
+        if asset_id in index:
+            sessions[('session', user_id, day)].add(index[asset_id])
+    features.add_family(sessions, USAGE_WEIGHT)
+    return features
+
+
+def _downloads(now):
+    """Downloads of active assets inside the session window, with their day"""
+    return (
+        ActivityLog.objects.filter(action='download', timestamp__gte=now - timedelta(days=SESSION_DAYS),
+                                   timestamp__lte=now, asset__is_active=True)
+        .annotate(day=TruncDate('timestamp')).order_by()
+    )
+
+
+def _batched(queryset, field, values):
+    """Rows of queryset with ``field`` in values, one IN (...) list of ID_BATCH at a time"""
+    for chunk in _chunks(values, ID_BATCH):
+        yield from queryset.filter(**{f'{field}__in': chunk})
+
+
+def _tag_frequencies(tag_ids):
+    links = AssetTag.objects.filter(asset__is_active=True).order_by().values('tag_id').annotate(assets=Count('pk'))
+    return {('tag', row['tag_id']): row['assets'] for row in _batched(links, 'tag_id', tag_ids)}
+
+
+def _session_frequencies(sessions, now):
+    per_day = _downloads(now).values('user_id', 'day').annotate(assets=Count('asset_id', distinct=True))
+    counts = {}
+    for row in _batched(per_day, 'user_id', {user_id for user_id, _ in sessions}):
+        key = (row['user_id'], row['day'])
+        if key in sessions:
+            counts[('session', *key)] = row['assets']
+    return counts
+
+
+def load_neighbourhood(asset_ids, now=None):
+    """
+    Features of the given assets and of every asset sharing a usable
+    feature with them, weighted against the whole library exactly as
+    load_features weights them. That is all _refresh reads, without
+    loading the library.
+    """
+    now = now or timezone.now()
+    seeds = set(_batched(Asset.objects.filter(is_active=True).values_list('pk', flat=True), 'pk', asset_ids))
+
+    # The seeds' own features, less those too common to be used
+    seed_tags = set(_batched(AssetTag.objects.values_list('tag_id', flat=True), 'asset_id', seeds))
+    seed_sessions = set(_batched(_downloads(now).values_list('user_id', 'day').distinct(), 'asset_id', seeds))
+    tag_counts = _tag_frequencies(seed_tags)
+    session_counts = _session_frequencies(seed_sessions, now)
+    usable_tags = [tag_id for tag_id in seed_tags if tag_counts.get(('tag', tag_id), 0) <= MAX_FEATURE_ASSETS]
+    usable_sessions = {key for key in seed_sessions if session_counts.get(('session', *key), 0) <= MAX_FEATURE_ASSETS}
+
+    members = set(seeds)
+    members.update(_batched(AssetTag.objects.filter(asset__is_active=True).values_list('asset_id', flat=True),
+                            'tag_id', usable_tags))
+    downloads = _downloads(now).values_list('asset_id', 'user_id', 'day').distinct()
+    members.update(asset_id for asset_id, user_id, day
+                   in _batched(downloads, 'user_id', {user_id for user_id, _ in usable_sessions})
+                   if (user_id, day) in usable_sessions)
+
+    # Every feature of every member, so each row normalizes as in a full load
+    features = Features(sorted(members), total=Asset.objects.filter(is_active=True).count())
+    index = features.index
+    tags = defaultdict(set)
+    for asset_id, tag_id in _batched(AssetTag.objects.values_list('asset_id', 'tag_id'), 'asset_id', members):
+        tags[('tag', tag_id)].add(index[asset_id])
+    features.add_family(tags, TAG_WEIGHT, _tag_frequencies([tag_id for _, tag_id in tags]))
+    sessions = defaultdict(set)
+    for asset_id, user_id, day in _batched(downloads, 'asset_id', members):
+        sessions[('session', user_id, day)].add(index[asset_id])
+    features.add_family(sessions, USAGE_WEIGHT, _session_frequencies({key[1:] for key in sessions}, now))
+    return features
+
+
+def similarities(features, row):
+    """{other row: score} for every asset sharing a feature with the row"""
+    scores = defaultdict(float)
+    for key, weight in features.rows[row].items():
+        for other, other_weight in features.postings[key]:
+            scores[other] += weight * other_weight
+    scores.pop(row, None)
+    return scores
+
+
+def _top_k_python(features, rows):
+    for row in rows:
+        yield row, heapq.nlargest(RELATED_ASSETS_K, similarities(features, row).items(), key=itemgetter(1))
+
+
+def _top_k_sparse(features, rows):
+    columns = {key: column for column, key in enumerate(features.postings)}
+    indptr, indices, data = [0], [], []
+    for vector in features.rows:
+        indices.extend(columns[key] for key in vector)
+        data.extend(vector.values())
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(features.rows), len(columns)))
+    transposed = matrix.T.tocsr()
+    rows = list(rows)
+    for start in range(0, len(rows), BLOCK_ROWS):
+        block = rows[start:start + BLOCK_ROWS]
+        product = (matrix[block] @ transposed).tocsr()
+        for offset, row in enumerate(block):
+            low, high = product.indptr[offset], product.indptr[offset + 1]
+            others, scores = product.indices[low:high], product.data[low:high]
+            keep = others != row
+            others, scores = others[keep], scores[keep]
+            if len(scores) > RELATED_ASSETS_K:
+                best = np.argpartition(-scores, RELATED_ASSETS_K)[:RELATED_ASSETS_K]
+                others, scores = others[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+            yield row, [(int(others[i]), float(scores[i])) for i in order]
+
+
+def top_k(features, rows):
+    """(row, [(other row, score)] best first) for each row"""
+    if sparse is not None:
+        return _top_k_sparse(features, rows)
+    return _top_k_python(features, rows)
+
+
+def build_related(now=None):
+    """Recompute every active asset's related assets; returns the number of assets with any"""
+    now = now or timezone.now()
+    features = load_features(now)
+    asset_ids = features.asset_ids
+    with_neighbours = 0
+    with transaction.atomic():
+        RelatedAsset.objects.all().delete()
+        batch = []
+        for row, neighbours in top_k(features, range(len(asset_ids))):
+            with_neighbours += bool(neighbours)
+            batch.extend(RelatedAsset(asset_id=asset_ids[row], related_id=asset_ids[other], score=score)
+                         for other, score in neighbours)
+            if len(batch) >= WRITE_BATCH:
+                RelatedAsset.objects.bulk_create(batch)
+                batch = []
+        RelatedAsset.objects.bulk_create(batch)
+        JobWatermark.objects.update_or_create(name=RELATED_WATERMARK, defaults={'position': now})
+    return with_neighbours
+
+
+def refresh_related(now=None):
+    """
+    Recompute the related assets of assets changed or downloaded since the
+    last run (a full build on the first run). Returns the number of assets
+    recomputed.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        watermark, _ = JobWatermark.objects.select_for_update().get_or_create(name=RELATED_WATERMARK)
+        if watermark.position is None:
+            return build_related(now)
+        if now <= watermark.position:
+            return 0
+        since = watermark.position
+
+        changed = set(Asset.objects.filter(updated_at__gt=since, updated_at__lte=now).values_list('pk', flat=True))
+        changed.update(
+            ActivityLog.objects.filter(action='download', timestamp__gt=since, timestamp__lte=now)
+            .values_list('asset_id', flat=True)
+        )
+        if changed:
+            _refresh(changed, load_neighbourhood(changed, now))
+        watermark.position = now
+        watermark.save()
+    return len(changed)
+
+
+def _refresh(changed, features):
+    asset_ids = features.asset_ids
+    rows = [features.index[asset_id] for asset_id in changed if asset_id in features.index]
+    scores = {row: similarities(features, row) for row in rows}
+
+    for ids in _chunks(changed, ID_BATCH):
+        RelatedAsset.objects.filter(Q(asset__in=ids) | Q(related__in=ids)).delete()
+    links = [
+        RelatedAsset(asset_id=asset_ids[row], related_id=asset_ids[other], score=score)
+        for row in rows
+        for other, score in heapq.nlargest(RELATED_ASSETS_K, scores[row].items(), key=itemgetter(1))
+    ]
+
+    # Offer each changed asset to the lists of everything it shares a feature with
+    offers = defaultdict(list)  # other row -> [(score, changed row)]
+    for row, candidates in scores.items():
+        for other, score in candidates.items():
+            if other not in scores:
+                offers[other].append((score, row))
+    current = defaultdict(list)  # asset id -> [(score, link pk)]
+    for ids in _chunks([asset_ids[other] for other in offers], ID_BATCH):
+        for asset_id, score, pk in RelatedAsset.objects.filter(asset__in=ids).values_list('asset_id', 'score', 'pk'):
+            current[asset_id].append((score, pk))
+    dropped = []
+    for other, offered in offers.items():
+        asset_id = asset_ids[other]
+        entries = [(score, pk, None) for score, pk in current[asset_id]]
+        entries += [(score, None, row) for score, row in offered]
+        entries.sort(key=itemgetter(0), reverse=True)
+        for score, pk, row in entries[RELATED_ASSETS_K:]:
+            if pk is not None:
+                dropped.append(pk)
+        for score, pk, row in entries[:RELATED_ASSETS_K]:
+            if row is not None:
+                links.append(RelatedAsset(asset_id=asset_id, related_id=asset_ids[row], score=score))
+
+    for pks in _chunks(dropped, ID_BATCH):
+        RelatedAsset.objects.filter(pk__in=pks).delete()
+    RelatedAsset.objects.bulk_create(links, batch_size=WRITE_BATCH)
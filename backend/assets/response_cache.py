@@ -0,0 +1,140 @@
+"""
+Cached responses for the asset list and detail endpoints.
+
+List pages are cached per visibility class - admins, viewers, and each
+editor separately - and normalized query string. Details are cached per
+asset, together with the owner and active flag, so visibility can be
+checked on a hit without loading the row.
+
+Keys embed generation counters instead of being deleted:
+
+* ``all`` - any asset change; admin lists
+* ``public`` - changes touching an active asset; viewer and editor lists
+* ``owner:<user_id>`` - changes to a user's assets or profile; that
+  editor's lists, and the ETags of payloads embedding the user
+* ``asset:<asset_id>`` - changes to one asset, its metadata or versions
+* ``collections`` - filing and moves; lists filtered by collection
+
+Bumping a counter orphans every key built from the old value; orphans
+expire after ASSET_RESPONSE_CACHE_TTL. Missing counters start from the
+clock, so an evicted counter never comes back at a value already used.
+
+Profile changes only bump the user's own counter, so cached lists and details
+carry the counters of the users they embed (embedded_users) and are rebuilt
+when those have moved (users_unchanged).
+"""
+import hashlib
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AssetVersion
+
+GENERATION_PREFIX = 'assets:gen:'
+
+# Stored with cached details; enough for can_view_asset without the row
+AssetScope = namedtuple('AssetScope', 'user_id is_active')
+
+
+def _generation_key(name):
+    return f'{GENERATION_PREFIX}{name}'
+
+
+def generations(*names):
+    keys = [_generation_key(name) for name in names]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def _bump(names):
+    for name in names:
+        key = _generation_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def bump_generations(*names):
+    """
+    Invalidate everything cached under the given counters.
+
+    Bumps immediately, so the writing request's own reads miss, and again
+    after commit, so a concurrent reader can't re-cache rows from before
+    the commit under the new generation.
+    """
+    _bump(names)
+    transaction.on_commit(lambda: _bump(names))
+
+
+def asset_generation_names(asset_id, owner_ids, was_or_is_active):
+    names = ['all', f'asset:{asset_id}', *(f'owner:{owner_id}' for owner_id in owner_ids if owner_id)]
+    if was_or_is_active:
+        names.append('public')
+    return names
+
+
+def embedded_users(assets):
+    """
+    The users asset payloads embed - owners and version authors - with their
+    counters, as a (user_ids, counters) pair
+    """
+    user_ids = {asset.user_id for asset in assets}
+    if assets:
+        user_ids.update(
+            AssetVersion.objects.filter(asset__in=assets).order_by()
+            .values_list('created_by_id', flat=True).distinct()
+        )
+    user_ids = tuple(sorted(user_id for user_id in user_ids if user_id is not None))
+    return user_ids, tuple(generations(*(f'owner:{user_id}' for user_id in user_ids)))
+
+
+def users_unchanged(embedded):
+    user_ids, counters = embedded
+    return tuple(generations(*(f'owner:{user_id}' for user_id in user_ids))) == counters
+
+
+def visibility_class(user):
+    """Cache partition and the counters it depends on, mirroring AssetViewSet.get_queryset"""
+    if user.is_admin:
+        return 'admin', ['all']
+    if user.is_editor:
+        return f'editor:{user.pk}', ['public', f'owner:{user.pk}']
+    return 'viewer', ['public']
+
+
+def _request_fingerprint(request):
+    # Host and path are part of the payload (absolute file and pagination URLs)
+    params = sorted(
+        (name, sorted(values)) for name, values in request.query_params.lists() if any(values)
+    )
+    raw = repr((request.get_host(), request.path, params))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _filters_by_collection(request):
+    # Over-matching a filter that merely mentions the word only costs an extra counter
+    params = request.query_params
+    return bool(params.get('collection')) or 'collection' in params.get('filter', '')
+
+
+def list_cache_key(request):
+    partition, names = visibility_class(request.user)
+    if _filters_by_collection(request):
+        # Filing, unfiling and moves change these lists without touching an asset
+        names = [*names, 'collections']
+    counters = '.'.join(str(value) for value in generations(*names))
+    return f'assets:list:{partition}:{counters}:{_request_fingerprint(request)}'
+
+
+def detail_cache_key(request, asset_id):
+    counters = '.'.join(str(value) for value in generations(f'asset:{asset_id}'))
+    return f'assets:detail:{asset_id}:{counters}:{_request_fingerprint(request)}'
+
@@ -0,0 +1,168 @@
+"""
+Saved searches with materialized result sets.
+
+Creating or editing a SavedSearch runs its query once and stores the
+matching asset ids in SavedSearchResult. From then on each committed asset
+change is tested against the predicate of every saved search (Predicate):
+file type, tags and dates in Python, the text query through the search
+backend restricted to that one asset. Result rows are added or removed
+for the searches the asset entered or left, and each move is logged in
+SavedSearchChange, so:
+
+* opening a saved search is a join on its result rows, and
+* "what changed since my last visit" is a read of its change log, which
+  is cleared whenever the results are opened.
+
+Predicates are held per process and reloaded when the ``saved_searches``
+generation counter moves.
+"""
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Asset, SavedSearch, SavedSearchChange, SavedSearchResult
+from .response_cache import generations
+from .search import get_search_backend, search_queryset
+from .tags import normalize_tags
+
+SAVED_SEARCHES_PER_USER = 50
+
+
+class Predicate:
+    """A saved search's criteria, tested against one asset at a time"""
+
+    def __init__(self, search_id, query, file_type, tags, date_from, date_to):
+        self.search_id = search_id
+        self.query = query
+        self.file_type = file_type
+        self.tags = set(normalize_tags(tags))
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def matches_fields(self, asset):
+        """Everything but the text query"""
+        return (
+            asset.is_active
+            and (not self.file_type or asset.file_type == self.file_type)
+            and self.tags <= set(normalize_tags(asset.tags))
+            and (self.date_from is None or asset.created_at >= self.date_from)
+            and (self.date_to is None or asset.created_at <= self.date_to)
+        )
+
+
+class PredicateIndex:
+    """Every saved search's predicate, reloaded after saved searches change"""
+
+    def __init__(self):
+        self._snapshot = (None, [])
+
+    def predicates(self):
+        generation, = generations('saved_searches')
+        if generation != self._snapshot[0]:
+            rows = SavedSearch.objects.values_list(
+                'search_id', 'query', 'file_type', 'tags', 'date_from', 'date_to'
+            )
+            self._snapshot = (generation, [Predicate(*row) for row in rows])
+        return self._snapshot[1]
+
+
+predicate_index = PredicateIndex()
+
+
+def criteria_tree(search):
+    """The saved search's criteria other than its text query, as an asset query tree (assets.query)"""
+    conditions = []
+    if search.file_type:
+        conditions.append({'file_type': search.file_type})
+    tags = normalize_tags(search.tags)
+    if tags:
+        conditions.append({'tag': {'all': tags}})
+    dates = {}
+    if search.date_from is not None:
+        dates['gte'] = search.date_from.isoformat()
+    if search.date_to is not None:
+        dates['lte'] = search.date_to.isoformat()
+    if dates:
+        conditions.append({'created_at': dates})
+    return {'and': conditions} if conditions else None
+
+
+def materialize(search):
+    """(Re)compute the search's result set from scratch; returns the number of results"""
+    asset_ids = search_queryset(search.query, criteria_tree(search)).order_by().values_list('pk', flat=True)
+    with transaction.atomic():
+        SavedSearchResult.objects.filter(search=search).delete()
+        SavedSearchChange.objects.filter(search=search).delete()
+        results = SavedSearchResult.objects.bulk_create(
+            [SavedSearchResult(search=search, asset_id=asset_id) for asset_id in asset_ids.iterator()],
+            batch_size=1000,
+        )
+        SavedSearch.objects.filter(pk=search.pk).update(last_viewed_at=timezone.now())
+    return len(results)
+
+
+def refresh_asset(asset_id):
+    """Re-test one changed (or deleted) asset against every saved search"""
+    predicates = predicate_index.predicates()
+    if not predicates:
+        return
+    asset = Asset.objects.filter(pk=asset_id).first()
+    text_matches = {}  # query -> bool; one backend lookup per distinct query
+
+    def matches(predicate):
+        if asset is None or not predicate.matches_fields(asset):
+            return False
+        if not predicate.query:
+            return True
+        if predicate.query not in text_matches:
+            text_matches[predicate.query] = get_search_backend().search(
+                Asset.objects.filter(pk=asset_id), predicate.query
+            ).exists()
+        return text_matches[predicate.query]
+
+    member_of = set(SavedSearchResult.objects.filter(asset_id=asset_id).values_list('search_id', flat=True))
+    entered, left = [], []
+    for predicate in predicates:
+        now = matches(predicate)
+        if now and predicate.search_id not in member_of:
+            entered.append(predicate.search_id)
+        elif not now and predicate.search_id in member_of:
+            left.append(predicate.search_id)
+    if not entered and not left:
+        return
+    with transaction.atomic():
+        SavedSearchResult.objects.bulk_create(
+            [SavedSearchResult(search_id=search_id, asset_id=asset_id) for search_id in entered],
+            ignore_conflicts=True,
+        )
+        SavedSearchResult.objects.filter(asset_id=asset_id, search_id__in=left).delete()
+        SavedSearchChange.objects.bulk_create(
+            [SavedSearchChange(search_id=search_id, asset_id=asset_id, entered=True) for search_id in entered]
+            + [SavedSearchChange(search_id=search_id, asset_id=asset_id, entered=False) for search_id in left]
+        )
+
+
+def mark_viewed(search):
+    """Record a visit: later changes are reported against the results as they are now"""
+    with transaction.atomic():
+        seen = SavedSearchChange.objects.filter(search=search).aggregate(last=Max('id'))['last']
+        if seen is not None:
+            SavedSearchChange.objects.filter(search=search, id__lte=seen).delete()
+        search.last_viewed_at = timezone.now()
+        # A queryset update: visits must not reload every process's predicates
+        SavedSearch.objects.filter(pk=search.pk).update(last_viewed_at=search.last_viewed_at)
+
+
+def changes_since_visit(search):
+    """
+    Asset ids that entered or left the results since the last visit. An asset
+    that entered and left again in between (or the reverse) is in neither.
+    """
+    first, last = {}, {}
+    for asset_id, entered in SavedSearchChange.objects.filter(search=search).values_list('asset_id', 'entered'):
+        first.setdefault(asset_id, entered)
+        last[asset_id] = entered
+    return {
+        'entered': [asset_id for asset_id, entered in last.items() if entered and first[asset_id]],
+        'left': [asset_id for asset_id, entered in last.items() if not entered and not first[asset_id]],
+    }
@@ -0,0 +1,50 @@
+"""
+Pluggable full-text search for assets.
+
+ASSET_SEARCH_BACKEND names the backend used by search_assets and by the
+``?search=`` filter of the asset list:
+
+* ``assets.search.database.DatabaseSearchBackend`` (default) - substring
+  and trigram matching in the database (see assets.fuzzy)
+* ``assets.search.inverted_index.InvertedIndexBackend`` - a BM25-ranked
+  inverted index held in memory and persisted under ASSET_SEARCH_INDEX_DIR,
+  for deployments without PostgreSQL
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from assets.models import Asset
+from assets.query import compile_query
+
+
+def search_queryset(query='', tree=None):
+    """
+    Active assets matching the text query and the query tree (assets.query),
+    most relevant first when there is a text query.
+    """
+    # Search only covers active assets for every role, so no per-role OR is needed
+    assets = Asset.objects.filter(is_active=True)
+    if query:
+        assets = get_search_backend().search(assets, query).order_by('-relevance', '-created_at')
+    if tree is not None:
+        assets = assets.filter(compile_query(tree))
+    return assets
+
+
+def get_search_backend():
+    return _load_backend(settings.ASSET_SEARCH_BACKEND)
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+@receiver(setting_changed)
+def reset_search_backend(setting, **kwargs):
+    if setting in ('ASSET_SEARCH_BACKEND', 'ASSET_SEARCH_INDEX_DIR', 'ASSET_SEARCH_JOURNAL_MAX_BYTES'):
+        _load_backend.cache_clear()
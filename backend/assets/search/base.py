@@ -0,0 +1,22 @@
+class SearchBackend:
+    """
+    Interface for asset search backends.
+
+    search() is required. Backends that keep their own index also implement
+    update(), remove() and rebuild(); the signals in assets.signals call the
+    first two after each commit that changes an asset or its metadata.
+    """
+
+    def search(self, queryset, query):
+        """Restrict an Asset queryset to matches for query, annotated with a float ``relevance``"""
+        raise NotImplementedError
+
+    def update(self, asset_id):
+        """Re-read one asset from the database into the index"""
+
+    def remove(self, asset_id):
+        """Drop one asset from the index"""
+
+    def rebuild(self):
+        """Re-index every asset; returns the number indexed"""
+        return 0
@@ -0,0 +1,59 @@
+from django.db import connection
+from django.db.models import BooleanField, F, Func, Q, Value
+
+from assets.fuzzy import fuzzy_search
+from assets.models import AssetText
+from assets.tags import tag_name_contains, tagged
+from .base import SearchBackend
+
+# Shorter terms have no trigram for the index to look up, so they would read every document
+CONTENT_MIN_TERM_LENGTH = 3
+
+
+class ILike(Func):
+    """
+    text ILIKE pattern: the operator the trigram index on asset_texts.content
+    (migration 0014) serves. Django's icontains compiles to UPPER(...) LIKE
+    UPPER(...) on PostgreSQL, which no index can answer.
+    """
+    arg_joiner = ' ILIKE '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+def _like_pattern(value):
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def content_contains(value):
+    """Q matching assets whose extracted text contains value; matches nothing for very short terms"""
+    if len(value) < CONTENT_MIN_TERM_LENGTH:
+        return Q(pk__in=[])
+    texts = AssetText.objects.filter(status='done')
+    if connection.vendor == 'postgresql':
+        texts = texts.filter(ILike(F('content'), Value(_like_pattern(value))))
+    else:
+        # Development databases scan the table; fine at their size
+        texts = texts.filter(content__icontains=value)
+    return Q(pk__in=texts.values('asset_id'))
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Substring matches on title, description, tags and extracted document
+    text, widened with trigram matches. A query of several words also
+    matches assets containing each word somewhere, as DRF's SearchFilter did
+    for the asset list.
+    """
+
+    def search(self, queryset, query):
+        exact = Q(title__icontains=query) | Q(description__icontains=query) | tagged(query) | content_contains(query)
+        terms = query.split()
+        if len(terms) > 1:
+            every_term = Q()
+            for term in terms:
+                every_term &= (Q(title__icontains=term) | Q(description__icontains=term)
+                               | tag_name_contains(term) | content_contains(term))
+            exact |= every_term
+        return fuzzy_search(queryset, query, exact)
@@ -0,0 +1,444 @@
+"""
+In-process inverted index with BM25 ranking.
+
+Documents are assets: title, tags, description, metadata values and the
+text extracted from their files (assets.extraction), tokenized like pg_trgm does (lowercased runs of letters and digits).
+Fields are weighted (FIELD_WEIGHTS) before BM25 scoring, so a word in the
+title counts three times as much as one in the description. A query
+matches assets that contain every one of its words.
+
+Postings are two parallel arrays per term - document numbers (uint32) and
+weighted term frequencies (float32) - appended to as documents arrive.
+Replacing or removing a document only forgets its number; the stale
+entries are skipped and dropped at the next checkpoint.
+
+On disk, under ASSET_SEARCH_INDEX_DIR:
+
+* ``assets.idx`` - binary snapshot of the compacted index
+* ``assets.journal`` - JSON lines appended for each change since then,
+  headed by the epoch of the snapshot they apply to
+
+Every process keeps its own copy in memory and replays journal lines it
+hasn't seen before each search, so changes made by other workers show up
+without a restart. Writers serialize on ``assets.lock`` (flock, where
+available); when the journal outgrows ASSET_SEARCH_JOURNAL_MAX_BYTES the
+writer folds it into a new snapshot.
+"""
+import heapq
+import itertools
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import uuid
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Expression, F, FloatField, UUIDField
+
+from assets.fuzzy import words as tokenize
+from assets.models import Asset, AssetText, Metadata
+from .base import SearchBackend
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+# Extracted document text is long and unedited, so its words count for less
+FIELD_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'description': 1.0, 'metadata': 1.0, 'content': 0.5}
+K1 = 1.2
+B = 0.75
+MAX_RESULTS = 1000
+DOCUMENT_BATCH = 500
+CANDIDATE_BATCH = 500  # Ranked matches checked against the caller's queryset per query
+
+
+def _key_text(key, connection):
+    # How the database spells a UUID primary key as text
+    return key.hex if connection.vendor == 'sqlite' else str(key)
+
+
+class MatchedIds(Expression):
+    """
+    The matched asset ids as one JSON parameter unpacked by the database, for
+    ``pk__in``: a thousand matches would otherwise be a thousand bound
+    parameters, past SQLite's 999.
+    """
+    output_field = UUIDField()
+
+    def __init__(self, keys):
+        super().__init__()
+        self.keys = keys
+
+    def as_sql(self, compiler, connection):
+        ids = json.dumps([_key_text(key, connection) for key in self.keys])
+        return '(SELECT value::uuid FROM jsonb_array_elements_text(%s::jsonb))', [ids]
+
+    def as_sqlite(self, compiler, connection):
+        ids = json.dumps([_key_text(key, connection) for key in self.keys])
+        return '(SELECT value FROM json_each(%s))', [ids]
+
+
+class MatchScore(Expression):
+    """Each row's score, looked up by primary key in one JSON parameter; 0 for rows without one"""
+    output_field = FloatField()
+
+    def __init__(self, scores):
+        super().__init__()
+        self.scores = scores
+        self.key = F('pk')
+
+    def get_source_expressions(self):
+        return [self.key]
+
+    def set_source_expressions(self, expressions):
+        self.key, = expressions
+
+    def _scores(self, connection):
+        return json.dumps({_key_text(key, connection): score for key, score in self.scores.items()})
+
+    def as_sql(self, compiler, connection):
+        key, params = compiler.compile(self.key)
+        return (f'COALESCE((%s::jsonb ->> {key}::text)::double precision, 0.0)',
+                [self._scores(connection), *params])
+
+    def as_sqlite(self, compiler, connection):
+        key, params = compiler.compile(self.key)
+        return (f"""COALESCE(json_extract(%s, '$."' || {key} || '"'), 0.0)""",
+                [self._scores(connection), *params])
+
+SNAPSHOT_MAGIC = b'SLDAMIDX'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<8sI16sII?')  # magic, version, epoch, documents, terms, little-endian
+_TERM = struct.Struct('<II')  # term byte length, postings length
+
+
+def weigh(fields):
+    """(weighted term frequencies, weighted length) for a document's fields"""
+    frequencies = defaultdict(float)
+    length = 0.0
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for term in tokenize(text or ''):
+            frequencies[term] += weight
+            length += weight
+    return frequencies, length
+
+
+class InvertedIndex:
+    def __init__(self):
+        self.doc_keys = []  # document number -> asset UUID, or None once replaced/removed
+        self.doc_numbers = {}  # asset UUID -> current document number
+        self.doc_lengths = array('f')
+        self.postings = {}  # term -> (array('I') document numbers, array('f') weights)
+        self.total_length = 0.0
+
+    def __len__(self):
+        return len(self.doc_numbers)
+
+    def add(self, key, fields):
+        self.remove(key)
+        frequencies, length = weigh(fields)
+        number = len(self.doc_keys)
+        self.doc_keys.append(key)
+        self.doc_numbers[key] = number
+        self.doc_lengths.append(length)
+        self.total_length += length
+        for term, frequency in frequencies.items():
+            numbers, weights = self.postings.setdefault(term, (array('I'), array('f')))
+            numbers.append(number)
+            weights.append(frequency)
+
+    def remove(self, key):
+        number = self.doc_numbers.pop(key, None)
+        if number is not None:
+            self.doc_keys[number] = None
+            self.total_length -= self.doc_lengths[number]
+
+    def _live_postings(self, term):
+        numbers, weights = self.postings.get(term, ((), ()))
+        return {number: weight for number, weight in zip(numbers, weights) if self.doc_keys[number] is not None}
+
+    def search(self, query, limit=None):
+        """(asset UUID, BM25 score) pairs containing every query word, best first; ``limit`` keeps the top ones"""
+        terms = set(tokenize(query))
+        if not terms or not self.doc_numbers:
+            return []
+        postings = sorted((self._live_postings(term) for term in terms), key=len)
+        matches = set(postings[0])
+        for term_postings in postings[1:]:
+            matches.intersection_update(term_postings)
+        if not matches:
+            return []
+
+        total = len(self.doc_numbers)
+        average_length = self.total_length / total or 1.0
+        scores = dict.fromkeys(matches, 0.0)
+        for term_postings in postings:
+            frequency = len(term_postings)
+            idf = math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for number in matches:
+                weight = term_postings[number]
+                length = self.doc_lengths[number] / average_length
+                scores[number] += idf * weight * (K1 + 1) / (weight + K1 * (1 - B + B * length))
+        if limit is None:
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        else:
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.doc_keys[number], score) for number, score in best]
+
+    def compact(self):
+        """Renumber live documents and drop stale postings"""
+        renumbered = {}
+        for number, key in enumerate(self.doc_keys):
+            if key is not None:
+                renumbered[number] = len(renumbered)
+        self.doc_keys = [key for key in self.doc_keys if key is not None]
+        self.doc_numbers = {key: number for number, key in enumerate(self.doc_keys)}
+        self.doc_lengths = array('f', (length for number, length in enumerate(self.doc_lengths)
+                                       if number in renumbered))
+        postings = {}
+        for term, (numbers, weights) in self.postings.items():
+            kept_numbers, kept_weights = array('I'), array('f')
+            for number, weight in zip(numbers, weights):
+                if number in renumbered:
+                    kept_numbers.append(renumbered[number])
+                    kept_weights.append(weight)
+            if kept_numbers:
+                postings[term] = (kept_numbers, kept_weights)
+        self.postings = postings
+        self.total_length = float(sum(self.doc_lengths))
+
+    def write(self, stream, epoch):
+        self.compact()
+        little = sys.byteorder == 'little'
+        stream.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, epoch.bytes, len(self.doc_keys),
+                                  len(self.postings), little))
+        stream.write(b''.join(key.bytes for key in self.doc_keys))
+        stream.write(self.doc_lengths.tobytes())
+        for term, (numbers, weights) in self.postings.items():
+            encoded = term.encode()
+            stream.write(_TERM.pack(len(encoded), len(numbers)))
+            stream.write(encoded)
+            stream.write(numbers.tobytes())
+            stream.write(weights.tobytes())
+
+    @classmethod
+    def read(cls, stream):
+        """(index, epoch) from a snapshot written by write()"""
+        magic, version, epoch, documents, terms, little = _HEADER.unpack(stream.read(_HEADER.size))
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("Not an asset search index snapshot; run rebuild_search_index")
+        swap = little != (sys.byteorder == 'little')
+
+        def read_array(typecode, count):
+            values = array(typecode)
+            values.frombytes(stream.read(values.itemsize * count))
+            if swap:
+                values.byteswap()
+            return values
+
+        index = cls()
+        index.doc_keys = [uuid.UUID(bytes=stream.read(16)) for _ in range(documents)]
+        index.doc_numbers = {key: number for number, key in enumerate(index.doc_keys)}
+        index.doc_lengths = read_array('f', documents)
+        for _ in range(terms):
+            size, count = _TERM.unpack(stream.read(_TERM.size))
+            term = stream.read(size).decode()
+            index.postings[term] = (read_array('I', count), read_array('f', count))
+        index.total_length = float(sum(index.doc_lengths))
+        return index, uuid.UUID(bytes=epoch)
+
+
+def asset_documents(asset_ids=None):
+    """(asset UUID, fields) for the given assets, or all of them, straight from the database"""
+    assets = Asset.objects.order_by().values_list('asset_id', 'title', 'description', 'tags')
+    if asset_ids is not None:
+        assets = assets.filter(asset_id__in=asset_ids)
+    rows = assets.iterator(chunk_size=DOCUMENT_BATCH)
+    # Metadata and extracted text are read per batch, so a rebuild never holds all of it
+    while batch := list(itertools.islice(rows, DOCUMENT_BATCH)):
+        ids = [row[0] for row in batch]
+        values = defaultdict(list)
+        for asset_id, value in Metadata.objects.filter(asset_id__in=ids).values_list('asset_id', 'field_value'):
+            values[asset_id].append(value)
+        contents = dict(
+            AssetText.objects.filter(asset_id__in=ids, status='done').values_list('asset_id', 'content')
+        )
+        for asset_id, title, description, tags in batch:
+            yield asset_id, {
+                'title': title,
+                'tags': ' '.join(str(tag) for tag in tags) if isinstance(tags, list) else '',
+                'description': description,
+                'metadata': ' '.join(values.get(asset_id, ())),
+                'content': contents.get(asset_id, ''),
+            }
+
+
+class InvertedIndexBackend(SearchBackend):
+    def __init__(self, directory=None):
+        self.directory = Path(directory or settings.ASSET_SEARCH_INDEX_DIR)
+        self.snapshot_path = self.directory / 'assets.idx'
+        self.journal_path = self.directory / 'assets.journal'
+        self.lock_path = self.directory / 'assets.lock'
+        self._mutex = threading.RLock()
+        self._index = None
+        self._epoch = None  # of the loaded snapshot
+        self._journal_offset = None  # bytes of the journal already replayed
+        self._lock_depth = 0
+
+    # Files
+
+    @contextmanager
+    def _write_lock(self):
+        """Exclusive across processes; re-entrant within this backend"""
+        with self._mutex:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    if fcntl is not None:
+                        fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self, index):
+        """Write index as the new snapshot with an empty journal; call with the write lock held"""
+        epoch = uuid.uuid4()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.snapshot_path.with_suffix('.idx.tmp')
+        with open(temporary, 'wb') as stream:
+            index.write(stream, epoch)
+        os.replace(temporary, self.snapshot_path)
+        temporary = self.journal_path.with_suffix('.journal.tmp')
+        temporary.write_text(json.dumps({'epoch': epoch.hex}) + '\n')
+        os.replace(temporary, self.journal_path)
+
+    def _sync(self):
+        """
+        Bring the in-memory index up to date: reload the snapshot when the
+        journal header names a different epoch, then replay unseen lines.
+        """
+        with self._mutex:
+            if not self.snapshot_path.exists():
+                with self._write_lock():
+                    if not self.snapshot_path.exists():
+                        self._save(self._build())
+            try:
+                journal = open(self.journal_path, 'rb')
+            except FileNotFoundError:
+                if self._index is None:
+                    self._load()
+                return self._index
+            with journal:
+                header = journal.readline()
+                epoch = json.loads(header)['epoch'] if header.endswith(b'\n') else None
+                if self._index is None or epoch != self._epoch.hex:
+                    self._load()
+                    if epoch != self._epoch.hex:
+                        return self._index  # A checkpoint is between replacing the snapshot and the journal
+                if self._journal_offset is None:
+                    self._journal_offset = len(header)
+                journal.seek(self._journal_offset)
+                for line in journal:
+                    if not line.endswith(b'\n'):
+                        break  # Still being written
+                    self._apply(json.loads(line))
+                    self._journal_offset += len(line)
+            return self._index
+
+    def _load(self):
+        with open(self.snapshot_path, 'rb') as stream:
+            self._index, self._epoch = InvertedIndex.read(stream)
+        self._journal_offset = None
+
+    def _apply(self, entry):
+        key = uuid.UUID(entry['id'])
+        if entry['op'] == 'add':
+            self._index.add(key, entry['fields'])
+        else:
+            self._index.remove(key)
+
+    def _append(self, entries):
+        with self._write_lock():
+            index = self._sync()
+            with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                for entry in entries:
+                    journal.write(json.dumps(entry) + '\n')
+            self._sync()
+            if self.journal_path.stat().st_size > settings.ASSET_SEARCH_JOURNAL_MAX_BYTES:
+                self._save(index)
+
+    @staticmethod
+    def _build():
+        index = InvertedIndex()
+        for key, fields in asset_documents():
+            index.add(key, fields)
+        return index
+
+    # SearchBackend
+
+    def search(self, queryset, query):
+        """
+        The best MAX_RESULTS matches among the assets in ``queryset``. The
+        index also holds assets the caller can't see or filtered out, so the
+        cut is made only after checking matches against the queryset - a
+        narrow queryset (one asset, one owner's drafts) is never crowded out
+        by better matches elsewhere.
+        """
+        with self._mutex:
+            ranked = self._sync().search(query)
+        if len(ranked) > MAX_RESULTS:
+            ranked = self._admitted(queryset, ranked)
+        scores = dict(ranked)
+        return queryset.filter(pk__in=MatchedIds(list(scores))).annotate(relevance=MatchScore(scores))
+
+    @staticmethod
+    def _admitted(queryset, ranked):
+        """The first MAX_RESULTS of the ranked matches that ``queryset`` contains"""
+        # A small queryset is read whole: one query, however many matches rank above it
+        candidates = list(queryset.order_by().values_list('pk', flat=True)[:CANDIDATE_BATCH + 1])
+        if len(candidates) <= CANDIDATE_BATCH:
+            candidates = set(candidates)
+            return [match for match in ranked if match[0] in candidates][:MAX_RESULTS]
+        admitted = []
+        for start in range(0, len(ranked), CANDIDATE_BATCH):
+            batch = ranked[start:start + CANDIDATE_BATCH]
+            allowed = set(queryset.filter(pk__in=[key for key, _ in batch]).order_by().values_list('pk', flat=True))
+            admitted.extend(match for match in batch if match[0] in allowed)
+            if len(admitted) >= MAX_RESULTS:
+                break
+        return admitted[:MAX_RESULTS]
+
+    def update(self, asset_id):
+        documents = list(asset_documents([asset_id]))
+        if not documents:
+            return self.remove(asset_id)
+        self._append([{'op': 'add', 'id': key.hex, 'fields': fields} for key, fields in documents])
+
+    def remove(self, asset_id):
+        self._append([{'op': 'remove', 'id': uuid.UUID(str(asset_id)).hex}])
+
+    def rebuild(self):
+        # Built under the lock so no change can land in a journal the new snapshot discards
+        with self._write_lock():
+            index = self._build()
+            self._save(index)
+            self._sync()
+        return len(index)
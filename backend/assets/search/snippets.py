@@ -0,0 +1,92 @@
+"""
+Highlighted snippets for search results.
+
+A snippet is a short window of the asset's extracted document text around
+the first word of the query it contains, or of its description when the
+text doesn't have one. The database cuts the window out (StrIndex and
+Substr), so only a few hundred characters of each document leave it.
+Matches are wrapped in <mark>; everything else is HTML-escaped.
+"""
+import html
+import re
+
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Lower, StrIndex, Substr
+
+from assets.fuzzy import MAX_QUERY_WORDS, words
+from assets.models import AssetText
+
+SNIPPET_CHARS = 200
+SNIPPET_CONTEXT = 60  # Characters shown before the first match
+SNIPPET_RESULTS = 100  # Only the first results get one
+
+
+def highlight(text, terms):
+    """HTML-escaped text with every case-insensitive occurrence of the terms in <mark>"""
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.I)
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        parts.append(f'<mark>{html.escape(match.group())}</mark>')
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    return ''.join(parts)
+
+
+def _trim(window, cut_before, cut_after):
+    """Drop words the window cut through, marking each cut with an ellipsis"""
+    window = ' '.join(window.split())
+    if cut_before:
+        window = '…' + window.split(' ', 1)[-1]
+    if cut_after:
+        window = window.rsplit(' ', 1)[0] + '…'
+    return window
+
+
+def _text_windows(asset_ids, terms):
+    """{asset_id string: window} of extracted text around the earliest term each document contains"""
+    annotations = {}
+    for number, term in enumerate(terms):
+        annotations[f'position_{number}'] = StrIndex(Lower('content'), Value(term))
+    windows = {
+        f'window_{number}': Substr('content', Greatest(F(f'position_{number}') - SNIPPET_CONTEXT, 1), SNIPPET_CHARS)
+        for number in range(len(terms))
+    }
+    rows = (
+        AssetText.objects.filter(asset_id__in=asset_ids, status='done')
+        .annotate(**annotations).annotate(**windows)
+        .values('asset_id', *annotations, *windows)
+    )
+    result = {}
+    for row in rows:
+        found = [(row[f'position_{number}'], number) for number in range(len(terms)) if row[f'position_{number}']]
+        if found:
+            position, number = min(found)
+            window = row[f'window_{number}']
+            result[str(row['asset_id'])] = _trim(window, position > SNIPPET_CONTEXT + 1, len(window) == SNIPPET_CHARS)
+    return result
+
+
+def _description_window(description, terms):
+    lowered = (description or '').lower()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    if not positions:
+        return None
+    start = max(min(positions) - SNIPPET_CONTEXT, 0)
+    return _trim(description[start:start + SNIPPET_CHARS], start > 0, start + SNIPPET_CHARS < len(description))
+
+
+def add_snippets(results, query):
+    """Set 'snippet' on serialized search results: highlighted HTML, or None"""
+    terms = words(query)[:MAX_QUERY_WORDS]
+    first = results[:SNIPPET_RESULTS]
+    windows = _text_windows([row['asset_id'] for row in first], terms) if terms else {}
+    for row in results:
+        row['snippet'] = None
+    for row in first:
+        window = windows.get(row['asset_id'])
+        if window is None and terms:
+            window = _description_window(row.get('description'), terms)
+        if window is not None:
+            row['snippet'] = highlight(window, terms)
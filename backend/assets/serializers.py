@@ -1,6 +1,12 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Asset, Metadata, AssetVersion
+from .collections import create_collection, move_collection
+from .models import Asset, Collection, Metadata, AssetVersion, SavedSearch
+from .query import QUERY_MAX_LIST_VALUES
+from .saved_searches import SAVED_SEARCHES_PER_USER
+from .tags import normalize_tags
 from users.serializers import UserSerializer
+from users.storage import quota_error
 
 
 class MetadataSerializer(serializers.ModelSerializer):
@@ -44,11 +50,28 @@ class AssetSerializer(serializers.ModelSerializer):
         return obj.file_extension
 
 
+class CompoundAssetVersionSerializer(AssetVersionSerializer):
+    """Version with its author by id, for compound documents (see assets.compound)"""
+    created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class CompoundAssetSerializer(AssetSerializer):
+    """Asset with its owner and versions by id, for compound documents (see assets.compound)"""
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+    versions = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+
 class AssetCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Asset
         fields = ('file', 'title', 'description', 'tags', 'file_type')
 
+    def validate_file(self, value):
+        error = quota_error(self.context['request'].user, value.size)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
@@ -59,18 +82,107 @@ class AssetUpdateSerializer(serializers.ModelSerializer):
         model = Asset
         fields = ('title', 'description', 'tags')
 
+    def validate(self, attrs):
+        upload = self.context['request'].FILES.get('file')
+        if upload is not None:
+            # The old file is kept as a version, so the owner's usage grows by the full upload
+            error = quota_error(self.instance.user, upload.size)
+            if error:
+                raise serializers.ValidationError({'file': [error]})
+        return attrs
+
     def update(self, instance, validated_data):
-        # Create a new version if file is being updated
-        if 'file' in self.context['request'].FILES:
-            old_file = instance.file
-            # Create version record
+        if 'file' not in self.context['request'].FILES:
+            return super().update(instance, validated_data)
+
+        # Create a new version if file is being updated. The asset row is written
+        # first so a guarded save (see AssetViewSet.perform_update) fails before
+        # a racing upload can claim the same version number.
+        old_file, old_version = instance.file, instance.version
+        with transaction.atomic():
+            instance.version += 1
+            instance = super().update(instance, validated_data)
             AssetVersion.objects.create(
                 asset=instance,
-                version_number=instance.version,
+                version_number=old_version,
                 file=old_file,
                 file_size=old_file.size,
                 changes="File updated",
                 created_by=self.context['request'].user
             )
-            instance.version += 1
-        return super().update(instance, validated_data)
\ No newline at end of file
+        # The version row moved updated_at (see assets.signals)
+        instance.refresh_from_db(fields=['updated_at', 'change_seq'])
+        return instance
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    result_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = SavedSearch
+        fields = ('search_id', 'name', 'query', 'file_type', 'tags', 'date_from', 'date_to', 'result_count',
+                  'last_viewed_at', 'created_at', 'updated_at')
+        read_only_fields = ('search_id', 'last_viewed_at', 'created_at', 'updated_at')
+
+    def validate_tags(self, value):
+        if not isinstance(value, list) or not all(isinstance(tag, str) for tag in value):
+            raise serializers.ValidationError("Expected a list of tag names.")
+        if len(value) > QUERY_MAX_LIST_VALUES:
+            raise serializers.ValidationError(f"At most {QUERY_MAX_LIST_VALUES} tags.")
+        return normalize_tags(value)
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        merged = {field: attrs.get(field, getattr(self.instance, field, None))
+                  for field in ('name', 'query', 'file_type', 'tags', 'date_from', 'date_to')}
+        if not any(merged[field] for field in ('query', 'file_type', 'tags', 'date_from', 'date_to')):
+            raise serializers.ValidationError("A saved search needs a query or at least one filter.")
+        others = SavedSearch.objects.filter(user=user).exclude(pk=getattr(self.instance, 'pk', None))
+        if others.filter(name=merged['name']).exists():
+            raise serializers.ValidationError({'name': ["You already have a saved search with this name."]})
+        if self.instance is None and others.count() >= SAVED_SEARCHES_PER_USER:
+            raise serializers.ValidationError(f"You can keep at most {SAVED_SEARCHES_PER_USER} saved searches.")
+        return attrs
+
+
+class CollectionSerializer(serializers.ModelSerializer):
+    """Writes go through assets.collections, which assigns paths; changing ``parent`` moves the subtree"""
+    parent = serializers.PrimaryKeyRelatedField(queryset=Collection.objects.all(), allow_null=True, required=False)
+
+    class Meta:
+        model = Collection
+        fields = ('collection_id', 'name', 'parent', 'user', 'path', 'depth', 'asset_count',
+                  'subtree_asset_count', 'created_at', 'updated_at')
+        read_only_fields = ('collection_id', 'user', 'path', 'depth', 'asset_count', 'subtree_asset_count',
+                            'created_at', 'updated_at')
+
+    def validate_name(self, value):
+        value = value.strip()
+        if not value:
+            raise serializers.ValidationError("A collection needs a name.")
+        return value
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        parent = attrs['parent'] if 'parent' in attrs else getattr(self.instance, 'parent', None)
+        if attrs.get('parent') is not None and attrs['parent'].user_id != user.pk and not user.is_admin:
+            raise serializers.ValidationError({'parent': ["You can only nest collections in your own."]})
+        name = attrs.get('name', getattr(self.instance, 'name', None))
+        # Top-level names are per owner; names below a collection are per parent
+        siblings = Collection.objects.filter(parent=parent)
+        if parent is None:
+            siblings = siblings.filter(user=self.instance.user if self.instance else user)
+        if siblings.filter(name=name).exclude(pk=getattr(self.instance, 'pk', None)).exists():
+            raise serializers.ValidationError({'name': ["A collection with this name is already there."]})
+        return attrs
+
+    def create(self, validated_data):
+        return create_collection(self.context['request'].user, validated_data['name'], validated_data.get('parent'))
+
+    def update(self, instance, validated_data):
+        if 'parent' in validated_data and validated_data['parent'] != instance.parent:
+            instance = move_collection(instance, validated_data['parent'])
+        if 'name' in validated_data:
+            instance.name = validated_data['name']
+            instance.save(update_fields=['name', 'updated_at'])
+        return instance
@@ -0,0 +1,177 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import User
+from users.storage import adjust_usage
+from .models import Asset, AssetText, AssetTombstone, AssetVersion, Metadata, SavedSearch, Tag, next_change_seq
+from .collections import asset_collection_paths, recount_collections
+from .response_cache import asset_generation_names, bump_generations
+from .saved_searches import refresh_asset
+from .search import get_search_backend
+from .tags import normalize_tags, recount_tags, sync_asset_tags
+
+
+@receiver(post_delete, sender=Asset)
+def release_asset_storage(sender, instance, **kwargs):
+    adjust_usage(instance.user_id, -instance.file_size)
+
+
+@receiver(post_save, sender=AssetVersion)
+def charge_version_storage(sender, instance, created, **kwargs):
+    if created:
+        adjust_usage(instance.asset.user_id, instance.file_size)
+
+
+@receiver(post_delete, sender=AssetVersion)
+def release_version_storage(sender, instance, **kwargs):
+    # Cascades delete versions before their asset, so the owner can still be looked up
+    owner_id = Asset.objects.filter(pk=instance.asset_id).values_list('user_id', flat=True).first()
+    if owner_id is not None:
+        adjust_usage(owner_id, -instance.file_size)
+
+
+@receiver(post_delete, sender=Asset)
+def record_tombstone(sender, instance, **kwargs):
+    with transaction.atomic():
+        AssetTombstone.objects.update_or_create(
+            asset_id=instance.asset_id,
+            defaults={'user_id': instance.user_id, 'change_seq': next_change_seq()},
+        )
+
+
+@receiver(post_save, sender=Asset)
+def sync_tags(sender, instance, created, **kwargs):
+    # Active flag changes move the asset in or out of every tag's usage count
+    before = getattr(instance, 'persisted', {})
+    if created or before.get('tags') != instance.tags or before.get('is_active') != instance.is_active:
+        sync_asset_tags(instance)
+
+
+@receiver(post_delete, sender=Asset)
+def release_tags(sender, instance, **kwargs):
+    # The links went with the cascade; recount the tags the asset carried
+    names = normalize_tags(instance.tags)
+    if names:
+        recount_tags(Tag.objects.filter(name__in=names).values('pk'))
+
+
+@receiver(post_save, sender=Asset)
+def sync_collection_counts(sender, instance, created, **kwargs):
+    # Only active assets count, so a flag change moves every collection holding the asset
+    before = getattr(instance, 'persisted', {})
+    if not created and before.get('is_active') != instance.is_active:
+        recount_collections(asset_collection_paths(instance.asset_id))
+
+
+@receiver(pre_delete, sender=Asset)
+def remember_collections(sender, instance, **kwargs):
+    # The memberships go with the cascade before post_delete runs
+    instance.collection_paths = asset_collection_paths(instance.asset_id)
+
+
+@receiver(post_delete, sender=Asset)
+def release_collections(sender, instance, **kwargs):
+    recount_collections(getattr(instance, 'collection_paths', ()))
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_save, sender=Metadata)
+@receiver(post_delete, sender=Metadata)
+@receiver(post_save, sender=AssetText)
+@receiver(post_delete, sender=AssetText)
+def update_search_index(sender, instance, **kwargs):
+    # After commit, so indexes never hold a rolled back change; the backend
+    # re-reads the asset, which also covers metadata and cascaded deletes
+    asset_id = instance.asset_id
+    transaction.on_commit(lambda: get_search_backend().update(asset_id))
+
+
+@receiver(post_delete, sender=Asset)
+def remove_from_search_index(sender, instance, **kwargs):
+    asset_id = instance.asset_id
+    transaction.on_commit(lambda: get_search_backend().remove(asset_id))
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+@receiver(post_save, sender=Metadata)
+@receiver(post_delete, sender=Metadata)
+@receiver(post_save, sender=AssetText)
+@receiver(post_delete, sender=AssetText)
+def update_saved_searches(sender, instance, **kwargs):
+    # Connected after the search index receivers, so its callback runs once
+    # the index has taken the change
+    asset_id = instance.asset_id
+    transaction.on_commit(lambda: refresh_asset(asset_id))
+
+
+@receiver(post_save, sender=SavedSearch)
+@receiver(post_delete, sender=SavedSearch)
+def reload_saved_search_predicates(sender, **kwargs):
+    bump_generations('saved_searches')
+
+
+@receiver(post_save, sender=Metadata)
+@receiver(post_delete, sender=Metadata)
+@receiver(post_save, sender=AssetVersion)
+@receiver(post_delete, sender=AssetVersion)
+def touch_parent_asset(sender, instance, **kwargs):
+    # Metadata and versions are part of the asset payload sync clients hold,
+    # so move the parent asset to the head of the change feed
+    with transaction.atomic():
+        Asset.objects.filter(pk=instance.asset_id).update(
+            change_seq=next_change_seq(),
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+def invalidate_asset_responses(sender, instance, **kwargs):
+    # persisted still holds the pre-save owner and flag, so transfers and
+    # deactivations invalidate the lists the asset is leaving as well
+    before = getattr(instance, 'persisted', {})
+    bump_generations(*asset_generation_names(
+        instance.asset_id,
+        {instance.user_id, before.get('user_id')},
+        instance.is_active or bool(before.get('is_active')),
+    ))
+
+
+@receiver(post_save, sender=Metadata)
+@receiver(post_delete, sender=Metadata)
+@receiver(post_save, sender=AssetVersion)
+@receiver(post_delete, sender=AssetVersion)
+def invalidate_parent_responses(sender, instance, **kwargs):
+    scope = Asset.objects.filter(pk=instance.asset_id).values_list('user_id', 'is_active').first()
+    if scope is not None:
+        owner_id, is_active = scope
+        bump_generations(*asset_generation_names(instance.asset_id, {owner_id}, is_active))
+
+
+# The User columns asset payloads embed (users.serializers.UserSerializer);
+# last_login is left out so logins don't invalidate anything
+EMBEDDED_USER_FIELDS = ('username', 'email', 'role', 'first_name', 'last_name', 'profile_info', 'avatar')
+
+
+@receiver(pre_save, sender=User)
+def remember_embedded_user_fields(sender, instance, update_fields=None, **kwargs):
+    instance.embedded_before = None
+    if instance.pk is None or (update_fields is not None and not set(update_fields) & set(EMBEDDED_USER_FIELDS)):
+        return
+    instance.embedded_before = User.objects.filter(pk=instance.pk).values(*EMBEDDED_USER_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_responses(sender, instance, created, **kwargs):
+    # Password changes, deactivations and the like don't show in asset payloads
+    before = getattr(instance, 'embedded_before', None)
+    if created or before is None:
+        return
+    # Compared as stored, so an unset avatar matches its empty column
+    after = {name: User._meta.get_field(name).get_prep_value(getattr(instance, name)) for name in EMBEDDED_USER_FIELDS}
+    if after != before:
+        # Cached payloads embedding the user check its counter on every hit
+        bump_generations(f'owner:{instance.pk}')
@@ -0,0 +1,125 @@
+"""
+Normalized tags behind Asset.tags.
+
+The JSON list on the asset stays what the API reads and writes; Tag and
+AssetTag mirror it so assets can be found by tag through an index and
+existing tags listed without reading every asset. Signals keep the mirror
+in step on save and delete; rebuild_tags() repairs it after bulk changes
+that bypass them (queryset.update, raw SQL imports).
+
+Autocomplete is served from a per-process sorted index that reloads when
+the ``tags`` generation counter moves.
+"""
+import bisect
+import heapq
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Asset, AssetTag, Tag
+from .response_cache import bump_generations, generations
+
+TAG_NAME_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def normalize_tags(tags):
+    """Distinct, stripped, non-empty tag names from an Asset.tags value, in order"""
+    if not isinstance(tags, list):
+        return []
+    names = []
+    for tag in tags:
+        name = str(tag).strip()[:TAG_NAME_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def tagged(name):
+    """Q matching assets that carry the tag; combines with OR without duplicating rows"""
+    return Q(pk__in=AssetTag.objects.filter(tag__name=name).values('asset_id'))
+
+
+def tag_name_contains(value):
+    """Q matching assets with a tag containing value; reads the small tags table, not the JSON"""
+    return Q(pk__in=AssetTag.objects.filter(tag__name__icontains=value).values('asset_id'))
+
+
+def recount_tags(tag_ids):
+    """Recompute usage_count for the given tags from the active assets carrying them"""
+    active_links = (
+        AssetTag.objects.filter(tag=OuterRef('pk'), asset__is_active=True)
+        .order_by().values('tag').annotate(total=Count('pk')).values('total')
+    )
+    Tag.objects.filter(pk__in=tag_ids).update(
+        usage_count=Coalesce(Subquery(active_links, output_field=IntegerField()), Value(0))
+    )
+    bump_generations('tags')
+
+
+def sync_asset_tags(asset, recount=True):
+    """
+    Bring the asset's AssetTag rows in line with asset.tags and recount the
+    tags involved. Returns the ids of those tags.
+    """
+    names = set(normalize_tags(asset.tags))
+    linked = dict(AssetTag.objects.filter(asset=asset).values_list('tag__name', 'tag_id'))
+    added = names - linked.keys()
+    removed = [tag_id for name, tag_id in linked.items() if name not in names]
+
+    tag_ids = set(linked.values())
+    if added:
+        Tag.objects.bulk_create([Tag(name=name) for name in added], ignore_conflicts=True)
+        added_ids = dict(Tag.objects.filter(name__in=added).values_list('name', 'pk'))
+        AssetTag.objects.bulk_create(
+            [AssetTag(asset=asset, tag_id=added_ids[name]) for name in added], ignore_conflicts=True
+        )
+        tag_ids.update(added_ids.values())
+    if removed:
+        AssetTag.objects.filter(asset=asset, tag_id__in=removed).delete()
+    if recount and tag_ids:
+        recount_tags(tag_ids)
+    return tag_ids
+
+
+def rebuild_tags():
+    """Re-sync every asset's links and every count; returns the number of assets processed"""
+    processed = 0
+    for asset in Asset.objects.only('asset_id', 'tags').iterator(chunk_size=500):
+        sync_asset_tags(asset, recount=False)
+        processed += 1
+    recount_tags(Tag.objects.values('pk'))
+    return processed
+
+
+class TagIndex:
+    """
+    Tags in use, sorted by lowercased name, for prefix lookups with bisect.
+
+    Each lookup costs one cache read to compare generations; the table is
+    only read again after a tag change.
+    """
+
+    def __init__(self):
+        # (generation, lowercased names, (name, usage_count) rows), swapped as one
+        self._snapshot = (None, [], [])
+
+    def _current(self):
+        generation, = generations('tags')
+        if generation != self._snapshot[0]:
+            rows = sorted(
+                Tag.objects.filter(usage_count__gt=0).values_list('name', 'usage_count'),
+                key=lambda row: (row[0].lower(), row[0]),
+            )
+            self._snapshot = (generation, [name.lower() for name, _ in rows], rows)
+        return self._snapshot
+
+    def suggest(self, prefix, limit):
+        """Up to ``limit`` (name, usage_count) pairs starting with prefix, most used first"""
+        _, keys, rows = self._current()
+        prefix = prefix.strip().lower()
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + '\U0010ffff', start)
+        return heapq.nsmallest(limit, rows[start:end], key=lambda row: (-row[1], row[0].lower()))
+
+
+tag_index = TagIndex()
@@ -0,0 +1,223 @@
+"""
+Tests for nested collections
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import ValidationError
+from assets.collections import (add_assets, ancestor_paths, create_collection, move_collection, remove_assets,
+                                subtree_range)
+from assets.models import Asset, Collection, CollectionAsset
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user(db):
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def other_editor(db):
+    """Create a second editor"""
+    return User.objects.create_user(username='other', password='otherpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user(db):
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+def make_asset(user, title):
+    file = SimpleUploadedFile(f"{title}.jpg", b"file_content", content_type="image/jpeg")
+    return Asset.objects.create(user=user, file=file, title=title, file_type='image')
+
+
+def counts(collection):
+    collection.refresh_from_db()
+    return collection.asset_count, collection.subtree_asset_count
+
+
+def titles(response):
+    return sorted(asset['title'] for asset in response.data['results'])
+
+
+@pytest.fixture
+def tree(editor_user):
+    """Campaigns/2026/Q3 and Campaigns/2025, plus a separate Brand root"""
+    campaigns = create_collection(editor_user, 'Campaigns')
+    year = create_collection(editor_user, '2026', campaigns)
+    quarter = create_collection(editor_user, 'Q3', year)
+    last_year = create_collection(editor_user, '2025', campaigns)
+    brand = create_collection(editor_user, 'Brand')
+    return {'campaigns': campaigns, 'year': year, 'quarter': quarter, 'last_year': last_year, 'brand': brand}
+
+
+@pytest.mark.django_db
+class TestCollectionTree:
+    """Test suite for materialized-path collections"""
+
+    def test_paths_nest_and_order_depth_first(self, tree):
+        """Test each path extends its parent's and path order is depth first"""
+        assert tree['quarter'].path.startswith(tree['year'].path)
+        assert tree['quarter'].depth == 3
+        assert list(Collection.objects.values_list('name', flat=True)) == ['Campaigns', '2026', 'Q3', '2025',
+                                                                           'Brand']
+        assert ancestor_paths(tree['quarter'].path) == [tree['campaigns'].path, tree['year'].path,
+                                                        tree['quarter'].path]
+
+    def test_subtree_is_a_path_range(self, tree):
+        """Test the range covers exactly the collection and its descendants"""
+        subtree = Collection.objects.filter(**subtree_range(tree['campaigns'].path))
+        assert set(subtree.values_list('name', flat=True)) == {'Campaigns', '2026', 'Q3', '2025'}
+        assert subtree_range('ZZZZ') == {'path__gte': 'ZZZZ'}
+
+    def test_counts_cover_the_subtree(self, editor_user, tree):
+        """Test direct and subtree counts, including ancestors, and active assets only"""
+        poster, flyer, draft = (make_asset(editor_user, title) for title in ('poster', 'flyer', 'draft'))
+        add_assets(tree['quarter'], [poster.pk, flyer.pk])
+        add_assets(tree['year'], [poster.pk, draft.pk])
+
+        assert counts(tree['quarter']) == (2, 2)
+        assert counts(tree['year']) == (2, 4)
+        assert counts(tree['campaigns']) == (0, 4)
+        assert counts(tree['brand']) == (0, 0)
+
+        draft.is_active = False
+        draft.save()
+        assert counts(tree['campaigns']) == (0, 3)
+        poster.delete()
+        assert counts(tree['year']) == (0, 1)
+        assert counts(tree['campaigns']) == (0, 1)
+
+        remove_assets(tree['quarter'], [flyer.pk])
+        assert counts(tree['campaigns']) == (0, 0)
+
+    def test_move_rewrites_the_subtree(self, editor_user, tree):
+        """Test a move re-roots paths, depths and memberships and recounts both sides"""
+        poster = make_asset(editor_user, 'poster')
+        add_assets(tree['quarter'], [poster.pk])
+
+        move_collection(tree['year'], tree['brand'])
+
+        quarter = Collection.objects.get(pk=tree['quarter'].pk)
+        assert quarter.path.startswith(Collection.objects.get(pk=tree['brand'].pk).path)
+        assert quarter.depth == 3
+        assert CollectionAsset.objects.get(asset=poster).path == quarter.path
+        assert counts(tree['campaigns']) == (0, 0)
+        assert counts(tree['brand']) == (0, 1)
+
+        move_collection(tree['year'], None)
+        assert Collection.objects.get(pk=tree['quarter'].pk).depth == 2
+
+    def test_cannot_move_into_own_subtree(self, tree):
+        """Test moving a collection under its descendant is rejected"""
+        with pytest.raises(ValidationError) as error:
+            move_collection(tree['campaigns'], tree['quarter'])
+
+        assert 'subtree' in str(error.value)
+        assert Collection.objects.get(pk=tree['campaigns'].pk).parent is None
+
+
+@pytest.mark.django_db
+class TestCollectionEndpoints:
+    """Test suite for the collections API and the collection asset filter"""
+
+    def test_list_children_and_subtree(self, api_client, viewer_user, tree):
+        """Test viewers can browse by parent and by subtree"""
+        api_client.force_authenticate(user=viewer_user)
+        url = reverse('collection-list')
+
+        roots = api_client.get(url + '?parent=root')
+        children = api_client.get(url + f"?parent={tree['campaigns'].pk}")
+        subtree = api_client.get(url + f"?subtree={tree['year'].pk}")
+
+        assert [row['name'] for row in roots.data['results']] == ['Campaigns', 'Brand']
+        assert [row['name'] for row in children.data['results']] == ['2026', '2025']
+        assert [row['name'] for row in subtree.data['results']] == ['2026', 'Q3']
+        assert api_client.get(url + '?parent=nope').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_create_move_and_permissions(self, api_client, editor_user, other_editor, viewer_user, tree):
+        """Test creating, moving by PATCHing parent, and who may write"""
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.post(reverse('collection-list'), {'name': 'Q4', 'parent': str(tree['year'].pk)},
+                                   format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['depth'] == 3
+        duplicate = api_client.post(reverse('collection-list'), {'name': 'Q3', 'parent': str(tree['year'].pk)},
+                                    format='json')
+        assert duplicate.status_code == status.HTTP_400_BAD_REQUEST
+
+        detail = reverse('collection-detail', kwargs={'pk': tree['quarter'].pk})
+        moved = api_client.patch(detail, {'parent': str(tree['last_year'].pk)}, format='json')
+        assert moved.status_code == status.HTTP_200_OK
+        assert moved.data['path'].startswith(tree['last_year'].path)
+
+        api_client.force_authenticate(user=other_editor)
+        assert api_client.patch(detail, {'name': 'Mine'}, format='json').status_code == status.HTTP_403_FORBIDDEN
+        api_client.force_authenticate(user=viewer_user)
+        assert api_client.post(reverse('collection-list'), {'name': 'X'},
+                               format='json').status_code == status.HTTP_403_FORBIDDEN
+
+    def test_asset_list_filters_by_subtree(self, api_client, editor_user, viewer_user, tree):
+        """Test ?collection= covers the subtree, direct only the node, and filing invalidates the cached list"""
+        poster, flyer, logo = (make_asset(editor_user, title) for title in ('poster', 'flyer', 'logo'))
+        add_assets(tree['quarter'], [poster.pk])
+        add_assets(tree['year'], [flyer.pk])
+        api_client.force_authenticate(user=viewer_user)
+        url = reverse('asset-list')
+
+        assert titles(api_client.get(url + f"?collection={tree['campaigns'].pk}")) == ['flyer', 'poster']
+        direct = api_client.get(url, {'filter': f'{{"collection": {{"direct": "{tree["year"].pk}"}}}}'})
+        assert titles(direct) == ['flyer']
+
+        add_assets(tree['last_year'], [logo.pk])
+        assert titles(api_client.get(url + f"?collection={tree['campaigns'].pk}")) == ['flyer', 'logo', 'poster']
+        assert api_client.get(url + '?collection=nope').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_add_and_remove_assets(self, api_client, editor_user, other_editor, tree):
+        """Test the membership actions update counts and refuse assets the caller can't see"""
+        poster = make_asset(editor_user, 'poster')
+        hidden = make_asset(other_editor, 'hidden')
+        Asset.objects.filter(pk=hidden.pk).update(is_active=False)
+        api_client.force_authenticate(user=editor_user)
+        add_url = reverse('collection-add-assets', kwargs={'pk': tree['quarter'].pk})
+
+        response = api_client.post(add_url, {'asset_ids': [str(poster.pk)]}, format='json')
+        assert response.data == {'added': 1, 'asset_count': 1, 'subtree_asset_count': 1}
+        refused = api_client.post(add_url, {'asset_ids': [str(hidden.pk)]}, format='json')
+        assert refused.status_code == status.HTTP_400_BAD_REQUEST
+        assert refused.data['ids'] == [str(hidden.pk)]
+
+        assert api_client.post(add_url, [str(poster.pk)], format='json').status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.post(add_url, {'asset_ids': 'x'}, format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+        response = api_client.post(reverse('collection-remove-assets', kwargs={'pk': tree['quarter'].pk}),
+                                   {'asset_ids': [str(poster.pk)]}, format='json')
+        assert response.data['removed'] == 1
+        assert counts(tree['campaigns']) == (0, 0)
+
+    def test_delete_removes_subtree(self, api_client, editor_user, tree):
+        """Test deleting a collection drops its descendants and memberships and recounts its ancestors"""
+        poster = make_asset(editor_user, 'poster')
+        add_assets(tree['quarter'], [poster.pk])
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.delete(reverse('collection-detail', kwargs={'pk': tree['year'].pk}))
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not Collection.objects.filter(pk__in=[tree['year'].pk, tree['quarter'].pk]).exists()
+        assert not CollectionAsset.objects.exists()
+        assert counts(tree['campaigns']) == (0, 0)
+        assert Asset.objects.filter(pk=poster.pk).exists()
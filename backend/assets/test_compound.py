@@ -0,0 +1,97 @@
+"""
+Tests for sideloaded (compound document) list responses
+"""
+import json
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset, AssetVersion
+from activity.models import ActivityLog, Comment
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def assets(editor_user):
+    """Create several assets owned by one editor, one with a version"""
+    created = [
+        Asset.objects.create(
+            user=editor_user, title=f"Asset {i}", file_type="image",
+            file=SimpleUploadedFile(f"test{i}.jpg", b"file_content", content_type="image/jpeg"),
+        )
+        for i in range(3)
+    ]
+    AssetVersion.objects.create(asset=created[0], version_number=1, file=created[0].file,
+                                file_size=12, created_by=editor_user)
+    return created
+
+
+@pytest.mark.django_db
+class TestSideloadedAssetList:
+    """Test suite for ?sideload=true on the asset list"""
+
+    def test_owner_included_once(self, api_client, editor_user, assets):
+        """Test that repeated owners and version authors are replaced by ids"""
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('asset-list'), {'sideload': 'true'})
+
+        assert [row['user'] for row in response.data['results']] == [editor_user.id] * 3
+        assert list(response.data['included']['users']) == [str(editor_user.id)]
+        version_id = str(assets[0].versions.get().version_id)
+        assert list(response.data['included']['versions']) == [version_id]
+        assert response.data['included']['versions'][version_id]['created_by'] == editor_user.id
+
+    def test_sideloaded_payload_is_smaller(self, api_client, editor_user, assets):
+        """Test that the compound form is smaller than the embedded one"""
+        api_client.force_authenticate(user=editor_user)
+
+        embedded = api_client.get(reverse('asset-list'))
+        compound = api_client.get(reverse('asset-list'), {'sideload': 'true'})
+
+        assert 'included' not in embedded.data
+        assert len(json.dumps(compound.data, default=str)) < len(json.dumps(embedded.data, default=str))
+
+
+@pytest.mark.django_db
+class TestSideloadedRows:
+    """Test suite for ?sideload=true on comments and activity"""
+
+    def test_comments_reference_assets(self, api_client, editor_user, assets):
+        """Test that comments point at assets listed once in included"""
+        for text in ('first', 'second'):
+            Comment.objects.create(asset=assets[0], user=editor_user, content=text)
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('comment-list'), {'sideload': '1'})
+
+        asset_id = str(assets[0].asset_id)
+        assert [str(row['asset']) for row in response.data['results']] == [asset_id, asset_id]
+        assert list(response.data['included']['assets']) == [asset_id]
+        assert response.data['included']['assets'][asset_id]['user'] == editor_user.id
+
+    def test_activity_reference_users_and_assets(self, api_client, editor_user, assets):
+        """Test the activity log compound form"""
+        for asset in assets:
+            ActivityLog.objects.create(asset=asset, user=editor_user, action='view')
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('activitylog-list'), {'sideload': 'true'})
+
+        assert len(response.data['results']) == 3
+        assert len(response.data['included']['assets']) == 3
+        assert list(response.data['included']['users']) == [str(editor_user.id)]
@@ -0,0 +1,155 @@
+"""
+Tests for ETags, conditional GETs and If-Match updates on assets
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset, AssetModified
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def asset(editor_user):
+    """Create test asset"""
+    file = SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg")
+    return Asset.objects.create(user=editor_user, file=file, title="Test Asset", file_type="image")
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """Test suite for ETag validators on retrieve and list"""
+
+    def test_retrieve_not_modified(self, api_client, editor_user, asset):
+        """Test that a matching If-None-Match yields 304 without a body"""
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        etag = api_client.get(url)['ETag']
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_retrieve_etag_changes_with_asset(self, api_client, editor_user, asset):
+        """Test that an edit invalidates the old validator"""
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        etag = api_client.get(url)['ETag']
+
+        asset.title = "Renamed"
+        asset.save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_etags_change_with_owner_profile(self, api_client, editor_user, asset):
+        """Test that editing the embedded owner invalidates detail and list validators"""
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        detail_etag = api_client.get(url)['ETag']
+        list_etag = api_client.get(reverse('asset-list'))['ETag']
+
+        editor_user.first_name = "Renamed"
+        editor_user.save()
+        detail = api_client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        listing = api_client.get(reverse('asset-list'), HTTP_IF_NONE_MATCH=list_etag)
+
+        assert detail.status_code == status.HTTP_200_OK
+        assert detail.data['user']['first_name'] == "Renamed"
+        assert listing.status_code == status.HTTP_200_OK
+
+    def test_etags_ignore_other_users(self, api_client, editor_user, asset):
+        """Test that another user's account changes leave the validators alone"""
+        other = User.objects.create_user(username='other', password='otherpass123', role='editor')
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        etag = api_client.get(url)['ETag']
+
+        other.first_name = "Renamed"
+        other.set_password('newpass12345')
+        other.save()
+
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_list_not_modified(self, api_client, editor_user, asset):
+        """Test 304 on an unchanged list page, including a weak validator from a proxy"""
+        api_client.force_authenticate(user=editor_user)
+        etag = api_client.get(reverse('asset-list'))['ETag']
+
+        response = api_client.get(reverse('asset-list'), HTTP_IF_NONE_MATCH=f'W/{etag}')
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+class TestIfMatchUpdate:
+    """Test suite for If-Match preconditions on updates"""
+
+    def test_matching_etag_updates(self, api_client, editor_user, asset):
+        """Test that a current validator lets the update through and returns the new one"""
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        etag = api_client.get(url)['ETag']
+
+        response = api_client.patch(url, {'title': 'Renamed'}, HTTP_IF_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] == api_client.get(url)['ETag'] != etag
+
+    def test_profile_edit_does_not_conflict(self, api_client, editor_user, asset):
+        """Test that If-Match only guards the asset row, not the embedded owner"""
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        etag = api_client.get(url)['ETag']
+        editor_user.first_name = "Renamed"
+        editor_user.save()
+
+        response = api_client.patch(url, {'title': 'Renamed'}, HTTP_IF_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_stale_etag_rejected(self, api_client, editor_user, asset):
+        """Test that an update based on an old representation gets 412"""
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        etag = api_client.get(url)['ETag']
+        api_client.patch(url, {'title': 'First writer'})
+
+        response = api_client.patch(url, {'title': 'Second writer'}, HTTP_IF_MATCH=etag)
+
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        asset.refresh_from_db()
+        assert asset.title == 'First writer'
+
+    def test_guarded_save_loses_race(self, asset):
+        """Test that the conditional UPDATE refuses a row changed after it was loaded"""
+        mine = Asset.objects.get(pk=asset.pk)
+        theirs = Asset.objects.get(pk=asset.pk)
+        theirs.title = "Theirs"
+        theirs.save()
+
+        mine.guard_next_save(version=mine.version, updated_at=mine.updated_at)
+        mine.title = "Mine"
+        with pytest.raises(AssetModified):
+            mine.save()
+
+        asset.refresh_from_db()
+        assert asset.title == "Theirs"
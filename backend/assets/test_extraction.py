@@ -0,0 +1,175 @@
+"""
+Tests for document text extraction and content search snippets
+"""
+import io
+import zipfile
+import zlib
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.extraction import (TextBuffer, extract_docx, extract_pdf, extract_pending_text, extract_rtf,
+                               extract_txt, pending_assets)
+from assets.models import Asset, AssetText
+from assets.search import get_search_backend
+
+User = get_user_model()
+
+BS = b'\\'
+
+
+def extract(extractor, data, max_chars=10_000, max_bytes=1_000_000):
+    out = TextBuffer(max_chars)
+    extractor(io.BytesIO(data), out, max_bytes)
+    return out.getvalue(), out.truncated
+
+
+def docx(*paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>' for text in paragraphs)
+    stream = io.BytesIO()
+    with zipfile.ZipFile(stream, 'w') as archive:
+        archive.writestr('word/document.xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+    return stream.getvalue()
+
+
+def pdf(content):
+    compressed = zlib.compress(content)
+    return (
+        b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog >>\nendobj\n'
+        b'2 0 obj\n<< /Length ' + str(len(compressed)).encode() + b' /Filter /FlateDecode >>\nstream\n'
+        + compressed + b'\nendstream\nendobj\n'
+        b'3 0 obj\n<< /Subtype /Image /Length 9 >>\nstream\n(img) Tj\nendstream\nendobj\n%%EOF\n'
+    )
+
+
+class TestExtractors:
+    """Test suite for the per-format extractors"""
+
+    def test_txt_encodings_and_byte_cap(self):
+        """Test BOM and legacy encodings, whitespace clean-up and the read cap"""
+        assert extract(extract_txt, 'Café  menu\r\n\r\n\r\nPrices'.encode('cp1252')) == ('Café menu\n\nPrices', False)
+        assert extract(extract_txt, 'Grüße'.encode('utf-16')) == ('Grüße', False)
+        assert extract(extract_txt, b'abcdef' * 10, max_bytes=8) == ('abcdefab', True)
+        assert extract(extract_txt, b'abcdef' * 10, max_chars=4) == ('abcd', True)
+
+    def test_docx(self):
+        """Test that paragraphs of the document body become lines"""
+        assert extract(extract_docx, docx('Quarterly report', 'Revenue &amp; costs')) == \
+            ('Quarterly report\nRevenue & costs', False)
+
+    def test_rtf(self):
+        """Test control words, escapes, unicode and skipped destinations"""
+        rtf = (b'{' + BS + b'rtf1' + BS + b'ansi' + BS + b'uc1{' + BS + b'fonttbl{' + BS + b'f0 Arial;}}'
+               b'{' + BS + b'*' + BS + b'generator Word;}' + BS + b'f0 Caf' + BS + b"'e9 {" + BS + b'b menu}'
+               + BS + b'par Prices ' + BS + b'u8364? 5 ' + BS + b'{net' + BS + b'}' + BS + b'par}')
+        assert extract(extract_rtf, rtf) == ('Café menu\nPrices € 5 {net}', False)
+
+    def test_pdf_content_streams(self):
+        """Test text operators in compressed streams, skipping images"""
+        content = (b'BT /F1 12 Tf 72 712 Td (Annual ' + BS + b'(draft' + BS + b')) Tj '
+                   b'0 -14 Td [(Sum)-300(mary) 12 (ies)] TJ ET')
+        assert extract(extract_pdf, pdf(content)) == ('Annual (draft)\nSum maryies', False)
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user(db):
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+def make_document(user, title, name, content, **kwargs):
+    return Asset.objects.create(
+        user=user, title=title, file_type=kwargs.pop('file_type', 'doc'),
+        file=SimpleUploadedFile(name, content), **kwargs
+    )
+
+
+@pytest.mark.django_db
+class TestExtractionJob:
+    """Test suite for the background extraction job"""
+
+    def test_extracts_pending_documents_once(self, editor_user):
+        """Test statuses, that only new or replaced files are processed, and that images are ignored"""
+        text = make_document(editor_user, "Notes", "notes.txt", b"Meeting notes")
+        legacy = make_document(editor_user, "Legacy", "old.doc", b"\xd0\xcf\x11\xe0")
+        broken = make_document(editor_user, "Broken", "broken.docx", b"not a zip")
+        make_document(editor_user, "Photo", "photo.jpg", b"jpeg", file_type='image')
+
+        assert extract_pending_text() == 3
+        assert AssetText.objects.get(asset=text).content == "Meeting notes"
+        assert AssetText.objects.get(asset=legacy).status == 'unsupported'
+        failed = AssetText.objects.get(asset=broken)
+        assert failed.status == 'failed' and failed.error.startswith('BadZipFile')
+        assert extract_pending_text() == 0
+
+        text.file = SimpleUploadedFile("notes-v2.txt", b"Revised notes")
+        text.save()
+        assert list(pending_assets()) == [text]
+        call_command('extract_asset_text', stdout=io.StringIO())
+        assert AssetText.objects.get(asset=text).content == "Revised notes"
+
+    @override_settings(ASSET_TEXT_MAX_CHARS=5)
+    def test_truncated_text(self, editor_user):
+        """Test that text past ASSET_TEXT_MAX_CHARS is cut and flagged"""
+        asset = make_document(editor_user, "Long", "long.txt", b"0123456789")
+        extract_pending_text()
+        text = AssetText.objects.get(asset=asset)
+        assert (text.content, text.truncated) == ("01234", True)
+
+
+@pytest.mark.django_db
+class TestContentSearch:
+    """Test suite for searching extracted text"""
+
+    def test_database_backend_finds_content_with_snippets(self, api_client, editor_user):
+        """Test content matches and highlighted, escaped snippets from text or description"""
+        filler = "lorem ipsum " * 20
+        report = make_document(editor_user, "Q3", "q3.txt",
+                               f"{filler}Budget <total> for the spring campaign. {filler}".encode())
+        described = make_document(editor_user, "Spring poster", "poster.txt", b"",
+                                  description="Poster for the Spring launch")
+        extract_pending_text()
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('search_assets'), {'q': 'spring campaign'})
+        snippets = {row['asset_id']: row['snippet'] for row in response.data}
+
+        snippet = snippets[str(report.asset_id)]
+        assert snippet.startswith('…') and snippet.endswith('…')
+        assert 'Budget &lt;total&gt; for the <mark>spring</mark> <mark>campaign</mark>.' in snippet
+        # Found by its title; the snippet falls back to the description
+        assert snippets[str(described.asset_id)] == 'Poster for the <mark>Spring</mark> launch'
+
+    def test_short_terms_skip_content(self, editor_user):
+        """Test terms too short for the trigram index match titles but not extracted text"""
+        report = make_document(editor_user, "Report", "report.txt", b"Budget for Q3 and 50% off")
+        extract_pending_text()
+        backend = get_search_backend()
+
+        assert not backend.search(Asset.objects.all(), 'Q3').exists()
+        assert backend.search(Asset.objects.all(), '50% off').get() == report
+
+    def test_inverted_index_indexes_content(self, editor_user, tmp_path, django_capture_on_commit_callbacks):
+        """Test that extraction updates the index through the AssetText signals"""
+        with override_settings(ASSET_SEARCH_BACKEND='assets.search.inverted_index.InvertedIndexBackend',
+                               ASSET_SEARCH_INDEX_DIR=str(tmp_path)):
+            asset = make_document(editor_user, "Q3", "q3.txt", b"Budget for the spring campaign")
+            backend = get_search_backend()
+            assert not backend.search(Asset.objects.all(), 'budget').exists()
+
+            with django_capture_on_commit_callbacks(execute=True):
+                extract_pending_text()
+            assert backend.search(Asset.objects.all(), 'budget campaign').get() == asset
@@ -0,0 +1,120 @@
+"""
+Tests for facet counts on search and list responses
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from assets.models import Asset
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user(db):
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user(db):
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+@pytest.fixture
+def assets(editor_user):
+    """Create a small catalogue: two images, one video and one inactive pdf"""
+    def make(title, file_type, tags, is_active=True):
+        return Asset.objects.create(
+            user=editor_user, title=title, file_type=file_type, tags=tags, is_active=is_active,
+            file=SimpleUploadedFile("test.bin", b"file_content"),
+        )
+    return [
+        make("Spring hero", "image", ['spring', 'hero']),
+        make("Spring banner", "image", ['spring']),
+        make("Launch video", "video", ['launch']),
+        make("Old brief", "pdf", ['spring'], is_active=False),
+    ]
+
+
+def as_counts(facet):
+    return {row['value']: row['count'] for row in facet}
+
+
+@pytest.mark.django_db
+class TestSearchFacets:
+    """Test suite for ?facets= on search_assets"""
+
+    def test_facets_over_filtered_results(self, api_client, viewer_user, editor_user, assets):
+        """Test that every facet counts the filtered set"""
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('search_assets'), {'tags': 'spring', 'facets': 'true'})
+
+        assert len(response.data['results']) == 2
+        facets = response.data['facets']
+        assert facets['file_type'] == [{'value': 'image', 'label': 'Image', 'count': 2}]
+        assert as_counts(facets['tags']) == {'spring': 2, 'hero': 1}
+        assert facets['user'] == [{'value': editor_user.id, 'label': 'editor', 'count': 2}]
+        assert facets['month'] == [{'value': timezone.now().strftime('%Y-%m'), 'count': 2}]
+
+    def test_subset_and_plain_response(self, api_client, viewer_user, assets):
+        """Test facet selection, the unchanged default shape and unknown names"""
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('search_assets'), {'facets': 'file_type'})
+        assert list(response.data['facets']) == ['file_type']
+        assert as_counts(response.data['facets']['file_type']) == {'image': 2, 'video': 1}
+
+        assert isinstance(api_client.get(reverse('search_assets')).data, list)
+
+        response = api_client.get(reverse('search_assets'), {'facets': 'colour'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_unfiltered_facets_cached_until_change(self, api_client, viewer_user, editor_user, assets,
+                                                   django_assert_num_queries):
+        """Test the cached fast path and its invalidation"""
+        api_client.force_authenticate(user=viewer_user)
+        params = {'facets': 'file_type'}
+        api_client.get(reverse('search_assets'), params)
+
+        with django_assert_num_queries(3):  # results, metadata and versions only
+            api_client.get(reverse('search_assets'), params)
+
+        assets[2].file_type = 'image'
+        assets[2].save()
+        response = api_client.get(reverse('search_assets'), params)
+        assert as_counts(response.data['facets']['file_type']) == {'image': 3}
+
+
+@pytest.mark.django_db
+class TestListFacets:
+    """Test suite for ?facets= on the asset list"""
+
+    def test_editor_facets_include_own_inactive(self, api_client, editor_user, assets):
+        """Test that list facets follow the caller's visibility"""
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('asset-list'), {'facets': 'file_type,tags'})
+
+        assert response.data['count'] == 4
+        assert as_counts(response.data['facets']['file_type']) == {'image': 2, 'video': 1, 'pdf': 1}
+        assert as_counts(response.data['facets']['tags'])['spring'] == 3
+
+    def test_filtered_list_facets(self, api_client, viewer_user, assets):
+        """Test that list filters narrow the facets"""
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('asset-list'), {'file_type': 'image', 'facets': 'tags'})
+
+        assert as_counts(response.data['facets']['tags']) == {'spring': 2, 'hero': 1}
@@ -0,0 +1,129 @@
+"""
+Tests for fuzzy asset search and "did you mean" suggestions
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets import fuzzy
+from assets.fuzzy import similarity, suggest, vocabulary
+from assets.models import Asset
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def viewer_user(db):
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+@pytest.fixture
+def make_asset(db):
+    """Factory for active image assets owned by one editor"""
+    owner = User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+    def make(title, tags=(), file_type='image'):
+        return Asset.objects.create(
+            user=owner, title=title, tags=list(tags), file_type=file_type,
+            file=SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg"),
+        )
+    return make
+
+
+class TestTrigramSimilarity:
+    """Test suite for the pure-Python trigram fallback"""
+
+    def test_matches_pg_trgm(self):
+        """Test against the values pg_trgm documents"""
+        assert similarity('word', 'two words') == pytest.approx(0.363636, abs=1e-6)
+        assert similarity('Logo', 'logo') == 1.0
+        assert similarity('', 'logo') == 0.0
+
+
+@pytest.mark.django_db
+class TestFuzzySearch:
+    """Test suite for fuzzy matching in search_assets"""
+
+    def test_typos_match_titles_ranked_after_exact(self, api_client, viewer_user, make_asset):
+        """Test that misspelt queries find titles, exact matches first"""
+        fuzzy = make_asset("Spring brochure")
+        exact = make_asset("Brochre stand")
+        make_asset("Quarterly report")
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('search_assets'), {'q': 'brochre'})
+
+        assert [row['asset_id'] for row in response.data] == [str(exact.asset_id), str(fuzzy.asset_id)]
+
+    def test_typos_match_file_names_and_tags(self, api_client, viewer_user, make_asset):
+        """Test underscore-joined titles and tag names"""
+        logo = make_asset("logo_final")
+        photo = make_asset("Team day", tags=['photography'])
+        api_client.force_authenticate(user=viewer_user)
+
+        assert [row['asset_id'] for row in api_client.get(reverse('search_assets'), {'q': 'logo_finall'}).data] \
+            == [str(logo.asset_id)]
+        assert [row['asset_id'] for row in api_client.get(reverse('search_assets'), {'q': 'photograpy'}).data] \
+            == [str(photo.asset_id)]
+
+
+    def test_fallback_keeps_only_the_closest_matches(self, make_asset, monkeypatch):
+        """Test the Python fallback hands back at most FALLBACK_MAX_MATCHES ids, the most similar ones"""
+        monkeypatch.setattr(fuzzy, 'FALLBACK_MAX_MATCHES', 2)
+        close = [make_asset("Brochure"), make_asset("Brochures")]
+        make_asset("Brouchure")
+
+        assert set(vocabulary.matches('brochure')) == {asset.asset_id for asset in close}
+
+@pytest.mark.django_db
+class TestSuggestions:
+    """Test suite for "did you mean" on empty searches"""
+
+    def test_suggestion_header_when_nothing_matches(self, api_client, viewer_user, make_asset):
+        """Test that misspelt words are corrected from the vocabulary"""
+        make_asset("Spring brochure")
+        make_asset("Company logo")
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('search_assets'), {'q': 'brochre logo'})
+
+        assert response.data == []
+        assert response['X-Search-Suggestion'] == 'brochure logo'
+
+    def test_suggestion_header_drops_control_characters(self, api_client, viewer_user, make_asset):
+        """Test that line breaks typed into the query don't reach the header"""
+        make_asset("Spring brochure")
+        make_asset("Company logo")
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('search_assets'), {'q': 'brochre\r\nzxcvbnm\r\nlogo'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['X-Search-Suggestion'] == 'brochure zxcvbnm logo'
+
+    def test_suggestion_in_faceted_response(self, api_client, viewer_user, make_asset):
+        """Test the suggestion key next to facets, and no suggestion when results exist"""
+        make_asset("Spring brochure")
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('search_assets'), {'q': 'brochre', 'file_type': 'video', 'facets': 'true'})
+        assert response.data['suggestion'] == 'brochure'
+
+        response = api_client.get(reverse('search_assets'), {'q': 'brochure'})
+        assert 'X-Search-Suggestion' not in response
+
+    def test_no_suggestion_for_unrelated_words(self, make_asset):
+        """Test that nothing is suggested without a close enough word"""
+        make_asset("Spring brochure")
+
+        assert suggest('zzzz') is None
+        assert suggest('brochure') is None
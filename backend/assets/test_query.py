@@ -0,0 +1,229 @@
+"""
+Tests for the asset query language and the endpoints sharing it
+"""
+import json
+from urllib.parse import quote
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from activity.models import ActivityLog
+from assets.models import Asset, Metadata
+from assets.query import QUERY_MAX_CONDITIONS, QUERY_MAX_DEPTH, compile_query
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def admin_user(db):
+    """Create admin user"""
+    return User.objects.create_user(username='admin', password='adminpass123', role='admin')
+
+
+@pytest.fixture
+def editor_user(db):
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user(db):
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+@pytest.fixture
+def assets(editor_user):
+    """A small catalogue: (poster, clip, brief, old)"""
+    def make(name, file_type, **fields):
+        file = SimpleUploadedFile(name, b'x' * fields.pop('size', 10), content_type='application/octet-stream')
+        return Asset.objects.create(user=editor_user, file=file, file_type=file_type, **fields)
+
+    poster = make('poster.jpg', 'image', title='Spring poster', tags=['brand', 'spring'], size=100)
+    clip = make('clip.mp4', 'video', title='Launch clip', tags=['brand'], size=5000)
+    brief = make('brief.pdf', 'pdf', title='Campaign brief', tags=['draft'], size=300)
+    old = make('old.jpg', 'image', title='Old logo', tags=['brand'], is_active=False)
+    Metadata.objects.create(asset=clip, field_name='campaign', field_value='spring')
+    Metadata.objects.create(asset=brief, field_name='campaign', field_value='autumn')
+    return poster, clip, brief, old
+
+
+def matching(tree):
+    return set(Asset.objects.filter(compile_query(tree)).values_list('title', flat=True))
+
+
+def list_url(name='asset-list', **params):
+    query = '&'.join(
+        f'{key}={quote(json.dumps(value)) if key == "filter" else value}' for key, value in params.items()
+    )
+    return reverse(name) + (f'?{query}' if query else '')
+
+
+@pytest.mark.django_db
+class TestCompileQuery:
+    """Test suite for compiling query trees"""
+
+    def test_boolean_composition(self, assets):
+        """Test and, or and not combine conditions"""
+        tree = {'and': [
+            {'is_active': True},
+            {'or': [{'file_type': 'image'}, {'metadata': {'name': 'campaign', 'eq': 'spring'}}]},
+            {'not': {'tag': 'draft'}},
+        ]}
+        assert matching(tree) == {'Spring poster', 'Launch clip'}
+
+    def test_ranges_and_text(self, assets):
+        """Test size ranges, between and text operators"""
+        assert matching({'file_size': {'gte': 100, 'lt': 5000}}) == {'Spring poster', 'Campaign brief'}
+        assert matching({'file_size': {'between': [300, 5000]}}) == {'Launch clip', 'Campaign brief'}
+        assert matching({'title': {'contains': 'POSTER'}}) == {'Spring poster'}
+        assert matching({'file_type': {'in': ['pdf', 'video']}}) == {'Launch clip', 'Campaign brief'}
+
+    def test_tags_and_metadata(self, assets):
+        """Test tag and metadata conditions"""
+        assert matching({'tag': {'all': ['brand', 'spring']}}) == {'Spring poster'}
+        assert matching({'tag': {'in': ['spring', 'draft']}}) == {'Spring poster', 'Campaign brief'}
+        assert matching({'metadata': {'name': 'campaign', 'exists': False}}) == {'Spring poster', 'Old logo'}
+        assert matching({'metadata': {'name': 'campaign', 'contains': 'AUT'}}) == {'Campaign brief'}
+
+    def test_dates(self, assets):
+        """Test dates are parsed and compared"""
+        assert len(matching({'created_at': {'gte': '2000-01-01'}})) == 4
+        assert matching({'created_at': {'lt': '2000-01-01T00:00:00Z'}}) == set()
+
+    @pytest.mark.parametrize('tree', [
+        {'colour': 'red'},
+        {'file_type': 'spreadsheet'},
+        {'file_size': {'like': 3}},
+        {'file_size': 'big'},
+        {'created_at': {'gte': 'yesterday'}},
+        {'or': []},
+        {'file_size': {'between': [1]}},
+        {'metadata': {'eq': 'spring'}},
+        {'file_type': {'in': ['image'] * 101}},
+    ])
+    def test_invalid_queries_raise(self, tree):
+        """Test malformed queries are validation errors"""
+        with pytest.raises(ValidationError):
+            compile_query(tree)
+
+    def test_complexity_limits(self):
+        """Test depth and condition limits"""
+        deep = {'file_type': 'image'}
+        for _ in range(QUERY_MAX_DEPTH):
+            deep = {'not': deep}
+        with pytest.raises(ValidationError):
+            compile_query(deep)
+        with pytest.raises(ValidationError):
+            compile_query({'or': [{'version': number} for number in range(QUERY_MAX_CONDITIONS + 1)]})
+
+
+@pytest.mark.django_db
+class TestQueryEndpoints:
+    """Test suite for the query language on list, search, export and bulk"""
+
+    def test_list_filter(self, api_client, viewer_user, assets):
+        """Test the list takes a JSON filter alongside the flat parameters"""
+        api_client.force_authenticate(user=viewer_user)
+        response = api_client.get(list_url(tags='brand', filter={'not': {'file_type': 'video'}}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [asset['title'] for asset in response.data['results']] == ['Spring poster']
+
+    def test_invalid_filter_is_a_bad_request(self, api_client, viewer_user, assets):
+        """Test invalid queries answer 400 with the reason"""
+        api_client.force_authenticate(user=viewer_user)
+        response = api_client.get(list_url(filter={'colour': 'red'}))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'filter' in response.data
+
+    def test_search_shares_the_filter(self, api_client, viewer_user, assets):
+        """Test search_assets applies the same query"""
+        api_client.force_authenticate(user=viewer_user)
+        response = api_client.get(list_url('search_assets', filter={'metadata': {'name': 'campaign', 'eq': 'spring'}}))
+
+        assert [asset['title'] for asset in response.data] == ['Launch clip']
+
+    def test_explain_is_for_admins(self, api_client, admin_user, viewer_user, assets):
+        """Test ?explain=true returns SQL and plan to admins only"""
+        api_client.force_authenticate(user=viewer_user)
+        assert api_client.get(list_url(file_type='image', explain='true')).status_code == status.HTTP_403_FORBIDDEN
+
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(list_url(file_type='image', explain='true'))
+        assert response.status_code == status.HTTP_200_OK
+        assert 'file_type' in response.data['sql']
+        assert response.data['plan']
+
+    def test_export_streams_csv(self, api_client, viewer_user, assets):
+        """Test export returns the filtered list as CSV"""
+        api_client.force_authenticate(user=viewer_user)
+        response = api_client.get(list_url('asset-export', tags='brand', ordering='title'))
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert response['Content-Type'] == 'text/csv'
+        assert lines[0].startswith('asset_id,title,file_type')
+        assert [line.split(',')[1] for line in lines[1:]] == ['Launch clip', 'Spring poster']
+
+    def test_bulk_tags_and_deactivate(self, api_client, editor_user, assets):
+        """Test bulk actions apply to the matching assets"""
+        poster, clip, brief, _ = assets
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-bulk')
+        response = api_client.post(url, {'filter': {'tag': 'brand', 'is_active': True}, 'action': 'add_tags',
+                                         'tags': ['2024']}, format='json')
+        assert response.data == {'matched': 2, 'changed': 2}
+        poster.refresh_from_db()
+        assert poster.tags == ['brand', 'spring', '2024']
+
+        response = api_client.post(url, {'filter': {'tag': '2024'}, 'action': 'deactivate'}, format='json')
+        assert response.data == {'matched': 2, 'changed': 2}
+        assert set(Asset.objects.filter(is_active=True).values_list('title', flat=True)) == {'Campaign brief'}
+
+    def test_bulk_edits_reach_the_owners_feed(self, api_client, admin_user, editor_user, assets):
+        """Test bulk log rows carry the asset owner and show up in the owner's and the recent feeds"""
+        api_client.force_authenticate(user=admin_user)
+        assert api_client.get(reverse('recent_activity')).data == []  # Now cached
+
+        response = api_client.post(reverse('asset-bulk'), {'filter': {'tag': 'brand', 'is_active': True},
+                                                           'action': 'add_tags', 'tags': ['2024']}, format='json')
+        assert response.data['changed'] == 2
+
+        entries = ActivityLog.objects.filter(details__bulk=True)
+        logged = {str(pk) for pk in entries.values_list('pk', flat=True)}
+        assert set(entries.values_list('asset_owner', flat=True)) == {editor_user.pk}
+        assert {row['log_id'] for row in api_client.get(reverse('recent_activity')).data} == logged
+        api_client.force_authenticate(user=editor_user)
+        feed = api_client.get(reverse('activitylog-list'))
+        assert {row['log_id'] for row in feed.data['results']} == logged
+
+    def test_bulk_only_touches_own_assets(self, api_client, assets):
+        """Test editors can't change other editors' assets in bulk"""
+        other = User.objects.create_user(username='other', password='otherpass123', role='editor')
+        api_client.force_authenticate(user=other)
+        response = api_client.post(reverse('asset-bulk'), {'filter': {'file_type': 'image'}, 'action': 'deactivate'},
+                                   format='json')
+
+        assert response.data == {'matched': 0, 'changed': 0}
+
+    def test_bulk_requires_a_filter_and_an_editor(self, api_client, editor_user, viewer_user, assets):
+        """Test bulk refuses a missing filter and viewers"""
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.post(reverse('asset-bulk'), {'action': 'deactivate'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        api_client.force_authenticate(user=viewer_user)
+        response = api_client.post(reverse('asset-bulk'), {'filter': {'file_type': 'image'}, 'action': 'deactivate'},
+                                   format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
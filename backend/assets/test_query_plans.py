@@ -0,0 +1,97 @@
+"""
+Query-plan regression tests for role-scoped asset listing.
+
+These guard the partial indexes and the UNION ALL rewrite of the editor
+visibility predicate: each list shape must be answered by ordered index
+scans, never by a full sort.
+"""
+import pytest
+from django.db import connection
+from django.contrib.auth import get_user_model
+from assets.collections import create_collection
+from assets.models import Asset, AssetText
+from assets.query import compile_query
+from assets.search.database import content_contains
+from assets.views import editor_visible_assets
+
+User = get_user_model()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+def plan(queryset):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            # Tiny test tables would otherwise always be seq-scanned
+            cursor.execute('SET enable_seqscan = off')
+    return queryset.explain()
+
+
+def assert_index_scans(plan_text, *index_names):
+    for name in index_names:
+        assert name in plan_text, plan_text
+    if connection.vendor == 'sqlite':
+        assert 'TEMP B-TREE' not in plan_text, plan_text
+    elif connection.vendor == 'postgresql':
+        assert 'Seq Scan' not in plan_text, plan_text
+        assert '->  Sort' not in plan_text and not plan_text.startswith('Sort'), plan_text
+
+
+@pytest.mark.django_db
+class TestAssetListQueryPlans:
+    """Test suite for index usage of list queries"""
+
+    def test_viewer_list_uses_active_partial_index(self):
+        """Test viewer first page walks the active created_at index"""
+        queryset = Asset.objects.filter(is_active=True).order_by('-created_at')[:20]
+
+        assert_index_scans(plan(queryset), 'assets_active_created_idx')
+
+    def test_viewer_file_type_list_uses_partial_index(self):
+        """Test file_type-filtered first page walks the active (file_type, created_at) index"""
+        queryset = Asset.objects.filter(is_active=True, file_type='image').order_by('-created_at')[:20]
+
+        assert_index_scans(plan(queryset), 'assets_active_type_idx')
+
+    def test_popularity_list_uses_partial_index(self):
+        """Test ordering=popularity first page walks the active popularity index"""
+        queryset = Asset.objects.filter(is_active=True).order_by('-popularity', '-created_at')[:20]
+
+        assert_index_scans(plan(queryset), 'assets_active_popular_idx')
+
+    def test_compiled_query_keeps_the_partial_index(self):
+        """Test a query-language filter compiles to the same index-friendly predicates"""
+        tree = {'and': [{'file_type': 'image'}, {'not': {'tag': 'draft'}}]}
+        queryset = Asset.objects.filter(compile_query(tree), is_active=True).order_by('-created_at')[:20]
+
+        assert_index_scans(plan(queryset), 'assets_active_type_idx')
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql', reason='The trigram index is PostgreSQL-only')
+    def test_content_search_uses_trigram_index(self):
+        """Test content matching is answered by the trigram index, not a scan of every document"""
+        queryset = AssetText.objects.filter(pk__in=Asset.objects.filter(content_contains('budget')).values('pk'))
+
+        plan_text = plan(queryset)
+        assert 'asset_texts_content_trgm_idx' in plan_text, plan_text
+        assert 'Seq Scan on asset_texts' not in plan_text, plan_text
+
+    def test_collection_subtree_filter_is_an_index_range(self, editor_user):
+        """Test a subtree filter reads one range of the membership path index and scans no table"""
+        collection = create_collection(editor_user, 'Campaigns')
+        queryset = Asset.objects.filter(compile_query({'collection': str(collection.pk)}),
+                                        is_active=True).order_by('-created_at')[:20]
+
+        # The planner may drive from the range or from the ordered list; either way no full scan
+        plan_text = plan(queryset)
+        assert 'collection_assets_path_idx' in plan_text, plan_text
+        assert 'SCAN assets' not in plan_text and 'Seq Scan' not in plan_text, plan_text
+
+    def test_editor_list_merges_two_index_scans(self, editor_user):
+        """Test the editor UNION ALL uses both partial indexes without a sort"""
+        queryset = editor_visible_assets(Asset.objects.order_by('-created_at'), editor_user)[:20]
+
+        assert_index_scans(plan(queryset), 'assets_active_created_idx', 'assets_inactive_user_idx')
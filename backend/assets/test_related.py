@@ -0,0 +1,160 @@
+"""
+Tests for precomputed related-asset recommendations
+"""
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset, RelatedAsset
+from assets.related import build_related, load_features, load_neighbourhood, refresh_related
+from activity.models import ActivityLog
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user(db):
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user(db):
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+def make_asset(user, title, tags):
+    file = SimpleUploadedFile(f"{title}.jpg", b"file_content", content_type="image/jpeg")
+    return Asset.objects.create(user=user, file=file, title=title, file_type='image', tags=tags)
+
+
+def download(asset, user, when):
+    entry = ActivityLog.objects.create(asset=asset, user=user, action='download')
+    ActivityLog.objects.filter(pk=entry.pk).update(timestamp=when)
+
+
+def related_titles(asset):
+    return list(RelatedAsset.objects.filter(asset=asset).order_by('-score').values_list('related__title', flat=True))
+
+
+def snapshot():
+    return {(link.asset_id, link.related_id): round(link.score, 9) for link in RelatedAsset.objects.all()}
+
+
+@pytest.fixture
+def library(editor_user):
+    """Assets sharing tags to different degrees, plus an unrelated one"""
+    return {
+        title: make_asset(editor_user, title, tags)
+        for title, tags in [
+            ('poster', ['brand', 'spring', 'print']),
+            ('flyer', ['brand', 'spring', 'print']),
+            ('banner', ['brand', 'spring']),
+            ('logo', ['brand']),
+            ('song', ['audio']),
+        ]
+    }
+
+
+@pytest.mark.django_db
+class TestBuildRelated:
+    """Test suite for the related-assets job"""
+
+    def test_neighbours_ranked_by_shared_tags(self, library):
+        """Test assets sharing more (and rarer) tags rank higher"""
+        assert build_related() == 4
+
+        assert related_titles(library['poster']) == ['flyer', 'banner', 'logo']
+        assert related_titles(library['song']) == []
+
+    def test_co_downloads_relate_untagged_assets(self, editor_user, viewer_user, library):
+        """Test assets downloaded in the same sessions become related"""
+        one = make_asset(editor_user, 'one', [])
+        two = make_asset(editor_user, 'two', [])
+        yesterday = timezone.now() - timedelta(days=1)
+        for user in (viewer_user, editor_user):
+            download(one, user, yesterday)
+            download(two, user, yesterday)
+            download(library['song'], user, yesterday - timedelta(days=2))
+
+        build_related()
+
+        assert related_titles(one) == ['two']
+        assert related_titles(library['song']) == []
+
+    def test_refresh_matches_a_full_build(self, viewer_user, library):
+        """Test refreshing changed assets gives the same lists as rebuilding"""
+        build_related()
+        logo = library['logo']
+        logo.tags = ['brand', 'spring', 'print']
+        logo.save()
+        library['banner'].is_active = False
+        library['banner'].save()
+        download(library['song'], viewer_user, timezone.now())
+
+        assert refresh_related() == 3
+        refreshed = snapshot()
+        assert set(related_titles(library['poster'])) == {'flyer', 'logo'}
+        assert not RelatedAsset.objects.filter(related=library['banner']).exists()
+
+        build_related()
+        assert snapshot() == refreshed
+
+    def test_neighbourhood_weights_match_the_full_load(self, editor_user, viewer_user, library):
+        """Test the refresh's partial load gives its rows the full load's weights, and skips unrelated assets"""
+        download(library['poster'], viewer_user, timezone.now())
+        download(library['song'], viewer_user, timezone.now())
+        download(make_asset(editor_user, 'clip', ['audio']), viewer_user, timezone.now())
+
+        full = load_features()
+        local = load_neighbourhood([library['logo'].pk])
+
+        assert set(local.asset_ids) == {library[title].pk for title in ('poster', 'flyer', 'banner', 'logo')}
+        for asset_id in local.asset_ids:
+            assert local.rows[local.index[asset_id]] == pytest.approx(full.rows[full.index[asset_id]])
+
+    def test_refresh_without_changes_does_nothing(self, library):
+        """Test a run with nothing new leaves the lists alone"""
+        build_related()
+        before = snapshot()
+
+        assert refresh_related() == 0
+        assert snapshot() == before
+
+
+@pytest.mark.django_db
+class TestRelatedEndpoint:
+    """Test suite for the related action on assets"""
+
+    def test_serves_precomputed_neighbours(self, api_client, viewer_user, library):
+        """Test the endpoint returns visible neighbours with scores, best first"""
+        build_related()
+        Asset.objects.filter(pk=library['logo'].pk).update(is_active=False)
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('asset-related', kwargs={'pk': library['poster'].pk}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['title'] for row in response.data['results']] == ['flyer', 'banner']
+        scores = [row['score'] for row in response.data['results']]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_hidden_asset_is_not_found(self, api_client, viewer_user, library):
+        """Test viewers can't read the related list of an inactive asset"""
+        Asset.objects.filter(pk=library['poster'].pk).update(is_active=False)
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.get(reverse('asset-related', kwargs={'pk': library['poster'].pk}))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
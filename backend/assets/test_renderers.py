@@ -0,0 +1,107 @@
+"""
+Tests for the API renderers and response compression
+"""
+import gzip
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset
+from ShelfLifeDAM import renderers
+
+User = get_user_model()
+
+PAYLOAD = {
+    'asset_id': uuid.uuid4(),
+    'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    'file_size': Decimal('1.50'),
+    'title': 'Caf\u00e9\u2028poster',
+    'tags': ['a', 'b'],
+    'nested': {'count': 3, 'items': [{'id': 1}, None]},
+}
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def assets(editor_user):
+    """Create a page of assets"""
+    return [
+        Asset.objects.create(
+            user=editor_user, title=f"Asset {i}", file_type="image",
+            file=SimpleUploadedFile(f"test{i}.jpg", b"file_content", content_type="image/jpeg"),
+        )
+        for i in range(5)
+    ]
+
+
+class TestFastJSONRenderer:
+    """Test suite for FastJSONRenderer"""
+
+    def test_matches_drf_output(self):
+        """Test byte-for-byte parity with DRF's JSONRenderer"""
+        assert renderers.FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+    def test_falls_back_without_orjson(self, monkeypatch):
+        """Test that the renderer works when orjson isn't installed"""
+        monkeypatch.setattr(renderers, 'orjson', None)
+
+        assert renderers.FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+
+@pytest.mark.django_db
+class TestMessagePackNegotiation:
+    """Test suite for application/msgpack responses"""
+
+    def test_msgpack_when_requested(self, api_client, editor_user, assets):
+        """Test that internal clients can ask for MessagePack"""
+        msgpack = pytest.importorskip('msgpack')
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('asset-list'), HTTP_ACCEPT='application/msgpack')
+
+        assert response['Content-Type'] == 'application/msgpack'
+        assert msgpack.unpackb(response.content)['count'] == 5
+
+
+@pytest.mark.django_db
+class TestCompressionMiddleware:
+    """Test suite for response compression"""
+
+    def test_large_response_gzipped(self, api_client, editor_user, assets, settings):
+        """Test gzip above the size threshold"""
+        settings.RESPONSE_COMPRESSION_MIN_BYTES = 100
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('asset-list'), HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert json.loads(gzip.decompress(response.content))['count'] == 5
+
+    def test_small_or_unaccepted_not_compressed(self, api_client, editor_user, assets, settings):
+        """Test that small responses and clients without gzip get identity"""
+        api_client.force_authenticate(user=editor_user)
+
+        settings.RESPONSE_COMPRESSION_MIN_BYTES = 10 ** 6
+        assert not api_client.get(reverse('asset-list'), HTTP_ACCEPT_ENCODING='gzip').has_header('Content-Encoding')
+
+        settings.RESPONSE_COMPRESSION_MIN_BYTES = 100
+        assert not api_client.get(reverse('asset-list'), HTTP_ACCEPT_ENCODING='gzip;q=0').has_header('Content-Encoding')
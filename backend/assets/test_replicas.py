@@ -0,0 +1,102 @@
+"""
+Tests for read-replica routing and read-your-writes stickiness
+
+The test settings define a second SQLite connection, ``replica``, mirroring
+the default test database, so routing can be observed per connection.
+"""
+import pytest
+from django.db import DatabaseError, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset
+from ShelfLifeDAM import replicas
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def asset(editor_user):
+    """Create test asset"""
+    file = SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg")
+    return Asset.objects.create(user=editor_user, file=file, title="Test Asset", file_type="image")
+
+
+@pytest.fixture(autouse=True)
+def use_replica(settings):
+    """Route eligible reads to the mirrored replica connection"""
+    settings.DATABASE_REPLICAS = ['replica']
+    replicas.reset_replica_health()
+    yield
+    replicas.reset_replica_health()
+
+
+def capture(alias):
+    return CaptureQueriesContext(connections[alias])
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestReplicaRouting:
+    """Test suite for ReplicaRouter and ReadYourWritesMiddleware"""
+
+    def test_list_reads_from_replica(self, api_client, editor_user, asset):
+        """Test that asset lists are served by the replica"""
+        api_client.force_authenticate(user=editor_user)
+
+        with capture('default') as primary, capture('replica') as replica:
+            response = api_client.get(reverse('asset-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 1
+        assert len(replica.captured_queries) > 0
+        assert not any('assets' in query['sql'] for query in primary.captured_queries)
+
+    def test_reads_outside_marked_views_use_primary(self, editor_user, asset):
+        """Test that ordinary ORM reads are not routed to the replica"""
+        with capture('replica') as replica:
+            assert Asset.objects.count() == 1
+
+        assert len(replica.captured_queries) == 0
+
+    def test_write_pins_reads_to_primary(self, api_client, editor_user, asset):
+        """Test read-your-writes after an update"""
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.patch(reverse('asset-detail', args=[asset.asset_id]), {'title': 'Renamed'})
+        assert response.status_code == status.HTTP_200_OK
+        assert replicas.PIN_COOKIE in response.cookies
+
+        # Token clients may not send the cookie back; the per-user pin still applies
+        api_client.cookies.clear()
+        with capture('replica') as replica:
+            response = api_client.get(reverse('asset-detail', args=[asset.asset_id]))
+
+        assert response.data['title'] == 'Renamed'
+        assert len(replica.captured_queries) == 0
+
+    def test_unhealthy_replica_falls_back_to_primary(self, api_client, editor_user, asset, monkeypatch):
+        """Test that a failing health check sends reads to the primary"""
+        def broken():
+            raise DatabaseError('replica down')
+        monkeypatch.setattr(connections['replica'], 'cursor', broken)
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('search_assets'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert replicas.replica_is_healthy('replica') is False
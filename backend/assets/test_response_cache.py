@@ -0,0 +1,148 @@
+"""
+Tests for cached asset list and detail responses
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset, Metadata
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user():
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+@pytest.fixture
+def asset(editor_user):
+    """Create test asset"""
+    file = SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg")
+    return Asset.objects.create(user=editor_user, file=file, title="Test Asset", file_type="image")
+
+
+def titles(response):
+    return [item['title'] for item in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestAssetListCache:
+    """Test suite for the cached asset list"""
+
+    def test_repeat_request_skips_database(self, api_client, viewer_user, asset, django_assert_num_queries):
+        """Test that a repeated page, with parameters in any order, is served from cache"""
+        api_client.force_authenticate(user=viewer_user)
+        url = reverse('asset-list')
+        first = api_client.get(f'{url}?file_type=image&ordering=-created_at')
+
+        with django_assert_num_queries(0):
+            second = api_client.get(f'{url}?ordering=-created_at&file_type=image')
+
+        assert second.data == first.data
+
+    def test_asset_edit_invalidates_lists(self, api_client, viewer_user, asset):
+        """Test that saving an asset bumps the generation"""
+        api_client.force_authenticate(user=viewer_user)
+        api_client.get(reverse('asset-list'))
+
+        asset.title = "Renamed"
+        asset.save()
+
+        assert titles(api_client.get(reverse('asset-list'))) == ["Renamed"]
+
+    def test_deactivation_removes_from_viewer_list(self, api_client, viewer_user, asset):
+        """Test that an asset leaving the active set invalidates viewer pages"""
+        api_client.force_authenticate(user=viewer_user)
+        api_client.get(reverse('asset-list'))
+
+        asset = Asset.objects.get(pk=asset.pk)
+        asset.is_active = False
+        asset.save()
+
+        assert titles(api_client.get(reverse('asset-list'))) == []
+
+    def test_owner_profile_change_invalidates_lists(self, api_client, viewer_user, editor_user, asset):
+        """Test that a cached page embedding the owner is rebuilt when the owner's name changes"""
+        api_client.force_authenticate(user=viewer_user)
+        api_client.get(reverse('asset-list'))
+
+        editor_user.first_name = "Renamed"
+        editor_user.save()
+
+        assert api_client.get(reverse('asset-list')).data['results'][0]['user']['first_name'] == "Renamed"
+
+    def test_account_maintenance_keeps_cache(self, api_client, viewer_user, editor_user, asset,
+                                             django_assert_num_queries):
+        """Test that password changes and deactivations don't invalidate cached pages"""
+        api_client.force_authenticate(user=viewer_user)
+        api_client.get(reverse('asset-list'))
+
+        editor_user.set_password('newpass12345')
+        editor_user.save()
+        User.objects.get(pk=viewer_user.pk).save(update_fields=['is_active'])
+
+        with django_assert_num_queries(0):
+            api_client.get(reverse('asset-list'))
+
+    def test_editors_do_not_share_pages(self, api_client, editor_user, asset):
+        """Test that an editor's own inactive assets stay out of other editors' pages"""
+        Asset.objects.filter(pk=asset.pk).update(is_active=False)
+        other = User.objects.create_user(username='other', password='otherpass123', role='editor')
+
+        api_client.force_authenticate(user=editor_user)
+        assert titles(api_client.get(reverse('asset-list'))) == ["Test Asset"]
+
+        api_client.force_authenticate(user=other)
+        assert titles(api_client.get(reverse('asset-list'))) == []
+
+
+@pytest.mark.django_db
+class TestAssetDetailCache:
+    """Test suite for the cached asset detail"""
+
+    def test_metadata_change_invalidates_detail(self, api_client, editor_user, asset):
+        """Test that child rows bump the parent asset's generation"""
+        api_client.force_authenticate(user=editor_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        api_client.get(url)
+
+        Metadata.objects.create(asset=asset, field_name='camera', field_value='X100')
+
+        assert api_client.get(url).data['metadata_fields'][0]['field_name'] == 'camera'
+
+    def test_owner_profile_change_invalidates_detail(self, api_client, viewer_user, editor_user, asset):
+        """Test that a cached detail checks the embedded owner's counter"""
+        api_client.force_authenticate(user=viewer_user)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        api_client.get(url)
+
+        editor_user.last_name = "Renamed"
+        editor_user.save(update_fields=['last_name'])
+
+        assert api_client.get(url).data['user']['last_name'] == "Renamed"
+
+    def test_cached_detail_respects_visibility(self, api_client, editor_user, viewer_user, asset):
+        """Test that a detail cached for the owner isn't served to a viewer"""
+        Asset.objects.filter(pk=asset.pk).update(is_active=False)
+        url = reverse('asset-detail', args=[asset.asset_id])
+        api_client.force_authenticate(user=editor_user)
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        api_client.force_authenticate(user=viewer_user)
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,137 @@
+"""
+Tests for saved searches and their incrementally maintained result sets
+"""
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset, SavedSearch, SavedSearchResult
+from assets.saved_searches import refresh_asset
+from assets.search import search_queryset
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user(db):
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def viewer_user(db):
+    """Create viewer user"""
+    return User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+
+
+def make_asset(user, title, file_type='image', **kwargs):
+    return Asset.objects.create(
+        user=user, title=title, file_type=file_type,
+        file=SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg"), **kwargs
+    )
+
+
+def result_ids(search):
+    return set(SavedSearchResult.objects.filter(search=search).values_list('asset_id', flat=True))
+
+
+@pytest.mark.django_db
+class TestSavedSearchViews:
+    """Test suite for the saved search endpoints"""
+
+    def test_create_materializes_and_results_are_a_lookup(self, api_client, editor_user, viewer_user):
+        """Test that the result set is stored on create and served from it"""
+        match = make_asset(editor_user, "Spring campaign", tags=['print', 'brand'])
+        make_asset(editor_user, "Spring campaign video", file_type='video', tags=['print', 'brand'])
+        make_asset(editor_user, "Spring campaign draft", tags=['print'])
+        api_client.force_authenticate(user=viewer_user)
+
+        response = api_client.post(reverse('saved-search-list'), {
+            'name': 'Brand print', 'query': 'campaign', 'file_type': 'image', 'tags': ['brand', ' print '],
+        }, format='json')
+        assert response.status_code == 201
+        assert response.data['result_count'] == 1
+        assert response.data['tags'] == ['brand', 'print']
+        search = SavedSearch.objects.get(pk=response.data['search_id'])
+        assert result_ids(search) == {match.asset_id}
+
+        # Assets matching now but not materialized stay out: opening doesn't re-run the query
+        make_asset(editor_user, "Spring campaign banner", tags=['print', 'brand'])
+        response = api_client.get(reverse('saved-search-results', args=[search.pk]))
+        assert [row['asset_id'] for row in response.data['results']] == [str(match.asset_id)]
+
+    def test_validation_and_ownership(self, api_client, editor_user, viewer_user):
+        """Test required criteria, unique names, re-materializing on edit and per-user visibility"""
+        make_asset(editor_user, "Logo", file_type='image')
+        api_client.force_authenticate(user=viewer_user)
+        url = reverse('saved-search-list')
+
+        assert api_client.post(url, {'name': 'Everything'}, format='json').status_code == 400
+        created = api_client.post(url, {'name': 'Videos', 'file_type': 'video'}, format='json')
+        assert created.data['result_count'] == 0
+        assert api_client.post(url, {'name': 'Videos', 'query': 'x'}, format='json').status_code == 400
+
+        detail = reverse('saved-search-detail', args=[created.data['search_id']])
+        response = api_client.patch(detail, {'file_type': 'image'}, format='json')
+        assert response.data['result_count'] == 1
+
+        api_client.force_authenticate(user=editor_user)
+        assert api_client.get(detail).status_code == 404
+        assert api_client.get(url).data['results'] == []
+
+
+@pytest.mark.django_db
+class TestSavedSearchMaintenance:
+    """Test suite for the per-asset incremental updates"""
+
+    def test_changes_since_last_visit(self, api_client, editor_user, viewer_user, django_capture_on_commit_callbacks):
+        """Test entries, exits, deletions, net changes and clearing on visit"""
+        leaving = make_asset(editor_user, "Launch poster", tags=['launch'])
+        deleted = make_asset(editor_user, "Launch banner", tags=['launch'])
+        api_client.force_authenticate(user=viewer_user)
+        search_id = api_client.post(reverse('saved-search-list'), {'name': 'Launch', 'tags': ['launch']},
+                                    format='json').data['search_id']
+        changes_url = reverse('saved-search-changes', args=[search_id])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            entered = make_asset(editor_user, "Launch video", tags=['launch', 'video'])
+            flicker = make_asset(editor_user, "Launch teaser", tags=['launch'])
+            flicker.tags = []
+            flicker.save()
+            leaving.is_active = False
+            leaving.save()
+            deleted_id = deleted.asset_id
+            deleted.delete()
+            make_asset(editor_user, "Unrelated")
+
+        response = api_client.get(changes_url)
+        assert response.data['entered'] == [entered.asset_id]
+        assert set(response.data['left']) == {leaving.asset_id, deleted_id}
+        assert result_ids(SavedSearch.objects.get(pk=search_id)) == {entered.asset_id}
+
+        api_client.get(reverse('saved-search-results', args=[search_id]))
+        response = api_client.get(changes_url)
+        assert (response.data['entered'], response.data['left']) == ([], [])
+        assert response.data['since'] is not None
+
+    def test_incremental_text_matches_agree_with_the_query(self, editor_user):
+        """Test that per-asset checks of a text query give the same set as running it"""
+        search = SavedSearch.objects.create(user=editor_user, name='Brochures', query='brochure')
+        assets = [
+            make_asset(editor_user, "Spring brochure"),
+            make_asset(editor_user, "Brochures 2024"),
+            make_asset(editor_user, "Poster", description="Goes with the brochure"),
+            make_asset(editor_user, "Team photo"),
+        ]
+        for asset in assets:
+            refresh_asset(asset.asset_id)
+
+        assert result_ids(search) == set(search_queryset('brochure').values_list('pk', flat=True))
+        assert len(result_ids(search)) == 3
@@ -0,0 +1,177 @@
+"""
+Tests for the pluggable search backends and the BM25 inverted index
+"""
+import io
+import uuid
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset, Metadata
+from assets.search import get_search_backend
+from assets.search import inverted_index as inverted_index_module
+from assets.search.inverted_index import InvertedIndex, InvertedIndexBackend
+
+User = get_user_model()
+
+INVERTED_INDEX = 'assets.search.inverted_index.InvertedIndexBackend'
+
+
+def doc(title='', description='', tags='', metadata=''):
+    return {'title': title, 'description': description, 'tags': tags, 'metadata': metadata}
+
+
+class TestInvertedIndex:
+    """Test suite for the in-memory index structure"""
+
+    def test_bm25_ranks_title_over_description(self):
+        """Test that weighted fields and every-word matching shape the results"""
+        index = InvertedIndex()
+        title, described, partial = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        index.add(described, doc('Quarterly report', description='spring brochure draft'))
+        index.add(title, doc('Spring brochure'))
+        index.add(partial, doc('Spring campaign'))
+
+        assert [key for key, _ in index.search('Brochure SPRING')] == [title, described]
+        assert index.search('brochure autumn') == []
+
+    def test_replace_remove_and_snapshot_round_trip(self):
+        """Test that stale postings are skipped, then dropped when written"""
+        index = InvertedIndex()
+        kept, removed = uuid.uuid4(), uuid.uuid4()
+        index.add(kept, doc('old title'))
+        index.add(kept, doc('new title'))
+        index.add(removed, doc('new poster'))
+        index.remove(removed)
+        assert [key for key, _ in index.search('new')] == [kept]
+        assert index.search('old') == []
+
+        stream = io.BytesIO()
+        epoch = uuid.uuid4()
+        index.write(stream, epoch)
+        stream.seek(0)
+        loaded, loaded_epoch = InvertedIndex.read(stream)
+
+        assert loaded_epoch == epoch
+        assert loaded.doc_keys == [kept]
+        assert sorted(loaded.postings) == ['new', 'title']
+        assert loaded.search('new title') == index.search('new title')
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user(db):
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def inverted_index(tmp_path):
+    """Switch search to the inverted index in a temporary directory"""
+    with override_settings(ASSET_SEARCH_BACKEND=INVERTED_INDEX, ASSET_SEARCH_INDEX_DIR=str(tmp_path)):
+        yield tmp_path
+
+
+def make_asset(user, title, **kwargs):
+    return Asset.objects.create(
+        user=user, title=title, file_type='image',
+        file=SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg"), **kwargs
+    )
+
+
+@pytest.mark.django_db
+class TestInvertedIndexBackend:
+    """Test suite for the persisted index behind the search endpoints"""
+
+    def test_search_endpoints_use_the_index(self, api_client, editor_user, inverted_index,
+                                            django_capture_on_commit_callbacks):
+        """Test incremental indexing of assets and metadata, ranked search and list filtering"""
+        # Index before the first change so every later one goes through the journal
+        assert get_search_backend().search(Asset.objects.all(), 'brochure').count() == 0
+        with django_capture_on_commit_callbacks(execute=True):
+            brochure = make_asset(editor_user, "Spring brochure", tags=['print'])
+            mention = make_asset(editor_user, "Poster", description="Matches the spring brochure layout")
+            other = make_asset(editor_user, "Team photo")
+            Metadata.objects.create(asset=other, field_name='campaign', field_value='Brochure shoot')
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('search_assets'), {'q': 'brochure spring'})
+        assert [row['asset_id'] for row in response.data] == [str(brochure.asset_id), str(mention.asset_id)]
+
+        response = api_client.get(reverse('asset-list'), {'search': 'shoot'})
+        assert [row['asset_id'] for row in response.data['results']] == [str(other.asset_id)]
+
+        deleted = brochure.asset_id
+        assert deleted in get_search_backend()._sync().doc_numbers
+        with django_capture_on_commit_callbacks(execute=True):
+            brochure.delete()
+        assert deleted not in get_search_backend()._sync().doc_numbers
+
+    def test_other_workers_replay_the_journal(self, editor_user, inverted_index, settings,
+                                              django_capture_on_commit_callbacks):
+        """Test that a second process sees changes and checkpoints fold the journal"""
+        worker = InvertedIndexBackend(inverted_index)
+        with django_capture_on_commit_callbacks(execute=True):
+            make_asset(editor_user, "Spring brochure")
+        assert worker.search(Asset.objects.all(), 'brochure').count() == 1
+
+        settings.ASSET_SEARCH_JOURNAL_MAX_BYTES = 0
+        with django_capture_on_commit_callbacks(execute=True):
+            late = make_asset(editor_user, "Autumn brochure")
+
+        assert (inverted_index / 'assets.journal').read_text().count('\n') == 1  # header only
+        assert set(worker.search(Asset.objects.all(), 'brochure').values_list('pk', flat=True)) \
+            == set(Asset.objects.values_list('pk', flat=True))
+        assert late.pk in worker._index.doc_numbers
+
+    def test_rebuild_command(self, editor_user, inverted_index):
+        """Test that rebuilding picks up rows written without signals"""
+        asset = make_asset(editor_user, "Spring brochure")
+        Asset.objects.filter(pk=asset.pk).update(title="Winter catalogue")
+
+        call_command('rebuild_search_index', stdout=io.StringIO())
+
+        backend = get_search_backend()
+        assert backend.search(Asset.objects.all(), 'brochure').count() == 0
+        assert backend.search(Asset.objects.all(), 'catalogue').get() == asset
+
+    @pytest.mark.parametrize('candidate_batch', [500, 1])
+    def test_result_cap_applies_after_the_queryset(self, editor_user, inverted_index, monkeypatch,
+                                                   candidate_batch):
+        """Test more matches than MAX_RESULTS never crowd out the ones the queryset allows"""
+        monkeypatch.setattr(inverted_index_module, 'MAX_RESULTS', 2)
+        monkeypatch.setattr(inverted_index_module, 'CANDIDATE_BATCH', candidate_batch)
+        for _ in range(3):
+            make_asset(editor_user, "Brochure brochure brochure", is_active=False)
+        weak = make_asset(editor_user, "Brochure", description="filler words for a longer document")
+        strong = make_asset(editor_user, "Brochure brochure")
+        backend = get_search_backend()
+        backend.rebuild()
+
+        active = backend.search(Asset.objects.filter(is_active=True), 'brochure')
+        assert list(active.order_by('-relevance').values_list('pk', flat=True)) == [strong.pk, weak.pk]
+        assert backend.search(Asset.objects.filter(pk=weak.pk), 'brochure').exists()
+        assert backend.search(Asset.objects.all(), 'brochure').count() == 2
+
+    def test_many_matches_fit_one_statement(self, editor_user, inverted_index):
+        """Test MAX_RESULTS matches stay within SQLite's bound-parameter limit"""
+        Asset.objects.bulk_create(
+            Asset(user=editor_user, file=f'assets/{number}.jpg', title=f"Brochure {number}", file_type='image')
+            for number in range(inverted_index_module.MAX_RESULTS + 1)
+        )
+        backend = get_search_backend()
+        backend.rebuild()
+
+        results = backend.search(Asset.objects.all(), 'brochure')
+
+        assert results.count() == inverted_index_module.MAX_RESULTS
+        _, params = results.order_by('-relevance').query.sql_with_params()
+        assert len(params) < 10
@@ -0,0 +1,115 @@
+"""
+Tests for the normalized tag tables and tag autocomplete
+"""
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from assets.models import Asset, AssetTag, Tag
+from assets.tags import tag_index
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user(db):
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+def make_asset(user, tags, **kwargs):
+    return Asset.objects.create(
+        user=user, title="Tagged", file_type="image", tags=tags,
+        file=SimpleUploadedFile("test.jpg", b"file_content", content_type="image/jpeg"), **kwargs
+    )
+
+
+def usage():
+    return dict(Tag.objects.values_list('name', 'usage_count'))
+
+
+@pytest.mark.django_db
+class TestTagSync:
+    """Test suite for keeping Tag and AssetTag in step with Asset.tags"""
+
+    def test_create_links_and_counts(self, editor_user):
+        """Test that saving an asset creates tags, links and counts"""
+        asset = make_asset(editor_user, ['spring', ' Campaign ', 'spring', ''])
+        make_asset(editor_user, ['spring'])
+
+        assert usage() == {'spring': 2, 'Campaign': 1}
+        assert set(AssetTag.objects.filter(asset=asset).values_list('tag__name', flat=True)) == {'spring', 'Campaign'}
+
+    def test_edit_deactivate_and_delete(self, editor_user):
+        """Test that counts follow tag edits, soft deletes and hard deletes"""
+        asset = make_asset(editor_user, ['spring', 'hero'])
+        other = make_asset(editor_user, ['spring'])
+
+        asset.tags.remove('hero')
+        asset.tags.append('final')
+        asset.save()
+        assert usage() == {'spring': 2, 'hero': 0, 'final': 1}
+
+        other.is_active = False
+        other.save()
+        assert usage()['spring'] == 1
+
+        asset.delete()
+        assert usage() == {'spring': 0, 'hero': 0, 'final': 0}
+        assert not AssetTag.objects.filter(tag__name='final').exists()
+
+    def test_rebuild_repairs_bulk_updates(self, editor_user):
+        """Test that the rebuild command catches changes that bypassed signals"""
+        asset = make_asset(editor_user, ['spring'])
+        Asset.objects.filter(pk=asset.pk).update(tags=['autumn'])
+
+        call_command('rebuild_tags')
+
+        assert usage() == {'spring': 0, 'autumn': 1}
+
+
+@pytest.mark.django_db
+class TestTagAutocomplete:
+    """Test suite for GET /api/assets/tags/"""
+
+    def test_prefix_matches_most_used_first(self, api_client, editor_user):
+        """Test case-insensitive prefix matching ordered by usage"""
+        make_asset(editor_user, ['Spring', 'sports'])
+        make_asset(editor_user, ['sports', 'summer'])
+        make_asset(editor_user, ['spa'], is_active=False)
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('tag_autocomplete'), {'prefix': 'SP'})
+
+        assert response.data == [{'name': 'sports', 'count': 2}, {'name': 'Spring', 'count': 1}]
+
+    def test_index_reloads_after_change(self, api_client, editor_user, django_assert_num_queries):
+        """Test that the in-memory index is reused until a tag changes"""
+        make_asset(editor_user, ['spring'])
+        api_client.force_authenticate(user=editor_user)
+        tag_index.suggest('', 1)
+
+        with django_assert_num_queries(0):
+            assert tag_index.suggest('s', 5) == [('spring', 1)]
+
+        make_asset(editor_user, ['spring', 'summer'])
+        response = api_client.get(reverse('tag_autocomplete'), {'prefix': 's', 'limit': 1})
+        assert response.data == [{'name': 'spring', 'count': 2}]
+
+    def test_search_by_tag_uses_tag_table(self, api_client, editor_user):
+        """Test that search tag filters match through the normalized tables"""
+        tagged = make_asset(editor_user, ['spring', 'hero'])
+        make_asset(editor_user, ['spring'])
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('search_assets'), {'tags': ['spring', 'hero']})
+
+        assert [row['asset_id'] for row in response.data] == [str(tagged.asset_id)]
@@ -1,6 +1,7 @@
 """
 Tests for Asset views and API endpoints
 """
+import uuid
 import pytest
 from django.urls import reverse
 from rest_framework import status
@@ -8,6 +9,7 @@ from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
 from assets.models import Asset, Metadata, AssetVersion
+from assets.views import ASSET_BATCH_MAX_IDS
 
 User = get_user_model()
 
@@ -123,6 +125,18 @@ class TestAssetListView:
         assert str(inactive_asset.asset_id) in asset_ids  # Own inactive
         assert str(other_asset.asset_id) in asset_ids  # Others' active
 
+    def test_editor_list_filters_and_orders(self, api_client, editor_user, asset, inactive_asset):
+        """Test that filtering and ordering still apply to the editor's combined list"""
+        file = SimpleUploadedFile("doc.pdf", b"content", content_type="application/pdf")
+        Asset.objects.create(user=editor_user, file=file, title="A Document", file_type="pdf")
+
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.get(reverse('asset-list'), {'file_type': 'image', 'ordering': 'title'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 2
+        assert [a['title'] for a in response.data['results']] == ['Inactive Asset', 'Test Asset']
+
     def test_unauthenticated_cannot_list_assets(self, api_client):
         """Test that unauthenticated user cannot list assets"""
         url = reverse('asset-list')
@@ -486,3 +500,123 @@ class TestPermissions:
             'file_type': 'image'
         }, format='multipart')
         assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestAssetChangeFeed:
+    """Test suite for the incremental sync change feed"""
+
+    def test_initial_sync_returns_visible_assets(self, api_client, viewer_user, asset, inactive_asset):
+        """Test that a full sync lists visible assets and a cursor"""
+        api_client.force_authenticate(user=viewer_user)
+        response = api_client.get(reverse('asset_changes'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [c['asset']['asset_id'] for c in response.data['changes']] == [str(asset.asset_id)]
+        assert int(response.data['cursor']) == inactive_asset.change_seq
+
+    def test_incremental_updates_in_commit_order(self, api_client, editor_user, asset):
+        """Test that only changes after the cursor are returned, oldest first"""
+        api_client.force_authenticate(user=editor_user)
+        cursor = api_client.get(reverse('asset_changes')).data['cursor']
+
+        file = SimpleUploadedFile("new.jpg", b"content", content_type="image/jpeg")
+        new_asset = Asset.objects.create(user=editor_user, file=file, title="New", file_type="image")
+        asset.title = "Renamed"
+        asset.save()
+
+        response = api_client.get(reverse('asset_changes'), {'since': cursor})
+
+        assert [c['asset']['title'] for c in response.data['changes']] == ['New', 'Renamed']
+        assert response.data['changes'][0]['asset']['asset_id'] == str(new_asset.asset_id)
+
+    def test_hard_and_soft_deletes_produce_tombstones(self, api_client, viewer_user, editor_user, asset):
+        """Test tombstones for deleted and deactivated assets"""
+        file = SimpleUploadedFile("gone.jpg", b"content", content_type="image/jpeg")
+        doomed = Asset.objects.create(user=editor_user, file=file, title="Gone", file_type="image")
+        api_client.force_authenticate(user=viewer_user)
+        cursor = api_client.get(reverse('asset_changes')).data['cursor']
+
+        doomed_id = str(doomed.asset_id)
+        doomed.delete()
+        asset.is_active = False
+        asset.save()
+
+        response = api_client.get(reverse('asset_changes'), {'since': cursor})
+
+        assert [(c['type'], c['asset_id']) for c in response.data['changes']] == [
+            ('delete', doomed_id),
+            ('delete', str(asset.asset_id)),
+        ]
+
+    def test_metadata_change_bumps_asset(self, api_client, editor_user, asset):
+        """Test that metadata edits surface the parent asset"""
+        api_client.force_authenticate(user=editor_user)
+        cursor = api_client.get(reverse('asset_changes')).data['cursor']
+
+        Metadata.objects.create(asset=asset, field_name='credit', field_value='Studio')
+        response = api_client.get(reverse('asset_changes'), {'since': cursor})
+
+        assert len(response.data['changes']) == 1
+        assert response.data['changes'][0]['asset']['metadata_fields'][0]['field_value'] == 'Studio'
+
+    def test_pagination(self, api_client, editor_user, asset, inactive_asset):
+        """Test has_more and limit"""
+        api_client.force_authenticate(user=editor_user)
+        response = api_client.get(reverse('asset_changes'), {'limit': 1})
+
+        assert len(response.data['changes']) == 1
+        assert response.data['has_more'] is True
+
+
+@pytest.mark.django_db
+class TestAssetBatch:
+    """Test suite for fetching many assets by id"""
+
+    def test_keeps_requested_order(self, api_client, viewer_user, asset, inactive_asset, django_assert_max_num_queries):
+        """Test that visible assets come back in request order, the rest as missing"""
+        other = Asset.objects.create(
+            user=asset.user, title="Other", file_type="image",
+            file=SimpleUploadedFile("other.jpg", b"file_content", content_type="image/jpeg"),
+        )
+        unknown = '00000000-0000-0000-0000-000000000000'
+        api_client.force_authenticate(user=viewer_user)
+        ids = [str(other.asset_id), unknown, str(inactive_asset.asset_id), str(asset.asset_id)]
+
+        with django_assert_max_num_queries(3):
+            response = api_client.get(reverse('asset-batch'), {'ids': ','.join(ids)})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['asset_id'] for row in response.data['results']] == [str(other.asset_id), str(asset.asset_id)]
+        assert response.data['missing'] == [unknown, str(inactive_asset.asset_id)]
+
+    def test_post_body_and_owner_visibility(self, api_client, editor_user, asset, inactive_asset):
+        """Test that ids can be posted and editors see their own inactive assets"""
+        api_client.force_authenticate(user=editor_user)
+        ids = [str(inactive_asset.asset_id), str(asset.asset_id), str(inactive_asset.asset_id)]
+
+        response = api_client.post(reverse('asset-batch'), {'ids': ids}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['asset_id'] for row in response.data['results']] == ids[:2]
+        assert response.data['missing'] == []
+
+    def test_rejects_invalid_and_oversized_batches(self, api_client, editor_user):
+        """Test that malformed ids and batches over the limit are refused"""
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('asset-batch'), {'ids': 'not-a-uuid'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['ids'] == ['not-a-uuid']
+
+        ids = [str(uuid.uuid4()) for _ in range(ASSET_BATCH_MAX_IDS + 1)]
+        response = api_client.post(reverse('asset-batch'), {'ids': ids}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        # Counted as sent, before parsing or removing duplicates
+        ids = [str(uuid.uuid4())] * (ASSET_BATCH_MAX_IDS + 1)
+        response = api_client.post(reverse('asset-batch'), {'ids': ids}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = api_client.post(reverse('asset-batch'), [str(uuid.uuid4())], format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -1,13 +1,17 @@
-from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from . import views
-
-router = DefaultRouter()
-router.register(r'assets', views.AssetViewSet, basename='asset')
-router.register(r'metadata', views.MetadataViewSet, basename='metadata')
-
-urlpatterns = [
-    path('', include(router.urls)),
-    path('upload/', views.upload_asset, name='upload_asset'),
-    path('search/', views.search_assets, name='search_assets'),
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'assets', views.AssetViewSet, basename='asset')
+router.register(r'metadata', views.MetadataViewSet, basename='metadata')
+router.register(r'saved-searches', views.SavedSearchViewSet, basename='saved-search')
+router.register(r'collections', views.CollectionViewSet, basename='collection')
+
+urlpatterns = [
+    path('', include(router.urls)),
+    path('upload/', views.upload_asset, name='upload_asset'),
+    path('search/', views.search_assets, name='search_assets'),
+    path('changes/', views.asset_changes, name='asset_changes'),
+    path('tags/', views.tag_autocomplete, name='tag_autocomplete'),
 ]
\ No newline at end of file
@@ -1,13 +1,102 @@
+import csv
+import heapq
+import itertools
+import uuid
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.viewsets import ModelViewSet
-from django.db.models import Q
-from .models import Asset, Metadata, AssetVersion
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from ShelfLifeDAM.replicas import replica_reads
+from . import response_cache
+from .compound import Included, list_payload, wants_sideload
+from .etags import (Conflict, PreconditionFailed, asset_etag, asset_matches, is_not_modified, list_etag,
+                    not_modified_response)
+from .facets import cached_facet_counts, facet_counts, requested_facets
+from .filters import RANKED_ORDERINGS, AssetOrderingFilter, AssetQueryFilter, AssetSearchFilter
+from .collections import add_assets, delete_collection, remove_assets, subtree_range
+from .fuzzy import suggest
+from .models import Asset, AssetModified, Collection, Metadata, AssetVersion, AssetTombstone, RelatedAsset, \
+    SavedSearch
+from .saved_searches import changes_since_visit, mark_viewed, materialize
 from .serializers import AssetSerializer, AssetCreateSerializer, AssetUpdateSerializer, MetadataSerializer, \
-    AssetVersionSerializer
+    AssetVersionSerializer, CollectionSerializer, CompoundAssetSerializer, SavedSearchSerializer
+from .query import compile_query, from_query_params, parse_filter
+from .search import search_queryset
+from .search.snippets import add_snippets
+from .tags import normalize_tags, tag_index
+
+
+def editor_visible_assets(queryset, user):
+    """
+    Restrict an already filtered/ordered queryset to what an editor may see.
+
+    Equivalent to ``Q(user=user) | Q(is_active=True)`` but expressed as a
+    UNION ALL of two disjoint ordered range scans - active assets, and the
+    editor's own inactive assets - each served by a partial index, so the
+    database can merge them instead of sorting the whole table.
+    """
+    ordering = queryset.query.order_by or Asset._meta.ordering
+    base = queryset.order_by()
+    active = base.filter(is_active=True)
+    own_inactive = base.filter(user=user, is_active=False)
+    return active.union(own_inactive, all=True).order_by(*ordering)
+
+
+ASSET_BATCH_MAX_IDS = 100
+
+# Query parameters that change how a list is presented but not which assets are in it
+LIST_PRESENTATION_PARAMS = {'page', 'page_size', 'ordering', 'format', 'sideload', 'facets'}
+
+EXPORT_COLUMNS = ('asset_id', 'title', 'file_type', 'mime_type', 'file_size', 'version', 'tags', 'user__username',
+                  'is_active', 'created_at', 'updated_at')
+
+BULK_MAX_ASSETS = 500
+BULK_ACTIONS = ('activate', 'deactivate', 'add_tags', 'remove_tags')
+
+
+def parse_asset_ids(raw_ids, limit, field='ids'):
+    """
+    (ids, None) for a list of at most ``limit`` asset ids, as UUIDs without
+    duplicates in request order; (None, a 400 response) otherwise. The size
+    is checked before any parsing.
+    """
+    if not isinstance(raw_ids, list):
+        return None, Response({'error': f'{field} must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(raw_ids) > limit:
+        return None, Response({'error': f'At most {limit} ids per request'}, status=status.HTTP_400_BAD_REQUEST)
+    ids, invalid = {}, []
+    for raw_id in raw_ids:
+        try:
+            ids[uuid.UUID(str(raw_id).strip())] = None
+        except ValueError:
+            invalid.append(raw_id)
+    if invalid:
+        return None, Response({'error': 'Invalid asset ids', 'ids': invalid}, status=status.HTTP_400_BAD_REQUEST)
+    return list(ids), None
+
+
+def wants_explain(request):
+    return request.query_params.get('explain', '').lower() in ('1', 'true', 'yes')
+
+
+def explain_response(request, queryset):
+    """The SQL for a filtered queryset and the database's plan for it; admins only"""
+    if not request.user.is_admin:
+        return Response({'error': 'Only admins can explain queries'}, status=status.HTTP_403_FORBIDDEN)
+    return Response({'sql': str(queryset.query), 'plan': queryset.explain()})
+
+
+class _Echo:
+    """Write target for csv.writer that hands each formatted row back instead of buffering it"""
+
+    def write(self, value):
+        return value
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -22,9 +111,7 @@ class IsEditorOrAdmin(permissions.BasePermission):
 
 class AssetViewSet(ModelViewSet):
     serializer_class = AssetSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['file_type', 'user', 'is_active']
-    search_fields = ['title', 'description', 'tags']
+    filter_backends = [AssetQueryFilter, AssetSearchFilter, AssetOrderingFilter]
     ordering_fields = ['created_at', 'updated_at', 'file_size', 'title']
     ordering = ['-created_at']
 
@@ -37,6 +124,250 @@ class AssetViewSet(ModelViewSet):
         else:  # viewer
             return Asset.objects.filter(is_active=True)
 
+    def filter_queryset(self, queryset):
+        user = self.request.user
+        if self.action == 'list' and user.is_editor and not user.is_admin:
+            # The OR in get_queryset can't use an ordered index, so lists are built
+            # from the two disjoint halves instead (see editor_visible_assets)
+            return editor_visible_assets(super().filter_queryset(Asset.objects.all()), user)
+        return super().filter_queryset(queryset)
+
+    @replica_reads
+    def list(self, request, *args, **kwargs):
+        if wants_explain(request):
+            return explain_response(request, self.filter_queryset(self.get_queryset()))
+        cache_key = response_cache.list_cache_key(request)
+        cached = cache.get(cache_key)
+        if cached is None or not response_cache.users_unchanged(cached[0]):
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            assets = page if page is not None else list(queryset)
+            facet_names = requested_facets(request)
+            facets = self.facet_counts(facet_names) if facet_names else None
+            embedded = response_cache.embedded_users(assets)
+            etag = list_etag(assets, embedded, self.paginator.page.paginator.count if page is not None else None,
+                             facets)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+            # Prefetch on the page itself: works for UNION querysets too
+            prefetch_related_objects(assets, 'user', 'metadata_fields', 'versions__created_by')
+            included = None
+            if wants_sideload(request):
+                included = Included(self.get_serializer_context())
+                for asset in assets:
+                    included.add_user(asset.user)
+                    included.add_versions(asset)
+                serializer = CompoundAssetSerializer(assets, many=True, context=self.get_serializer_context())
+            else:
+                serializer = self.get_serializer(assets, many=True)
+            data = list_payload(self, page, serializer.data, included)
+            if facets is not None:
+                data = data if isinstance(data, dict) else {'results': data}
+                data['facets'] = facets
+            cached = (embedded, etag, data)
+            cache.set(cache_key, cached, settings.ASSET_RESPONSE_CACHE_TTL)
+        _, etag, data = cached
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return Response(data, headers={'ETag': etag})
+
+    @replica_reads
+    def retrieve(self, request, *args, **kwargs):
+        cache_key = response_cache.detail_cache_key(request, kwargs[self.lookup_field])
+        cached = cache.get(cache_key)
+        if (cached is None or not can_view_asset(request.user, cached[0])
+                or not response_cache.users_unchanged(cached[1])):
+            instance = self.get_object()
+            embedded = response_cache.embedded_users([instance])
+            etag = asset_etag(instance, embedded)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+            scope = response_cache.AssetScope(instance.user_id, instance.is_active)
+            cached = (scope, embedded, etag, self.get_serializer(instance).data)
+            cache.set(cache_key, cached, settings.ASSET_RESPONSE_CACHE_TTL)
+        _, _, etag, data = cached
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return Response(data, headers={'ETag': etag})
+
+    def facet_counts(self, names):
+        # Facets are aggregates, so they are taken over the plain filtered queryset
+        # rather than the UNION that editor lists page through
+        queryset = super().filter_queryset(self.get_queryset())
+        if self.request.query_params.keys() <= LIST_PRESENTATION_PARAMS:
+            partition, generation_names = response_cache.visibility_class(self.request.user)
+            return cached_facet_counts(queryset, names, partition, generation_names)
+        return facet_counts(queryset, names)
+
+    @action(detail=False, methods=['get', 'post'])
+    @replica_reads
+    def batch(self, request):
+        """
+        Fetch many assets by id in one request.
+
+        Ids come from ``?ids=a,b,c`` or a JSON body ``{"ids": [...]}``, at most
+        ASSET_BATCH_MAX_IDS per call. Results keep the requested order; ids that
+        don't exist or that the caller may not see are listed under ``missing``,
+        just as the detail endpoint answers 404 for both.
+        """
+        if request.method == 'POST':
+            if not isinstance(request.data, dict):
+                return Response({'error': 'Expected a JSON object with ids'}, status=status.HTTP_400_BAD_REQUEST)
+            raw_ids = request.data.get('ids', [])
+        else:
+            raw_ids = [value for param in request.query_params.getlist('ids') for value in param.split(',')]
+        ids, error = parse_asset_ids(raw_ids, ASSET_BATCH_MAX_IDS)
+        if error is not None:
+            return error
+
+        found = {
+            asset.asset_id: asset
+            for asset in Asset.objects.filter(asset_id__in=ids)
+            .select_related('user')
+            .prefetch_related('metadata_fields', 'versions__created_by')
+        }
+        assets = [found[asset_id] for asset_id in ids
+                  if asset_id in found and can_view_asset(request.user, found[asset_id])]
+        visible = {asset.asset_id for asset in assets}
+
+        included = None
+        if wants_sideload(request):
+            included = Included(self.get_serializer_context())
+            for asset in assets:
+                included.add_user(asset.user)
+                included.add_versions(asset)
+            serializer = CompoundAssetSerializer(assets, many=True, context=self.get_serializer_context())
+        else:
+            serializer = AssetSerializer(assets, many=True, context=self.get_serializer_context())
+        data = {'results': serializer.data, 'missing': [str(asset_id) for asset_id in ids if asset_id not in visible]}
+        if included is not None:
+            data['included'] = included.data
+        return Response(data)
+
+    @action(detail=True, methods=['get'])
+    @replica_reads
+    def related(self, request, pk=None):
+        """
+        The asset's precomputed related assets (assets.related), best first,
+        each with its similarity ``score``. Empty until the job has run.
+        """
+        asset = self.get_object()
+        links = [
+            link for link in RelatedAsset.objects.filter(asset=asset).select_related('related').order_by('-score')
+            if can_view_asset(request.user, link.related)
+        ]
+        assets = [link.related for link in links]
+        prefetch_related_objects(assets, 'user', 'metadata_fields', 'versions__created_by')
+        results = AssetSerializer(assets, many=True, context=self.get_serializer_context()).data
+        for row, link in zip(results, links):
+            row['score'] = link.score
+        return Response({'results': results})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        The asset list as CSV, streamed: the same assets, in the same order,
+        for the same query parameters (assets.query, ``search``, ``ordering``).
+        """
+        rows = self.filter_queryset(self.get_queryset()).values_list(*EXPORT_COLUMNS).iterator(chunk_size=1000)
+        writer = csv.writer(_Echo())
+        lines = (writer.writerow(self.export_row(row)) for row in itertools.chain([None], rows))
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="assets.csv"'
+        return response
+
+    @staticmethod
+    def export_row(row):
+        if row is None:
+            return [column.split('__')[0] for column in EXPORT_COLUMNS]
+        values = dict(zip(EXPORT_COLUMNS, row))
+        values['tags'] = ', '.join(normalize_tags(values['tags']))
+        values['created_at'] = values['created_at'].isoformat()
+        values['updated_at'] = values['updated_at'].isoformat()
+        return list(values.values())
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Apply one change to every asset matching a query.
+
+        Body: ``{"filter": {...}, "action": "activate" | "deactivate" |
+        "add_tags" | "remove_tags", "tags": [...]}``. Editors change only their
+        own assets. At most BULK_MAX_ASSETS assets per call, all or none. Each
+        asset is saved on its own so its signals and caches see the change;
+        the log rows go in as one insert and are announced to the activity
+        feeds afterwards.
+        """
+        operation = request.data.get('action')
+        if operation not in BULK_ACTIONS:
+            return Response({'error': f"action must be one of {', '.join(BULK_ACTIONS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        tags = request.data.get('tags', [])
+        if operation in ('add_tags', 'remove_tags'):
+            if not isinstance(tags, list) or not tags or not all(isinstance(tag, str) for tag in tags):
+                return Response({'error': 'tags must be a non-empty list of tag names'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            tags = normalize_tags(tags)
+        tree = parse_filter(request.data.get('filter'))
+        if tree is None:
+            # Never "everything" by omission
+            return Response({'error': 'filter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        assets = Asset.objects.filter(compile_query(tree))
+        if not request.user.is_admin:
+            assets = assets.filter(user=request.user)
+        assets = list(assets.order_by('created_at')[:BULK_MAX_ASSETS + 1])
+        if len(assets) > BULK_MAX_ASSETS:
+            return Response({'error': f'The filter matches more than {BULK_MAX_ASSETS} assets; narrow it down'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        from activity.models import ActivityLog
+        from activity.signals import announce_activity
+        changed = []
+        with transaction.atomic():
+            for asset in assets:
+                changes = self.apply_bulk_action(asset, operation, tags)
+                if changes:
+                    asset.save(update_fields=[*changes, 'updated_at'])
+                    changed.append(ActivityLog(
+                        asset=asset,
+                        asset_owner_id=asset.user_id,  # save() would fill it in; bulk_create doesn't
+                        user=request.user,
+                        action='edit',
+                        details={'changes': changes, 'bulk': True},
+                        ip_address=self.get_client_ip(),
+                        user_agent=request.META.get('HTTP_USER_AGENT', '')
+                    ))
+            ActivityLog.objects.bulk_create(changed)
+            announce_activity(changed)
+        return Response({'matched': len(assets), 'changed': len(changed)})
+
+    @staticmethod
+    def apply_bulk_action(asset, operation, tags):
+        """Apply the change to the instance; returns {field: new value} for what changed"""
+        if operation in ('activate', 'deactivate'):
+            is_active = operation == 'activate'
+            if asset.is_active == is_active:
+                return {}
+            asset.is_active = is_active
+            return {'is_active': is_active}
+        current = normalize_tags(asset.tags)
+        if operation == 'add_tags':
+            updated = current + [tag for tag in tags if tag not in current]
+        else:
+            updated = [tag for tag in current if tag not in tags]
+        if updated == current:
+            return {}
+        asset.tags = updated
+        return {'tags': updated}
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            asset = self.updated_asset
+            response['ETag'] = asset_etag(asset, response_cache.embedded_users([asset]))
+        return response
+
     def get_serializer_class(self):
         if self.action == 'create':
             return AssetCreateSerializer
@@ -64,7 +395,21 @@ class AssetViewSet(ModelViewSet):
         )
 
     def perform_update(self, serializer):
-        asset = serializer.save()
+        instance = serializer.instance
+        if_match = self.request.headers.get('If-Match')
+        if if_match is not None:
+            if not asset_matches(if_match, instance):
+                raise PreconditionFailed()
+            # Re-checked by the UPDATE itself, so a write that lands after the check still loses
+            instance.guard_next_save(version=instance.version, updated_at=instance.updated_at)
+        elif 'file' in self.request.FILES:
+            # Two uploads must not both claim the next version number
+            instance.guard_next_save(version=instance.version)
+        try:
+            asset = serializer.save()
+        except AssetModified:
+            raise PreconditionFailed() if if_match is not None else Conflict()
+        self.updated_asset = asset
 
         # Log edit activity
         from activity.models import ActivityLog
@@ -104,7 +449,7 @@ class AssetViewSet(ModelViewSet):
         return ip
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk']:
             permission_classes = [permissions.IsAuthenticated, IsEditorOrAdmin]
         else:
             permission_classes = [permissions.IsAuthenticated]
@@ -124,43 +469,120 @@ def upload_asset(request):
 
 
 @api_view(['GET'])
+@replica_reads
 def search_assets(request):
     query = request.GET.get('q', '')
-    file_type = request.GET.get('file_type', '')
-    tags = request.GET.getlist('tags')
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
+    # file_type, tags, date_from, date_to and filter, as on the asset list (assets.query)
+    tree = from_query_params(request.query_params)
+
+    assets = search_queryset(query, tree)
+    ordering = request.GET.get('ordering', '')
+    if ordering in RANKED_ORDERINGS:
+        assets = assets.order_by(*RANKED_ORDERINGS[ordering])
+    if wants_explain(request):
+        return explain_response(request, assets)
+
+    facet_names = requested_facets(request)
+    results = AssetSerializer(
+        assets.select_related('user').prefetch_related('metadata_fields', 'versions__created_by'),
+        many=True, context={'request': request},
+    ).data
+    if query:
+        add_snippets(results, query)
+    suggestion = suggest(query) if query and not results else None
+    if not facet_names:
+        # Keeps the plain list shape; the suggestion travels in a header
+        headers = {'X-Search-Suggestion': suggestion} if suggestion else None
+        return Response(results, headers=headers)
+    if query or tree is not None:
+        facets = facet_counts(assets, facet_names)
+    else:
+        # Unfiltered search covers the same active assets as a viewer's list
+        facets = cached_facet_counts(assets, facet_names, 'viewer', ['public'])
+    return Response({'results': results, 'facets': facets, 'suggestion': suggestion})
 
-    assets = Asset.objects.filter(is_active=True)
 
-    if not request.user.is_admin:
-        if request.user.is_editor:
-            assets = assets.filter(Q(user=request.user) | Q(is_active=True))
-        else:  # viewer
-            assets = assets.filter(is_active=True)
+TAG_SUGGESTIONS = 10
+TAG_SUGGESTIONS_MAX = 50
 
-    if query:
-        assets = assets.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(tags__contains=[query])
-        )
 
-    if file_type:
-        assets = assets.filter(file_type=file_type)
+@api_view(['GET'])
+def tag_autocomplete(request):
+    """
+    Tags in use that start with ``prefix`` (case-insensitive), most used
+    first, with the number of active assets carrying each. Without a prefix
+    this lists the most used tags.
+    """
+    try:
+        limit = int(request.GET.get('limit', TAG_SUGGESTIONS))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, TAG_SUGGESTIONS_MAX))
+    suggestions = tag_index.suggest(request.GET.get('prefix', ''), limit)
+    return Response([{'name': name, 'count': count} for name, count in suggestions])
 
-    if tags:
-        for tag in tags:
-            assets = assets.filter(tags__contains=[tag])
 
-    if date_from:
-        assets = assets.filter(created_at__gte=date_from)
+def can_view_asset(user, asset):
+    """Object-level form of the AssetViewSet.get_queryset visibility rules"""
+    if user.is_admin:
+        return True
+    if user.is_editor and asset.user_id == user.id:
+        return True
+    return asset.is_active
 
-    if date_to:
-        assets = assets.filter(created_at__lte=date_to)
 
-    serializer = AssetSerializer(assets, many=True, context={'request': request})
-    return Response(serializer.data)
+CHANGE_FEED_PAGE_SIZE = 500
+
+
+@api_view(['GET'])
+def asset_changes(request):
+    """
+    Incremental change feed for sync clients.
+
+    Returns changes with a sequence number greater than ``since`` in commit
+    order: ``upsert`` entries carry the full asset, ``delete`` entries only the
+    id (hard deletes, and assets that are no longer visible to the caller,
+    e.g. after a soft delete). Pass the returned ``cursor`` as the next
+    ``since``; keep polling while ``has_more`` is true. Omit ``since`` for a
+    full initial sync.
+    """
+    try:
+        since = int(request.GET.get('since', 0))
+        limit = min(int(request.GET.get('limit', CHANGE_FEED_PAGE_SIZE)), CHANGE_FEED_PAGE_SIZE)
+    except ValueError:
+        return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(limit, 1)
+
+    # Fetch one extra row from each source to know whether another page follows
+    assets = list(
+        Asset.objects.filter(change_seq__gt=since)
+        .select_related('user')
+        .prefetch_related('metadata_fields', 'versions__created_by')
+        .order_by('change_seq')[:limit + 1]
+    )
+    tombstones = list(AssetTombstone.objects.filter(change_seq__gt=since).order_by('change_seq')[:limit + 1])
+
+    merged = list(heapq.merge(assets, tombstones, key=lambda row: row.change_seq))
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    changes = []
+    for row in merged:
+        if isinstance(row, Asset) and can_view_asset(request.user, row):
+            changes.append({
+                'seq': row.change_seq,
+                'type': 'upsert',
+                'asset': AssetSerializer(row, context={'request': request}).data,
+            })
+        elif since:
+            # A client doing its initial sync has nothing to delete
+            changes.append({'seq': row.change_seq, 'type': 'delete', 'asset_id': str(row.asset_id)})
+
+    return Response({
+        'cursor': str(merged[-1].change_seq if merged else since),
+        'has_more': has_more,
+        'changes': changes,
+    })
 
 
 class MetadataViewSet(ModelViewSet):
@@ -174,4 +596,128 @@ class MetadataViewSet(ModelViewSet):
         asset = serializer.validated_data['asset']
         if asset.user != self.request.user and not self.request.user.is_admin:
             raise permissions.PermissionDenied("You don't have permission to add metadata to this asset")
-        serializer.save()
\ No newline at end of file
+        serializer.save()
+
+
+class SavedSearchViewSet(ModelViewSet):
+    """
+    The user's saved searches. ``results`` opens one (a lookup of its
+    materialized result set) and ``changes`` lists the assets that entered
+    or left it since it was last opened.
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return (
+            SavedSearch.objects.filter(user=self.request.user)
+            .annotate(result_count=Count('results')).order_by('name')
+        )
+
+    def perform_create(self, serializer):
+        search = serializer.save(user=self.request.user)
+        search.result_count = materialize(search)
+
+    def perform_update(self, serializer):
+        search = serializer.save()
+        if serializer.validated_data.keys() & {'query', 'file_type', 'tags', 'date_from', 'date_to'}:
+            search.result_count = materialize(search)
+
+    @action(detail=True, methods=['get'])
+    def results(self, request, pk=None):
+        search = self.get_object()
+        assets = (
+            Asset.objects.filter(is_active=True, pk__in=search.results.values('asset_id'))
+            .select_related('user').prefetch_related('metadata_fields', 'versions__created_by')
+            .order_by('-created_at')
+        )
+        page = self.paginate_queryset(assets)
+        mark_viewed(search)
+        serializer = AssetSerializer(page if page is not None else assets, many=True,
+                                     context=self.get_serializer_context())
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        search = self.get_object()
+        return Response({'since': search.last_viewed_at, **changes_since_visit(search)})
+
+
+class CollectionViewSet(ModelViewSet):
+    """
+    Nested collections (see assets.collections). Anyone signed in can browse
+    them; editors and admins create them, and only the owner or an admin
+    changes one. ``?parent=<id>`` lists a collection's children and
+    ``?parent=root`` the top level; ``?subtree=<id>`` lists a collection and
+    everything under it, depth first. PATCHing ``parent`` moves a subtree.
+    The assets in a subtree are listed with the asset list's ``?collection=<id>``.
+    """
+    serializer_class = CollectionSerializer
+
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return [permissions.IsAuthenticated()]
+        return [permissions.IsAuthenticated(), IsEditorOrAdmin(), IsOwnerOrAdmin()]
+
+    def get_queryset(self):
+        queryset = Collection.objects.order_by('path')
+        if self.action != 'list':
+            return queryset
+        parent = self.request.query_params.get('parent')
+        if parent == 'root':
+            queryset = queryset.filter(parent__isnull=True)
+        elif parent:
+            queryset = queryset.filter(parent=self._collection_param('parent', parent))
+        subtree = self.request.query_params.get('subtree')
+        if subtree:
+            path = self._collection_param('subtree', subtree).path
+            queryset = queryset.filter(**subtree_range(path))
+        return queryset
+
+    def _collection_param(self, name, value):
+        try:
+            return Collection.objects.get(pk=uuid.UUID(value))
+        except (ValueError, Collection.DoesNotExist):
+            raise ValidationError({name: [f"Unknown collection {value!r}."]})
+
+    def perform_destroy(self, instance):
+        delete_collection(instance)
+
+    def _asset_ids(self, request):
+        """(ids, None) from ``{"asset_ids": [...]}``, or (None, an error response)"""
+        raw_ids = request.data.get('asset_ids') if isinstance(request.data, dict) else None
+        if not raw_ids:
+            return None, Response({'error': 'asset_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        return parse_asset_ids(raw_ids, BULK_MAX_ASSETS, field='asset_ids')
+
+    def _counts(self, collection):
+        collection.refresh_from_db(fields=['asset_count', 'subtree_asset_count'])
+        return {'asset_count': collection.asset_count, 'subtree_asset_count': collection.subtree_asset_count}
+
+    @action(detail=True, methods=['post'])
+    def add_assets(self, request, pk=None):
+        """File assets the caller can see in the collection: ``{"asset_ids": [...]}``"""
+        collection = self.get_object()
+        ids, error = self._asset_ids(request)
+        if error is not None:
+            return error
+        # Unknown and invisible ids are reported alike, as the batch endpoint does
+        assets = Asset.objects.filter(asset_id__in=ids)
+        visible = {asset.asset_id for asset in assets if can_view_asset(request.user, asset)}
+        missing = [str(asset_id) for asset_id in ids if asset_id not in visible]
+        if missing:
+            return Response({'error': 'Unknown assets', 'ids': missing}, status=status.HTTP_400_BAD_REQUEST)
+        added = add_assets(collection, ids)
+        return Response({'added': added, **self._counts(collection)})
+
+    @action(detail=True, methods=['post'])
+    def remove_assets(self, request, pk=None):
+        """Take assets out of the collection: ``{"asset_ids": [...]}``"""
+        collection = self.get_object()
+        ids, error = self._asset_ids(request)
+        if error is not None:
+            return error
+        removed = remove_assets(collection, ids)
+        return Response({'removed': removed, **self._counts(collection)})
@@ -0,0 +1,87 @@
+"""
+Load test showing database connection reuse under concurrent requests.
+
+Drives a running server over HTTP and reads the ``Server-Timing:
+db-connect`` header that ConnectionMetricsMiddleware adds to every response:
+a request that had to open a database connection reports the time it spent
+connecting, a request that reused its worker's persistent connection
+reports 0. Header-based counts cover every worker; the /api/auth/metrics/db/
+counters printed at the end only describe whichever worker answered.
+
+Compare a run with persistent connections against one without, e.g.:
+
+    DB_CONN_MAX_AGE=0 gunicorn ShelfLifeDAM.wsgi -w 4 --threads 4
+    python benchmarks/bench_connection_reuse.py --username admin --password ...
+
+    gunicorn ShelfLifeDAM.wsgi -w 4 --threads 4
+    python benchmarks/bench_connection_reuse.py --username admin --password ...
+
+The account must be an admin so the metrics endpoint can be read.
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+SERVER_TIMING = re.compile(r'db-connect;dur=([\d.]+)')
+
+
+def call(base_url, path, token=None, body=None):
+    request = urllib.request.Request(base_url + path, data=json.dumps(body).encode() if body else None)
+    request.add_header('Content-Type', 'application/json')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        payload = response.read()
+        elapsed = time.perf_counter() - started
+        match = SERVER_TIMING.search(response.headers.get('Server-Timing', ''))
+    return elapsed, float(match.group(1)) if match else None, payload
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--path', default='/api/assets/assets/')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    _, _, payload = call(args.url, '/api/auth/login/', body={'username': args.username, 'password': args.password})
+    token = json.loads(payload)['access']
+    before = json.loads(call(args.url, '/api/auth/metrics/db/', token)[2])
+
+    print(f"{args.requests} GET {args.path} with {args.concurrency} concurrent clients...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda _: call(args.url, args.path, token)[:2], range(args.requests)))
+    wall = time.perf_counter() - started
+
+    latencies = [elapsed * 1000 for elapsed, _ in results]
+    connects = [dur for _, dur in results if dur]
+    print(f"  throughput:            {args.requests / wall:.0f} req/s")
+    print(f"  latency p50/p95/p99:   {percentile(latencies, 0.5):.1f} / {percentile(latencies, 0.95):.1f} / "
+          f"{percentile(latencies, 0.99):.1f} ms")
+    print(f"  requests that connected: {len(connects)} of {len(results)} "
+          f"({100 * (1 - len(connects) / len(results)):.1f}% reused a connection)")
+    if connects:
+        print(f"  connect wait mean/max: {statistics.mean(connects):.2f} / {max(connects):.2f} ms")
+
+    after = json.loads(call(args.url, '/api/auth/metrics/db/', token)[2])
+    print("  answering worker's counters (delta):")
+    for key in ('connections_opened', 'requests', 'requests_reusing_connection', 'connect_ms_total'):
+        print(f"    {key}: {round(after[key] - before[key], 3)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark the editor-scoped activity log query before and after the
+denormalized ActivityLog.asset_owner column.
+
+Generates synthetic users, assets and activity rows directly in PostgreSQL
+(generate_series, so 50M rows take minutes rather than hours) and then
+compares the old semi-join against the (asset_owner, timestamp) range scan
+for the first page of an editor's feed.
+
+ONLY run this against a throwaway database - it inserts and, with
+--cleanup, deletes data.
+
+Run with:
+    python benchmarks/bench_editor_activity.py --confirm --rows 50000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ShelfLifeDAM.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from assets.models import Asset  # noqa: E402
+from activity.models import ActivityLog  # noqa: E402
+
+User = get_user_model()
+
+PREFIX = 'bench_editor_'
+CHUNK = 1_000_000
+
+
+def seed(editors, assets_per_editor, rows):
+    print(f"Seeding {editors} editors, {editors * assets_per_editor} assets, {rows:,} log rows...")
+    User.objects.bulk_create(
+        [User(username=f"{PREFIX}{i}", role='editor', password='!') for i in range(editors)],
+        ignore_conflicts=True,
+    )
+    user_ids = list(User.objects.filter(username__startswith=PREFIX).values_list('id', flat=True))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO assets (asset_id, user_id, file, file_type, title, tags, version, file_size,
+                                is_active, created_at, updated_at)
+            SELECT gen_random_uuid(), (%s::bigint[])[1 + (g %% %s)], 'bench/file.jpg', 'image',
+                   'bench asset ' || g, '[]'::jsonb, 1, 0, true, now(), now()
+            FROM generate_series(1, %s) AS g
+            """,
+            [user_ids, len(user_ids), editors * assets_per_editor],
+        )
+        cursor.execute("CREATE TEMP TABLE bench_assets AS "
+                       "SELECT row_number() OVER () AS n, asset_id, user_id FROM assets "
+                       "WHERE file = 'bench/file.jpg'")
+        cursor.execute("SELECT count(*) FROM bench_assets")
+        asset_count = cursor.fetchone()[0]
+
+        for start in range(0, rows, CHUNK):
+            size = min(CHUNK, rows - start)
+            cursor.execute(
+                """
+                INSERT INTO activity_logs (log_id, asset_id, user_id, asset_owner_id, action, details, timestamp)
+                SELECT gen_random_uuid(), a.asset_id, a.user_id, a.user_id,
+                       (ARRAY['view','download','edit','share'])[1 + (g %% 4)], '{}'::jsonb,
+                       now() - (g || ' seconds')::interval
+                FROM generate_series(%s, %s) AS g
+                JOIN bench_assets a ON a.n = 1 + (g %% %s)
+                """,
+                [start + 1, start + size, asset_count],
+            )
+            print(f"  {start + size:,} rows")
+        cursor.execute("ANALYZE activity_logs")
+        cursor.execute("ANALYZE assets")
+    return user_ids
+
+
+def time_query(queryset, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        list(queryset)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50_000_000)
+    parser.add_argument('--editors', type=int, default=500)
+    parser.add_argument('--assets-per-editor', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--skip-seed', action='store_true', help='Reuse rows from a previous run')
+    parser.add_argument('--cleanup', action='store_true', help='Delete benchmark rows afterwards')
+    parser.add_argument('--confirm', action='store_true', help='Required: acknowledges data is written')
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit("This benchmark needs PostgreSQL")
+    if not args.confirm:
+        sys.exit("Refusing to write benchmark data without --confirm")
+
+    if not args.skip_seed:
+        seed(args.editors, args.assets_per_editor, args.rows)
+
+    editor = User.objects.filter(username__startswith=PREFIX).first()
+    old = ActivityLog.objects.filter(asset__in=Asset.objects.filter(user=editor)).order_by('-timestamp')[:20]
+    new = ActivityLog.objects.filter(asset_owner=editor).order_by('-timestamp')[:20]
+
+    for label, queryset in (('semi-join (before)', old), ('asset_owner (after)', new)):
+        print(f"\n== {label} ==")
+        print(queryset.explain(analyze=True))
+        print(f"median over {args.repeats} runs: {time_query(queryset, args.repeats):.2f} ms")
+
+    if args.cleanup:
+        Asset.objects.filter(file='bench/file.jpg').delete()
+        User.objects.filter(username__startswith=PREFIX).delete()
+
+
+if __name__ == '__main__':
+    main()
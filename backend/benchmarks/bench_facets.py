@@ -0,0 +1,151 @@
+"""
+Benchmark facet counts (assets.facets) over a large asset table.
+
+Generates synthetic owners, assets and tag links directly in PostgreSQL
+(generate_series) and times each facet query for an unfiltered catalogue,
+a file_type filter and a tag filter, plus the cached path that unfiltered
+requests take after the first one.
+
+ONLY run this against a throwaway database - it inserts and, with
+--cleanup, deletes data.
+
+Run with:
+    python benchmarks/bench_facets.py --confirm --assets 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ShelfLifeDAM.settings')
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from assets.facets import FACETS, cached_facet_counts, facet_counts  # noqa: E402
+from assets.models import Asset  # noqa: E402
+from assets.tags import tagged  # noqa: E402
+
+User = get_user_model()
+
+PREFIX = 'bench_facets_'
+BENCH_FILE = 'bench/facets.jpg'
+
+
+def seed(owners, assets, tags):
+    print(f"Seeding {owners} owners, {assets:,} assets, {tags} tags...")
+    User.objects.bulk_create(
+        [User(username=f"{PREFIX}{i}", role='editor', password='!') for i in range(owners)],
+        ignore_conflicts=True,
+    )
+    user_ids = list(User.objects.filter(username__startswith=PREFIX).values_list('id', flat=True))
+
+    with connection.cursor() as cursor:
+        # Skewed tag popularity: power(random(), 3) favours the low tag numbers
+        cursor.execute(
+            """
+            INSERT INTO assets (asset_id, user_id, file, file_type, title, tags, version, file_size,
+                                is_active, change_seq, created_at, updated_at)
+            SELECT gen_random_uuid(), (%s::bigint[])[1 + (g %% %s)], %s,
+                   (ARRAY['image','image','image','video','pdf','doc','audio','3d'])[1 + (g %% 8)],
+                   'bench asset ' || g,
+                   jsonb_build_array('tag-' || floor(power(random(), 3) * %s)::int,
+                                     'tag-' || floor(power(random(), 3) * %s)::int,
+                                     'tag-' || floor(random() * %s)::int),
+                   1, 0, g %% 20 <> 0, 0,
+                   now() - (random() * interval '1095 days'), now()
+            FROM generate_series(1, %s) AS g
+            """,
+            [user_ids, len(user_ids), BENCH_FILE, tags, tags, tags, assets],
+        )
+        cursor.execute(
+            """
+            INSERT INTO tags (name, usage_count, created_at)
+            SELECT 'tag-' || g, 0, now() FROM generate_series(0, %s) AS g
+            ON CONFLICT (name) DO NOTHING
+            """,
+            [tags],
+        )
+        cursor.execute(
+            """
+            INSERT INTO asset_tags (asset_id, tag_id)
+            SELECT a.asset_id, t.id
+            FROM assets a
+            CROSS JOIN LATERAL jsonb_array_elements_text(a.tags) AS e(name)
+            JOIN tags t ON t.name = e.name
+            WHERE a.file = %s
+            ON CONFLICT DO NOTHING
+            """,
+            [BENCH_FILE],
+        )
+        for table in ('assets', 'tags', 'asset_tags'):
+            cursor.execute(f"ANALYZE {table}")
+
+
+def median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', type=int, default=1_000_000)
+    parser.add_argument('--owners', type=int, default=500)
+    parser.add_argument('--tags', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--skip-seed', action='store_true', help='Reuse rows from a previous run')
+    parser.add_argument('--cleanup', action='store_true', help='Delete benchmark rows afterwards')
+    parser.add_argument('--confirm', action='store_true', help='Required: acknowledges data is written')
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit("This benchmark needs PostgreSQL")
+    if not args.confirm:
+        sys.exit("Refusing to write benchmark data without --confirm")
+
+    if not args.skip_seed:
+        seed(args.owners, args.assets, args.tags)
+
+    active = Asset.objects.filter(is_active=True)
+    scenarios = [
+        ('unfiltered', active),
+        ('file_type=video', active.filter(file_type='video')),
+        ('tags=tag-1', active.filter(tagged('tag-1'))),
+    ]
+    for label, queryset in scenarios:
+        print(f"\n== {label}: {queryset.count():,} assets ==")
+        total = 0
+        for name in FACETS:
+            ms = median_ms(lambda: facet_counts(queryset, [name]), args.repeats)
+            total += ms
+            print(f"  {name:10} {ms:9.1f} ms")
+        print(f"  {'all':10} {total:9.1f} ms ({len(FACETS)} queries)")
+
+    cache.clear()
+    cached_facet_counts(active, list(FACETS), 'viewer', ['public'])
+    ms = median_ms(lambda: cached_facet_counts(active, list(FACETS), 'viewer', ['public']), args.repeats)
+    print(f"\nunfiltered, cached: {ms:.2f} ms")
+
+    if args.cleanup:
+        # Raw deletes: the ORM would run the per-asset delete signals a million times
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM asset_tags WHERE asset_id IN (SELECT asset_id FROM assets WHERE file = %s)",
+                           [BENCH_FILE])
+            cursor.execute("DELETE FROM assets WHERE file = %s", [BENCH_FILE])
+            cursor.execute("DELETE FROM tags t WHERE t.name LIKE 'tag-%' "
+                           "AND NOT EXISTS (SELECT 1 FROM asset_tags l WHERE l.tag_id = t.id)")
+        User.objects.filter(username__startswith=PREFIX).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark the related-assets job (assets.related) against library size.
+
+Grows a synthetic library step by step - assets with tags drawn from a
+skewed vocabulary, and download sessions of a few assets each - and at
+each size times a full build_related and a refresh_related of a handful
+of changed assets. Reports whether scipy.sparse or the pure-Python
+product did the work. Works on PostgreSQL or, for a quick local run,
+SQLite (DB_ENGINE=sqlite).
+
+ONLY run this against a throwaway database - it inserts and, with
+--cleanup, deletes data.
+
+Run with:
+    python benchmarks/bench_related.py --confirm --sizes 10000,50000,100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ShelfLifeDAM.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from activity.models import ActivityLog  # noqa: E402
+from assets import related  # noqa: E402
+from assets.models import Asset, AssetTag, RelatedAsset, Tag  # noqa: E402
+
+User = get_user_model()
+
+USERNAME = 'bench_related'
+BENCH_FILE = 'bench/related.jpg'
+VOCABULARY = 2000
+TAGS_PER_ASSET = 4
+SESSION_ASSETS = 5
+CHANGED_ASSETS = 20
+
+
+def seed(owner, users, start, stop, rng):
+    """Add assets start..stop with tags and download sessions"""
+    tags = dict(Tag.objects.filter(name__startswith='bench-').values_list('name', 'pk'))
+    # Zipf-like: a few tags are everywhere, most are rare
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY)]
+    assets = []
+    for number in range(start, stop):
+        names = {f'bench-{rank}' for rank in rng.choices(range(VOCABULARY), weights, k=TAGS_PER_ASSET)}
+        assets.append(Asset(user=owner, file=BENCH_FILE, file_type='image', title=f'related {number}',
+                            tags=sorted(names)))
+    Asset.objects.bulk_create(assets, batch_size=5000)
+
+    missing = {name for asset in assets for name in asset.tags} - tags.keys()
+    Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+    tags = dict(Tag.objects.filter(name__startswith='bench-').values_list('name', 'pk'))
+    AssetTag.objects.bulk_create(
+        [AssetTag(asset=asset, tag_id=tags[name]) for asset in assets for name in asset.tags], batch_size=5000
+    )
+
+    logs = []
+    for _ in range(len(assets) // SESSION_ASSETS):
+        user = rng.choice(users)
+        for asset in rng.sample(assets, SESSION_ASSETS):
+            logs.append(ActivityLog(asset=asset, user=user, asset_owner=owner, action='download'))
+    ActivityLog.objects.bulk_create(logs, batch_size=5000)
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,5000,20000', help='Comma-separated library sizes')
+    parser.add_argument('--cleanup', action='store_true', help='Delete benchmark rows afterwards')
+    parser.add_argument('--confirm', action='store_true', help='Required: acknowledges data is written')
+    args = parser.parse_args()
+
+    if not args.confirm:
+        sys.exit("Refusing to write benchmark data without --confirm")
+
+    rng = random.Random(42)
+    owner, _ = User.objects.get_or_create(username=USERNAME, defaults={'role': 'editor'})
+    users = [User.objects.get_or_create(username=f'{USERNAME}_{number}', defaults={'role': 'viewer'})[0]
+             for number in range(200)]
+
+    print(f"Sparse product: {'scipy' if related.sparse is not None else 'pure Python'}")
+    print(f"{'assets':>10}{'load':>12}{'build':>12}{'per 1k':>10}{'refresh':>12}{'links':>12}")
+    seeded = Asset.objects.filter(file=BENCH_FILE).count()
+    for size in sorted(int(value) for value in args.sizes.split(',')):
+        if size > seeded:
+            seed(owner, users, seeded, size, rng)
+            seeded = size
+
+        features, load_seconds = timed(related.load_features)
+        _, build_seconds = timed(related.build_related)
+
+        changed = list(Asset.objects.filter(file=BENCH_FILE).values_list('pk', flat=True)[:CHANGED_ASSETS])
+        Asset.objects.filter(pk__in=changed).update(updated_at=timezone.now())
+        _, refresh_seconds = timed(related.refresh_related)
+
+        print(f"{len(features.asset_ids):>10,}{load_seconds:>10.2f} s{build_seconds:>10.2f} s"
+              f"{build_seconds / len(features.asset_ids) * 1000:>8.2f} s{refresh_seconds * 1000:>9.0f} ms"
+              f"{RelatedAsset.objects.count():>12,}")
+
+    if args.cleanup:
+        bench_assets = Asset.objects.filter(file=BENCH_FILE).values('pk')
+        RelatedAsset.objects.filter(asset__in=bench_assets).delete()
+        ActivityLog.objects.filter(asset__in=bench_assets).delete()
+        AssetTag.objects.filter(asset__in=bench_assets).delete()
+        Tag.objects.filter(name__startswith='bench-').delete()
+        # Raw delete: the ORM would run the per-asset delete signals for every row
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM assets WHERE file = %s", [BENCH_FILE])
+        User.objects.filter(username__startswith=USERNAME).delete()
+
+
+if __name__ == '__main__':
+    main()
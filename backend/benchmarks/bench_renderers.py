@@ -0,0 +1,111 @@
+"""
+Benchmark rendering a 1,000-asset page with each available renderer and
+response compression.
+
+Payloads are shaped like AssetSerializer output (nested owner, metadata and
+versions) and built in memory, so no database is needed. Renderers and
+codecs whose packages aren't installed are skipped.
+
+Run with:
+    python benchmarks/bench_renderers.py --assets 1000 --repeat 20
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ShelfLifeDAM.settings')
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from ShelfLifeDAM import renderers  # noqa: E402
+
+
+def user_payload(i):
+    return {
+        'id': i, 'username': f'editor{i}', 'email': f'editor{i}@example.com', 'first_name': 'Ed',
+        'last_name': f'Itor {i}', 'role': 'editor', 'profile_info': '', 'avatar_url': None,
+        'is_admin': False, 'is_editor': True, 'is_viewer': False,
+        'date_joined': datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat(),
+    }
+
+
+def asset_payload(i, now):
+    owner = user_payload(i % 20)
+    asset_id = uuid.uuid4()
+    created = now - timedelta(minutes=i)
+    return {
+        'asset_id': str(asset_id), 'user': owner, 'file': f'/media/assets/{i % 20}/{asset_id}.jpg',
+        'file_url': f'https://dam.example.com/media/assets/{i % 20}/{asset_id}.jpg', 'file_type': 'image',
+        'title': f'Campaign asset {i}', 'description': 'Spring campaign hero image, final cut ' * 3,
+        'tags': ['campaign', 'spring', f'batch-{i % 7}'], 'version': 3, 'file_size': 2_048_000 + i,
+        'mime_type': 'image/jpeg', 'file_extension': '.jpg',
+        'metadata_fields': [
+            {'metadata_id': str(uuid.uuid4()), 'field_name': name, 'field_value': value,
+             'created_at': created.isoformat(), 'updated_at': created.isoformat()}
+            for name, value in (('camera', 'X100V'), ('iso', '400'), ('photographer', 'A. Smith'))
+        ],
+        'versions': [
+            {'version_id': str(uuid.uuid4()), 'version_number': n, 'file': f'/media/assets/v{n}.jpg',
+             'file_size': 2_000_000, 'changes': 'File updated', 'created_by': owner,
+             'created_at': (created - timedelta(days=n)).isoformat()}
+            for n in (1, 2)
+        ],
+        'is_active': True, 'created_at': created.isoformat(), 'updated_at': now.isoformat(),
+    }
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    page = {'count': args.assets, 'next': None, 'previous': None,
+            'results': [asset_payload(i, now) for i in range(args.assets)]}
+
+    candidates = [('DRF JSONRenderer', JSONRenderer())]
+    if renderers.orjson is not None:
+        candidates.append(('FastJSONRenderer (orjson)', renderers.FastJSONRenderer()))
+    if renderers.msgpack is not None:
+        candidates.append(('MessagePackRenderer', renderers.MessagePackRenderer()))
+
+    print(f"Rendering {args.assets} assets, best of {args.repeat}:")
+    baseline = None
+    json_body = None
+    for name, renderer in candidates:
+        seconds, body = best_of(args.repeat, lambda: renderer.render(page))
+        baseline = baseline or seconds
+        json_body = json_body or body
+        print(f"  {name:28} {seconds * 1000:8.2f} ms  {len(body) / 1024:8.1f} KiB  "
+              f"{baseline / seconds:5.2f}x  {args.assets / seconds:10.0f} assets/s")
+
+    print("Compressing the JSON body:")
+    codecs = [('gzip (level 6)', lambda: gzip.compress(json_body, compresslevel=6, mtime=0))]
+    if renderers.brotli is not None:
+        codecs.append(('brotli (quality 4)', lambda: renderers.brotli.compress(json_body, quality=4)))
+    for name, compress in codecs:
+        seconds, body = best_of(args.repeat, compress)
+        print(f"  {name:28} {seconds * 1000:8.2f} ms  {len(body) / 1024:8.1f} KiB  "
+              f"({100 * len(body) / len(json_body):.1f}% of original)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark the asset search backends (assets.search) against each other.
+
+Seeds synthetic assets with bulk_create, builds the inverted index into a
+temporary directory and times the same queries through the database
+backend (substring and trigram matching) and the BM25 inverted index.
+Works on PostgreSQL or, for a quick local run, SQLite (DB_ENGINE=sqlite).
+
+ONLY run this against a throwaway database - it inserts and, with
+--cleanup, deletes data.
+
+Run with:
+    python benchmarks/bench_search_backends.py --confirm --assets 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ShelfLifeDAM.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from assets.models import Asset  # noqa: E402
+from assets.search.database import DatabaseSearchBackend  # noqa: E402
+from assets.search.inverted_index import InvertedIndexBackend  # noqa: E402
+
+User = get_user_model()
+
+USERNAME = 'bench_search'
+BENCH_FILE = 'bench/search.jpg'
+WORDS = ('spring autumn brochure poster banner catalogue campaign launch product team portrait '
+         'studio outdoor winter summer logo print social video teaser hero draft final archive').split()
+QUERIES = ('brochure', 'spring campaign', 'portrait studio final', 'teaser', 'nothingmatches')
+
+
+def seed(assets):
+    print(f"Seeding {assets:,} assets...")
+    user, _ = User.objects.get_or_create(username=USERNAME, defaults={'role': 'editor'})
+    rng = random.Random(42)
+    batch = []
+    for i in range(assets):
+        batch.append(Asset(
+            user=user, file=BENCH_FILE, file_type='image',
+            title=' '.join(rng.sample(WORDS, 3)) + f' {i}',
+            description=' '.join(rng.choices(WORDS, k=12)),
+            tags=rng.sample(WORDS, 2),
+        ))
+        if len(batch) == 5000:
+            Asset.objects.bulk_create(batch)
+            batch = []
+    Asset.objects.bulk_create(batch)
+
+
+def median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', type=int, default=100_000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--skip-seed', action='store_true', help='Reuse rows from a previous run')
+    parser.add_argument('--cleanup', action='store_true', help='Delete benchmark rows afterwards')
+    parser.add_argument('--confirm', action='store_true', help='Required: acknowledges data is written')
+    args = parser.parse_args()
+
+    if not args.confirm:
+        sys.exit("Refusing to write benchmark data without --confirm")
+
+    if not args.skip_seed:
+        seed(args.assets)
+
+    assets = Asset.objects.filter(is_active=True)
+    with tempfile.TemporaryDirectory() as directory:
+        index = InvertedIndexBackend(directory)
+        started = time.perf_counter()
+        documents = index.rebuild()
+        print(f"Built index of {documents:,} assets in {time.perf_counter() - started:.1f} s "
+              f"({os.path.getsize(index.snapshot_path) / 2**20:.1f} MB snapshot)")
+
+        # Reload from disk so the timings include nothing cached by the build
+        index = InvertedIndexBackend(directory)
+        started = time.perf_counter()
+        index.search(assets.none(), 'warmup')
+        print(f"Loaded snapshot in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        backends = [('database', DatabaseSearchBackend()), ('inverted', index)]
+        print(f"\n{'query':24}" + ''.join(f"{name:>14}" for name, _ in backends) + f"{'matches':>10}")
+        for query in QUERIES:
+            row = f"{query:24}"
+            for _, backend in backends:
+                first_page = lambda: list(  # noqa: E731
+                    backend.search(assets, query).order_by('-relevance', '-created_at')
+                    .values_list('pk', flat=True)[:20]
+                )
+                row += f"{median_ms(first_page, args.repeats):11.1f} ms"
+            row += f"{backend.search(assets, query).count():>10,}"
+            print(row)
+
+    if args.cleanup:
+        # Raw delete: the ORM would run the per-asset delete signals for every row
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM assets WHERE file = %s", [BENCH_FILE])
+        User.objects.filter(username=USERNAME).delete()
+
+
+if __name__ == '__main__':
+    main()
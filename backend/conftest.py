@@ -11,3 +11,21 @@ def setup_django():
 def enable_db_access_for_all_tests(db):
     """Enable database access for all tests"""
     pass
+
+
+@pytest.fixture(scope='function', autouse=True)
+def media_root(settings, tmp_path):
+    """Keep uploads made by tests out of the project's media directory"""
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+
+
+@pytest.fixture(scope='function', autouse=True)
+def clear_cache():
+    """Start every test with an empty cache"""
+    from django.core.cache import cache
+    from users.authentication import local_user_cache
+    cache.clear()
+    local_user_cache.clear()
+    yield
+    cache.clear()
+    local_user_cache.clear()
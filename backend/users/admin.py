@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from .models import User, UserStorageUsage
 
 
 @admin.register(User)
@@ -16,4 +16,10 @@ class CustomUserAdmin(UserAdmin):
 
     add_fieldsets = UserAdmin.add_fieldsets + (
         ('ShelfLifeDAM Role', {'fields': ('role', 'profile_info')}),
-    )
\ No newline at end of file
+    )
+
+@admin.register(UserStorageUsage)
+class UserStorageUsageAdmin(admin.ModelAdmin):
+    list_display = ('user', 'bytes_used', 'quota_bytes', 'updated_at')
+    search_fields = ('user__username', 'user__email')
+    readonly_fields = ('bytes_used', 'updated_at')
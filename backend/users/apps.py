@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
-    verbose_name = 'User Management'
\ No newline at end of file
+    verbose_name = 'User Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
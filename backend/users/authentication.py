@@ -0,0 +1,143 @@
+"""
+JWT authentication that resolves the principal without a users query per request.
+
+Users are looked up in a small per-process LRU first, then the shared Django
+cache, and only then the database. Both caches hold a snapshot of the user's
+non-secret fields and are dropped when the user is saved or deleted (see
+users.signals); the per-process copy also expires after a few seconds so
+changes made through other processes are picked up quickly.
+
+Access tokens carry the user's role (see users.tokens). A cached snapshot
+whose role disagrees with the token is treated as stale and re-read.
+
+Views that write to request.user or need the password hash must use
+FreshJWTAuthentication, which always reads the database.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# Everything needed to authorize and serialize request.user, but no password hash
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'role', 'profile_info', 'avatar',
+    'is_active', 'is_staff', 'is_superuser', 'date_joined', 'last_login',
+)
+
+
+def shared_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+class LocalUserCache:
+    """Thread-safe LRU of user snapshots with a per-entry TTL"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, values):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_user_cache = LocalUserCache(
+    maxsize=settings.AUTH_USER_CACHE_LOCAL_SIZE,
+    ttl=settings.AUTH_USER_CACHE_LOCAL_TTL,
+)
+
+
+def snapshot(user):
+    return {field: user.avatar.name if field == 'avatar' else getattr(user, field) for field in SNAPSHOT_FIELDS}
+
+
+def user_from_snapshot(values):
+    """
+    Rebuild a User without touching the database.
+
+    The password is left deferred: reading it loads it from the database, and
+    save() on the instance never writes it back.
+    """
+    # from_db expects values in concrete field order
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db('default', field_names, [values[name] for name in field_names])
+
+
+def invalidate_user(user_id):
+    local_user_cache.discard(user_id)
+    cache.delete(shared_cache_key(user_id))
+
+
+class FreshJWTAuthentication(JWTAuthentication):
+    """Plain database-backed JWT authentication for endpoints that need a fresh user row"""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        # Refresh the caches while we have an authoritative copy
+        values = snapshot(user)
+        local_user_cache.set(user.pk, values)
+        cache.set(shared_cache_key(user.pk), values, settings.AUTH_USER_CACHE_SHARED_TTL)
+        return user
+
+
+class CachedJWTAuthentication(FreshJWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the password hash, which is never cached
+            return super().get_user(validated_token)
+
+        values = local_user_cache.get(user_id)
+        if values is None:
+            values = cache.get(shared_cache_key(user_id))
+            if values is not None:
+                local_user_cache.set(user_id, values)
+        if values is None:
+            return super().get_user(validated_token)
+
+        user = user_from_snapshot(values)
+        token_role = validated_token.get('role')
+        if token_role is not None and token_role != user.role:
+            # Role changed since the snapshot or the token was issued; trust the database
+            return super().get_user(validated_token)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
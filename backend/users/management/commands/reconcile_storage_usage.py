@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from users.storage import reconcile_storage_usage
+
+
+class Command(BaseCommand):
+    help = "Correct per-user storage counters that drifted from the asset and version tables. Run periodically."
+
+    def handle(self, *args, **options):
+        corrections = reconcile_storage_usage()
+        for user_id, (recorded, actual) in sorted(corrections.items()):
+            self.stdout.write(f"  user {user_id}: {recorded} -> {actual} bytes")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled storage usage; {len(corrections)} counters corrected"))
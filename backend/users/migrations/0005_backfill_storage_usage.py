@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from users.storage import measured_usage
+
+
+def forwards(apps, schema_editor):
+    Asset = apps.get_model('assets', 'Asset')
+    AssetVersion = apps.get_model('assets', 'AssetVersion')
+    UserStorageUsage = apps.get_model('users', 'UserStorageUsage')
+
+    UserStorageUsage.objects.bulk_create([
+        UserStorageUsage(user_id=user_id, bytes_used=bytes_used)
+        for user_id, bytes_used in measured_usage(Asset, AssetVersion).items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_storage_usage'),
+        ('assets', '0005_asset_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -46,4 +46,23 @@ class User(AbstractUser):
 
     @property
     def is_viewer(self):
-        return self.role == 'viewer'
\ No newline at end of file
+        return self.role == 'viewer'
+
+
+class UserStorageUsage(models.Model):
+    """
+    Running total of the bytes a user's assets and versions occupy.
+
+    Maintained incrementally with F() updates (see users.storage) so quota
+    checks never aggregate over assets; reconcile_storage_usage fixes drift.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='storage_usage')
+    bytes_used = models.BigIntegerField(default=0)
+    quota_bytes = models.BigIntegerField(blank=True, null=True)  # Per-user override of STORAGE_QUOTA_BYTES
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_storage_usage'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.bytes_used} bytes"
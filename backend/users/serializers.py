@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from .models import User
+from .storage import get_usage
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -103,11 +104,12 @@ class UserProfileSerializer(serializers.ModelSerializer):
     is_admin = serializers.BooleanField(read_only=True)
     is_editor = serializers.BooleanField(read_only=True)
     is_viewer = serializers.BooleanField(read_only=True)
+    storage = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'profile_info', 'avatar', 'avatar_url', 'role',
-                  'is_admin', 'is_editor', 'is_viewer')
+                  'is_admin', 'is_editor', 'is_viewer', 'storage')
         read_only_fields = ('id', 'username', 'email', 'is_admin', 'is_editor', 'is_viewer')
 
     def get_avatar_url(self, obj):
@@ -116,6 +118,11 @@ class UserProfileSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.avatar.url)
         return None
 
+    def get_storage(self, obj):
+        """Bytes used and quota (null when unlimited), read from the usage counter"""
+        bytes_used, quota = get_usage(obj)
+        return {'bytes_used': bytes_used, 'quota_bytes': quota}
+
 
 class ChangePasswordSerializer(serializers.Serializer):
     """Serializer for password change"""
@@ -0,0 +1,85 @@
+"""
+Per-user storage accounting and quota checks.
+
+Usage lives in UserStorageUsage and is only ever changed by adding a delta
+with an F() expression, so concurrent uploads can't lose updates.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import UserStorageUsage
+
+
+def adjust_usage(user_id, delta):
+    """Add delta bytes (negative to release) to the user's counter"""
+    if not delta:
+        return
+    updated = UserStorageUsage.objects.filter(user_id=user_id).update(bytes_used=F('bytes_used') + delta)
+    if not updated and delta > 0:
+        UserStorageUsage.objects.get_or_create(user_id=user_id)
+        UserStorageUsage.objects.filter(user_id=user_id).update(bytes_used=F('bytes_used') + delta)
+
+
+def get_usage(user):
+    """Return (bytes_used, quota_bytes); quota is None when unlimited"""
+    usage = UserStorageUsage.objects.filter(user_id=user.pk).values_list('bytes_used', 'quota_bytes').first()
+    bytes_used, override = usage if usage else (0, None)
+    if override is not None:
+        return bytes_used, override
+    if user.is_admin:
+        return bytes_used, None
+    return bytes_used, settings.STORAGE_QUOTA_BYTES.get(user.role)
+
+
+def quota_error(user, incoming_bytes):
+    """Message explaining why incoming_bytes won't fit, or None if it does"""
+    bytes_used, quota = get_usage(user)
+    if quota is not None and bytes_used + incoming_bytes > quota:
+        return (f"Storage quota exceeded: {bytes_used} of {quota} bytes used, "
+                f"upload needs {incoming_bytes} more.")
+    return None
+
+
+def measured_usage(asset_model, version_model, user_ids=None):
+    """Actual bytes per user from the asset and version tables"""
+    assets = asset_model.objects.order_by()
+    versions = version_model.objects.order_by()
+    if user_ids is not None:
+        assets = assets.filter(user_id__in=user_ids)
+        versions = versions.filter(asset__user_id__in=user_ids)
+
+    totals = {}
+    for user_id, size in assets.values_list('user_id').annotate(total=Sum('file_size')):
+        totals[user_id] = totals.get(user_id, 0) + (size or 0)
+    for user_id, size in versions.values_list('asset__user_id').annotate(total=Sum('file_size')):
+        totals[user_id] = totals.get(user_id, 0) + (size or 0)
+    return totals
+
+
+def reconcile_storage_usage():
+    """
+    Recompute counters that drifted from the real totals.
+
+    Returns {user_id: (recorded, actual)} for every corrected user.
+    """
+    from assets.models import Asset, AssetVersion
+
+    recorded = dict(UserStorageUsage.objects.values_list('user_id', 'bytes_used'))
+    measured = measured_usage(Asset, AssetVersion)
+    suspects = [
+        user_id for user_id in set(recorded) | set(measured)
+        if recorded.get(user_id, 0) != measured.get(user_id, 0)
+    ]
+
+    corrections = {}
+    for user_id in suspects:
+        # Re-measure under the row lock so uploads racing the scan above aren't clobbered
+        with transaction.atomic():
+            usage, _ = UserStorageUsage.objects.select_for_update().get_or_create(user_id=user_id)
+            actual = measured_usage(Asset, AssetVersion, user_ids=[user_id]).get(user_id, 0)
+            if usage.bytes_used != actual:
+                corrections[user_id] = (usage.bytes_used, actual)
+                usage.bytes_used = actual
+                usage.save(update_fields=['bytes_used', 'updated_at'])
+    return corrections
@@ -0,0 +1,88 @@
+"""
+Tests for cached JWT principal resolution
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from users.tokens import RoleRefreshToken
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(
+        username='editor',
+        email='editor@example.com',
+        password='editorpass123',
+        role='editor'
+    )
+
+
+def authenticate(client, user):
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(user).access_token}')
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    """Test suite for CachedJWTAuthentication"""
+
+    def test_login_tokens_carry_role(self, api_client, editor_user):
+        """Test that issued access tokens include the role claim"""
+        response = api_client.post(reverse('login'), {'username': 'editor', 'password': 'editorpass123'})
+
+        assert AccessToken(response.data['access'])['role'] == 'editor'
+
+    def test_repeat_requests_skip_user_query(self, api_client, editor_user, django_assert_num_queries):
+        """Test that the principal is served from cache after the first request"""
+        authenticate(api_client, editor_user)
+        url = reverse('recent_activity')
+
+        with django_assert_num_queries(2):  # User lookup + activity feed
+            api_client.get(url)
+        with django_assert_num_queries(0):
+            response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_role_change_takes_effect_immediately(self, api_client, editor_user):
+        """Test that saving the user drops the cached principal"""
+        authenticate(api_client, editor_user)
+        assert api_client.get(reverse('activitylog-list')).status_code == status.HTTP_200_OK
+
+        editor_user.role = 'viewer'
+        editor_user.save()
+
+        assert api_client.get(reverse('activitylog-list')).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_deactivated_user_rejected(self, api_client, editor_user):
+        """Test that deactivation is honoured despite an earlier cached lookup"""
+        authenticate(api_client, editor_user)
+        api_client.get(reverse('recent_activity'))
+
+        editor_user.is_active = False
+        editor_user.save()
+
+        assert api_client.get(reverse('recent_activity')).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_profile_update_keeps_password(self, api_client, editor_user):
+        """Test that the strict profile endpoint writes a fresh user row"""
+        authenticate(api_client, editor_user)
+        api_client.get(reverse('recent_activity'))
+
+        response = api_client.patch(reverse('profile'), {'first_name': 'Edith'})
+
+        assert response.status_code == status.HTTP_200_OK
+        editor_user.refresh_from_db()
+        assert editor_user.first_name == 'Edith'
+        assert editor_user.check_password('editorpass123')
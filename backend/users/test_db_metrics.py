@@ -0,0 +1,67 @@
+"""
+Tests for database connection metrics
+"""
+import pytest
+from django.db import connections
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from ShelfLifeDAM.db_metrics import connection_metrics
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def admin_user():
+    """Create admin user"""
+    return User.objects.create_user(username='admin', password='adminpass123', role='admin')
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    connection_metrics.reset()
+    yield
+    connection_metrics.reset()
+
+
+@pytest.mark.django_db
+class TestConnectionMetrics:
+    """Test suite for connect timing and reuse counters"""
+
+    def test_new_connection_is_timed(self):
+        """Test that the metered backend records each connect"""
+        wrapper = connections.create_connection('default')
+        wrapper.ensure_connection()
+
+        snapshot = connection_metrics.snapshot()
+        assert snapshot['connections_opened'] == 1
+        assert snapshot['connect_ms_total'] > 0
+
+    def test_request_reusing_connection(self, api_client, admin_user):
+        """Test that requests on an open connection count as reuse and report no wait"""
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get(reverse('user_list'))
+
+        assert response['Server-Timing'] == 'db-connect;dur=0.00'
+        snapshot = connection_metrics.snapshot()
+        assert snapshot['requests'] == 1
+        assert snapshot['reuse_ratio'] == 1.0
+
+    def test_metrics_endpoint_admin_only(self, api_client, admin_user):
+        """Test that only admins can read the counters"""
+        viewer = User.objects.create_user(username='viewer', password='viewerpass123', role='viewer')
+        api_client.force_authenticate(user=viewer)
+        assert api_client.get(reverse('database_metrics')).status_code == status.HTTP_403_FORBIDDEN
+
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('database_metrics'))
+        assert response.status_code == status.HTTP_200_OK
+        assert 'connect_ms_avg' in response.data
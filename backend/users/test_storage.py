@@ -0,0 +1,127 @@
+"""
+Tests for per-user storage accounting and quotas
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from assets.models import Asset, AssetVersion
+from users.models import UserStorageUsage
+from users.storage import get_usage, reconcile_storage_usage
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Create API client"""
+    return APIClient()
+
+
+@pytest.fixture
+def editor_user():
+    """Create editor user"""
+    return User.objects.create_user(username='editor', password='editorpass123', role='editor')
+
+
+@pytest.fixture
+def admin_user():
+    """Create admin user"""
+    return User.objects.create_user(username='admin', password='adminpass123', role='admin')
+
+
+def make_asset(user, content=b"12345678"):
+    file = SimpleUploadedFile("test.jpg", content, content_type="image/jpeg")
+    return Asset.objects.create(user=user, file=file, title="Test Asset", file_type="image")
+
+
+@pytest.mark.django_db
+class TestStorageAccounting:
+    """Test suite for incremental storage counters"""
+
+    def test_create_and_delete_asset(self, editor_user):
+        """Test that usage follows asset creation and deletion"""
+        asset = make_asset(editor_user)
+        assert get_usage(editor_user)[0] == 8
+
+        asset.delete()
+        assert get_usage(editor_user)[0] == 0
+
+    def test_versions_are_counted(self, editor_user):
+        """Test that retained versions count against the owner"""
+        asset = make_asset(editor_user)
+        version = AssetVersion.objects.create(
+            asset=asset, version_number=1, file=asset.file, file_size=5, created_by=editor_user
+        )
+        assert get_usage(editor_user)[0] == 13
+
+        version.delete()
+        assert get_usage(editor_user)[0] == 8
+
+    def test_metadata_save_does_not_double_count(self, editor_user):
+        """Test that re-saving an asset without a new file leaves usage unchanged"""
+        asset = make_asset(editor_user)
+        asset = Asset.objects.get(pk=asset.pk)
+        asset.title = "Renamed"
+        asset.save()
+
+        assert get_usage(editor_user)[0] == 8
+
+    def test_reconcile_fixes_drift(self, editor_user):
+        """Test that reconciliation restores the measured total"""
+        make_asset(editor_user)
+        UserStorageUsage.objects.filter(user=editor_user).update(bytes_used=999)
+
+        corrections = reconcile_storage_usage()
+
+        assert corrections == {editor_user.id: (999, 8)}
+        assert get_usage(editor_user)[0] == 8
+
+    def test_reconcile_command(self, editor_user, capsys):
+        """Test the management command reports corrections"""
+        make_asset(editor_user)
+        UserStorageUsage.objects.filter(user=editor_user).update(bytes_used=0)
+
+        call_command('reconcile_storage_usage')
+
+        assert '1 counters corrected' in capsys.readouterr().out
+        assert get_usage(editor_user)[0] == 8
+
+
+@pytest.mark.django_db
+class TestStorageQuota:
+    """Test suite for quota enforcement on upload"""
+
+    def test_upload_over_quota_rejected(self, api_client, editor_user, settings):
+        """Test that an upload that would exceed the role quota is refused"""
+        settings.STORAGE_QUOTA_BYTES = {'editor': 10}
+        make_asset(editor_user)
+        api_client.force_authenticate(user=editor_user)
+
+        file = SimpleUploadedFile("big.pdf", b"12345", content_type="application/pdf")
+        response = api_client.post(reverse('asset-list'), {'file': file, 'title': 'Big'}, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'quota' in response.data['file'][0]
+        assert get_usage(editor_user)[0] == 8
+
+    def test_user_override_and_admin_unlimited(self, editor_user, admin_user, settings):
+        """Test per-user overrides and unlimited admins"""
+        settings.STORAGE_QUOTA_BYTES = {'editor': 10, 'admin': 10}
+        UserStorageUsage.objects.create(user=editor_user, quota_bytes=100)
+
+        assert get_usage(editor_user) == (0, 100)
+        assert get_usage(admin_user) == (0, None)
+
+    def test_profile_reports_usage(self, api_client, editor_user, settings):
+        """Test that the profile exposes usage and quota"""
+        settings.STORAGE_QUOTA_BYTES = {'editor': 1000}
+        make_asset(editor_user)
+        api_client.force_authenticate(user=editor_user)
+
+        response = api_client.get(reverse('profile'))
+
+        assert response.data['storage'] == {'bytes_used': 8, 'quota_bytes': 1000}
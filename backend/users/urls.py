@@ -10,4 +10,5 @@ urlpatterns = [
     path('profile/change-password/', views.change_password, name='change_password'),
     path('users/', views.user_list, name='user_list'),
     path('users/<int:pk>/', views.user_detail, name='user_detail'),
+    path('metrics/db/', views.database_metrics, name='database_metrics'),
 ]
\ No newline at end of file
@@ -1,11 +1,13 @@
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.db import IntegrityError
 from django.db import models
+from ShelfLifeDAM.db_metrics import connection_metrics
+from .authentication import FreshJWTAuthentication
 from .models import User
+from .tokens import RoleRefreshToken
 from .serializers import (
     UserRegistrationSerializer,
     UserSerializer,
@@ -40,7 +42,7 @@ def register_user(request):
 
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = RoleRefreshToken.for_user(user)
 
             return Response({
                 'user': UserSerializer(user, context={'request': request}).data,
@@ -82,7 +84,7 @@ def login_user(request):
     user = authenticate(username=username, password=password)
 
     if user:
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
         return Response({
             'user': UserSerializer(user, context={'request': request}).data,
             'refresh': str(refresh),
@@ -95,6 +97,7 @@ def login_user(request):
 
 
 @api_view(['GET', 'PUT', 'PATCH'])
+@authentication_classes([FreshJWTAuthentication])
 def user_profile(request):
     """
     Get or update user profile
@@ -117,6 +120,7 @@ def user_profile(request):
 
 
 @api_view(['POST'])
+@authentication_classes([FreshJWTAuthentication])
 def change_password(request):
     """
     Change user password
@@ -194,4 +198,13 @@ def user_detail(request, pk):
         user.delete()
         return Response({
             'message': 'User deleted successfully'
-        }, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        }, status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsAdminRole])
+def database_metrics(request):
+    """
+    Connection reuse and connect-time counters for this worker process (admin only)
+    """
+    return Response(connection_metrics.snapshot())
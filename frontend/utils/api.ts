@@ -120,6 +120,18 @@ export const assetsAPI = {
     return response.data
   },
 
+  // Precomputed recommendations, best first; empty until the related-assets job has run
+  related: async (id: string): Promise<{ results: (Asset & { score: number })[] }> => {
+    const response = await api.get(`/assets/assets/${id}/related/`)
+    return response.data
+  },
+
+  // One request for many ids (up to 100); ids that are gone or not visible come back in `missing`
+  getMany: async (ids: string[]): Promise<{ results: Asset[]; missing: string[] }> => {
+    const response = await api.post('/assets/assets/batch/', { ids })
+    return response.data
+  },
+
   create: async (data: FormData): Promise<Asset> => {
     const response = await api.post('/assets/assets/', data, {
       headers: { 'Content-Type': 'multipart/form-data' },
@@ -147,6 +159,123 @@ export const assetsAPI = {
     const response = await api.get('/assets/search/', { params })
     return response.data
   },
+
+  // Same parameters as list(); pass a query-language tree as `filter: JSON.stringify(tree)`
+  export: async (params?: any): Promise<Blob> => {
+    const response = await api.get('/assets/assets/export/', { params, responseType: 'blob' })
+    return response.data
+  },
+
+  // One change for every asset matching the filter (up to 500, own assets unless admin)
+  bulk: async (
+    filter: object,
+    action: 'activate' | 'deactivate' | 'add_tags' | 'remove_tags',
+    tags?: string[]
+  ): Promise<{ matched: number; changed: number }> => {
+    const response = await api.post('/assets/assets/bulk/', { filter, action, tags })
+    return response.data
+  },
+
+  tags: async (prefix: string, limit?: number): Promise<{ name: string; count: number }[]> => {
+    const response = await api.get('/assets/tags/', { params: { prefix, limit } })
+    return response.data
+  },
+
+  // Incremental sync: pass the previous cursor to receive only what changed since
+  changes: async (since?: string, limit?: number) => {
+    const response = await api.get('/assets/changes/', { params: { since, limit } })
+    return response.data as {
+      cursor: string
+      has_more: boolean
+      changes: Array<{ seq: number; type: 'upsert'; asset: Asset } | { seq: number; type: 'delete'; asset_id: string }>
+    }
+  },
+}
+
+export const savedSearchesAPI = {
+  list: async () => {
+    const response = await api.get('/assets/saved-searches/')
+    return response.data
+  },
+
+  create: async (data: {
+    name: string
+    query?: string
+    file_type?: string
+    tags?: string[]
+    date_from?: string
+    date_to?: string
+  }) => {
+    const response = await api.post('/assets/saved-searches/', data)
+    return response.data
+  },
+
+  update: async (id: string, data: any) => {
+    const response = await api.patch(`/assets/saved-searches/${id}/`, data)
+    return response.data
+  },
+
+  delete: async (id: string): Promise<void> => {
+    await api.delete(`/assets/saved-searches/${id}/`)
+  },
+
+  // Opening a saved search resets what changes() reports
+  results: async (id: string, page?: number) => {
+    const response = await api.get(`/assets/saved-searches/${id}/results/`, { params: { page } })
+    return response.data as { count: number; next: string | null; previous: string | null; results: Asset[] }
+  },
+
+  changes: async (id: string) => {
+    const response = await api.get(`/assets/saved-searches/${id}/changes/`)
+    return response.data as { since: string | null; entered: string[]; left: string[] }
+  },
+}
+
+export interface Collection {
+  collection_id: string
+  name: string
+  parent: string | null
+  user: number
+  path: string
+  depth: number
+  asset_count: number
+  subtree_asset_count: number
+  created_at: string
+  updated_at: string
+}
+
+// Nested collections; list a subtree's assets with assetsAPI.list({ collection: id })
+export const collectionsAPI = {
+  // parent: a collection id for its children, 'root' for the top level
+  list: async (params?: { parent?: string; subtree?: string; page?: number }) => {
+    const response = await api.get('/assets/collections/', { params })
+    return response.data as { count: number; next: string | null; previous: string | null; results: Collection[] }
+  },
+
+  create: async (data: { name: string; parent?: string | null }): Promise<Collection> => {
+    const response = await api.post('/assets/collections/', data)
+    return response.data
+  },
+
+  // Changing parent moves the collection with everything under it
+  update: async (id: string, data: { name?: string; parent?: string | null }): Promise<Collection> => {
+    const response = await api.patch(`/assets/collections/${id}/`, data)
+    return response.data
+  },
+
+  delete: async (id: string): Promise<void> => {
+    await api.delete(`/assets/collections/${id}/`)
+  },
+
+  addAssets: async (id: string, assetIds: string[]) => {
+    const response = await api.post(`/assets/collections/${id}/add_assets/`, { asset_ids: assetIds })
+    return response.data as { added: number; asset_count: number; subtree_asset_count: number }
+  },
+
+  removeAssets: async (id: string, assetIds: string[]) => {
+    const response = await api.post(`/assets/collections/${id}/remove_assets/`, { asset_ids: assetIds })
+    return response.data as { removed: number; asset_count: number; subtree_asset_count: number }
+  },
 }
 
 export const activityAPI = {
@@ -173,6 +302,17 @@ export const activityAPI = {
   deleteComment: async (id: string) => {
     await api.delete(`/activity/comments/${id}/`)
   },
+
+  // Server-Sent Events push of activity and asset changes; the browser resumes with Last-Event-ID on reconnect
+  subscribe: (onEvent: (type: 'activity' | 'asset', data: any) => void): EventSource => {
+    const token = localStorage.getItem('accessToken') || ''
+    const source = new EventSource(`${API_BASE_URL}/activity/stream/?token=${encodeURIComponent(token)}`)
+    const types: Array<'activity' | 'asset'> = ['activity', 'asset']
+    types.forEach((type) => {
+      source.addEventListener(type, (event) => onEvent(type, JSON.parse((event as MessageEvent).data)))
+    })
+    return source
+  },
 }
 
 export const usersAPI = {